@@ -0,0 +1,157 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+"""Measures the memory use and throughput of DataTree on long runs.
+
+Run with ``python scripts/benchmark_datatree.py`` from the hypothesis-python
+directory. This builds a tree from a large number of random test cases, as a
+long generate phase would, and reports how long each of the tree's
+operations takes and how much memory the tree uses. It then times exploring
+every test case of a test function with a small search space, as the generate
+phase does for a strategy that it can exhaust.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import gc
+import os
+import sys
+import timeit
+import tracemalloc
+from random import Random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from hypothesis.internal.compat import hbytes  # noqa: E402 isort:skip
+from hypothesis.internal.conjecture.data import (  # noqa: E402 isort:skip
+    ConjectureData,
+    StopTest,
+)
+from hypothesis.internal.conjecture.datatree import DataTree  # noqa: E402 isort:skip
+
+
+def test_function(data):
+    # A shape that resembles a typical strategy: a length-prefixed list of
+    # integers of mixed sizes, some masked bits and some forced bytes.
+    n = data.draw_bits(3)
+    for _ in range(n):
+        data.write(hbytes([0]))
+        if data.draw_bits(1):
+            data.draw_bits(64)
+        else:
+            data.draw_bits(8)
+    if n > 2 and data.draw_bits(16) == 0:
+        data.mark_interesting()
+
+
+def small_test_function(data):
+    # Has 2 ** 16 distinct test cases, each of which draws two whole bytes
+    # after a long run of forced bytes, so that exploring all of them means
+    # marking nodes with 256 children as dead, deep in the tree.
+    for _ in range(2):
+        data.write(hbytes(32))
+        data.draw_bits(8)
+
+
+def exhaust(seed):
+    """Adds test cases starting with novel prefixes to a tree until it is
+    exhausted, and returns the number of test cases that took."""
+    random = Random(seed)
+    tree = DataTree(cap=8 * 1024)
+    count = 0
+    while not tree.is_exhausted:
+        prefix = tree.generate_novel_prefix(random)
+        padding = hbytes(random.getrandbits(8) for _ in range(66 - len(prefix)))
+        data = ConjectureData.for_buffer(prefix + padding)
+        small_test_function(data)
+        data.freeze()
+        tree.add(data)
+        count += 1
+    return count
+
+
+def make_corpus(n_examples, seed):
+    random = Random(seed)
+    corpus = []
+    for _ in range(n_examples):
+        size = random.randint(1, 80)
+        buffer = hbytes(random.getrandbits(8) for _ in range(size))
+        data = ConjectureData.for_buffer(buffer)
+        try:
+            test_function(data)
+        except StopTest:
+            pass
+        data.freeze()
+        corpus.append(data)
+    return corpus
+
+
+def build_tree(corpus):
+    tree = DataTree(cap=8 * 1024)
+    for data in corpus:
+        tree.add(data)
+    return tree
+
+
+def report(name, seconds, count):
+    print("%-24s %8.3fs  %10.0f ops/s" % (name, seconds, count / seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--examples", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.examples, args.seed)
+    buffers = [d.buffer for d in corpus]
+
+    gc.collect()
+    tracemalloc.start()
+    tree = build_tree(corpus)
+    gc.collect()
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+
+    print("Examples: %d" % (len(corpus),))
+    print("Tree memory: %.1f MiB" % (memory / (1024.0 * 1024.0),))
+
+    t = timeit.default_timer()
+    tree = build_tree(corpus)
+    report("add", timeit.default_timer() - t, len(corpus))
+
+    t = timeit.default_timer()
+    for b in buffers:
+        tree.rewrite(b)
+    report("rewrite", timeit.default_timer() - t, len(buffers))
+
+    random = Random(args.seed)
+    n_prefixes = len(corpus) // 10
+    t = timeit.default_timer()
+    for _ in range(n_prefixes):
+        tree.generate_novel_prefix(random)
+    report("generate_novel_prefix", timeit.default_timer() - t, n_prefixes)
+
+    t = timeit.default_timer()
+    count = exhaust(args.seed)
+    report("exhaust", timeit.default_timer() - t, count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+"""Measures how many calls to ConjectureData.draw_bits we can make per second.
+
+Run with ``python scripts/benchmark_draw_bits.py`` from the hypothesis-python
+directory. This compares replaying a fixed buffer (as the shrinker and
+database reuse do, via ConjectureData.for_buffer) with generating from a
+draw_bytes function (as the generate phase does).
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import os
+import sys
+import timeit
+from random import Random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from hypothesis.internal.compat import hbytes  # noqa: E402 isort:skip
+from hypothesis.internal.conjecture.data import ConjectureData  # noqa: E402 isort:skip
+
+
+# A mix of draw sizes that resembles a typical strategy: single bits for
+# booleans and list continuation, masked and whole bytes, and wide integers.
+DRAW_SIZES = (1, 8, 3, 64, 16, 1, 32, 7)
+
+
+def bytes_needed(n_draws):
+    return sum((DRAW_SIZES[i % len(DRAW_SIZES)] + 7) // 8 for i in range(n_draws))
+
+
+def run_draws(data, n_draws):
+    sizes = DRAW_SIZES
+    k = len(sizes)
+    for i in range(n_draws):
+        data.draw_bits(sizes[i % k])
+    data.freeze()
+
+
+def replay(buffer, n_draws):
+    run_draws(ConjectureData.for_buffer(buffer), n_draws)
+
+
+def generate(buffer, n_draws, random):
+    def draw_bytes(data, n):
+        return hbytes(random.getrandbits(8) for _ in range(n))
+
+    run_draws(ConjectureData(max_length=len(buffer), draw_bytes=draw_bytes), n_draws)
+
+
+def report(name, seconds, count):
+    print("%-12s %8.3fs  %12.0f draws/s" % (name, seconds, count / seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--draws", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random = Random(args.seed)
+    size = bytes_needed(args.draws)
+    buffer = hbytes(random.getrandbits(8) for _ in range(size))
+    total = args.draws * args.repeat
+
+    print("Buffer size: %d bytes, %d draws per test case" % (size, args.draws))
+
+    t = timeit.default_timer()
+    for _ in range(args.repeat):
+        replay(buffer, args.draws)
+    report("replay", timeit.default_timer() - t, total)
+
+    t = timeit.default_timer()
+    for _ in range(args.repeat):
+        generate(buffer, args.draws, random)
+    report("generate", timeit.default_timer() - t, total)
+
+
+if __name__ == "__main__":
+    main()
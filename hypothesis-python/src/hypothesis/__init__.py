@@ -25,8 +25,16 @@ failing examples it finds.
 
 from hypothesis._settings import settings, Verbosity, Phase, HealthCheck, unlimited
 from hypothesis.version import __version_info__, __version__
-from hypothesis.control import assume, note, reject, event
-from hypothesis.core import given, find, example, seed, reproduce_failure, PrintSettings
+from hypothesis.control import assume, note, reject, event, target
+from hypothesis.core import (
+    given,
+    find,
+    example,
+    seed,
+    reproduce_failure,
+    batched,
+    PrintSettings,
+)
 from hypothesis.internal.entropy import register_random
 from hypothesis.utils.conventions import infer
 
@@ -43,10 +51,12 @@ __all__ = [
     "given",
     "unlimited",
     "reproduce_failure",
+    "batched",
     "find",
     "example",
     "note",
     "event",
+    "target",
     "infer",
     "register_random",
     "__version__",
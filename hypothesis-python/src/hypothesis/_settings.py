@@ -37,7 +37,7 @@ from hypothesis.errors import (
     InvalidArgument,
     InvalidState,
 )
-from hypothesis.internal.compat import string_types
+from hypothesis.internal.compat import integer_types, string_types
 from hypothesis.internal.reflection import get_pretty_function_description, proxies
 from hypothesis.internal.validation import check_type, try_convert
 from hypothesis.utils.conventions import UniqueIdentifier, not_set
@@ -502,7 +502,8 @@ class Phase(IntEnum):
     explicit = 0
     reuse = 1
     generate = 2
-    shrink = 3
+    target = 3
+    shrink = 4
 
 
 @unique
@@ -657,6 +658,59 @@ Set this to None to disable this behaviour entirely.
 )
 
 
+def _validate_time_budget(x):
+    if x is None or (
+        isinstance(x, (int, float)) and not isinstance(x, bool) and x > 0
+    ):
+        return x
+    raise InvalidArgument(
+        "time_budget=%r (type %s) must be a positive integer or float number of "
+        "seconds, or None to disable the time budget." % (x, type(x).__name__)
+    )
+
+
+settings._define_setting(
+    "time_budget",
+    default=None,
+    validator=_validate_time_budget,
+    description=u"""
+If set, a time in seconds that Hypothesis may spend generating examples for a
+test, and separately the time that it may spend shrinking them once it has
+found a failure. When the time for generating runs out the test passes as if
+it had run :obj:`~hypothesis.settings.max_examples` examples, and when the
+time for shrinking runs out Hypothesis reports the smallest failing example
+it has found so far.
+
+This is a budget for the whole test rather than each example, so it is useful
+for keeping slow tests within a hard time limit such as that of a CI job. It
+is checked after each example, so a single very slow example can still take
+longer.
+""",
+)
+
+
+def _validate_concurrency(x):
+    if isinstance(x, integer_types) and not isinstance(x, bool) and x >= 1:
+        return x
+    raise InvalidArgument(
+        "concurrency=%r (type %s) must be a positive integer." % (x, type(x).__name__)
+    )
+
+
+settings._define_setting(
+    "concurrency",
+    default=1,
+    validator=_validate_concurrency,
+    description=u"""
+For ``async def`` tests, the number of examples to run at once on the event
+loop. Examples are always generated independently of each other, and any that
+fail are run again on their own to be reported and shrunk, so this only
+affects how long the test takes. It is useful for I/O-bound tests, and has no
+effect on tests that are not coroutine functions. See :ref:`async-tests`.
+""",
+)
+
+
 class PrintSettings(Enum):
     """Flags to determine whether or not to print a detailed example blob to
     use with :func:`~hypothesis.reproduce_failure` for failing test cases."""
@@ -702,6 +756,23 @@ def _validate_print_blob(value):
     return value
 
 
+settings._define_setting(
+    "coverage_guided",
+    default=False,
+    options=(True, False),
+    description="""
+If this is True then Hypothesis will trace which branches of your code each
+example executes while generating examples, and will focus its mutations on
+examples that reached code that no earlier example did. These examples are
+also saved to the :obj:`~hypothesis.settings.database`, so later runs start
+from the same coverage.
+
+Tracing adds noticeable overhead to every example, and is skipped entirely if
+another trace function (e.g. from a coverage tool or a debugger) is active.
+""",
+)
+
+
 settings._define_setting(
     "print_blob",
     default=PrintSettings.INFER,
@@ -23,6 +23,7 @@ import math
 import operator
 import string
 import sys
+import threading
 from decimal import Context, Decimal, localcontext
 from fractions import Fraction
 from functools import reduce
@@ -174,6 +175,9 @@ def convert_value(v):
 
 
 STRATEGY_CACHE = LRUReusedCache(1024)
+# The cache is shared by every thread, and even a lookup updates its internal
+# bookkeeping, so all access to it must hold this lock.
+STRATEGY_CACHE_LOCK = threading.RLock()
 
 
 def cacheable(fn):
@@ -188,13 +192,15 @@ def cacheable(fn):
             return fn(*args, **kwargs)
         cache_key = (fn, tuple(map(convert_value, args)), frozenset(kwargs_cache_key))
         try:
-            return STRATEGY_CACHE[cache_key]
+            with STRATEGY_CACHE_LOCK:
+                return STRATEGY_CACHE[cache_key]
         except TypeError:
             return fn(*args, **kwargs)
         except KeyError:
             result = fn(*args, **kwargs)
             if not isinstance(result, SearchStrategy) or result.is_cacheable:
-                STRATEGY_CACHE[cache_key] = result
+                with STRATEGY_CACHE_LOCK:
+                    STRATEGY_CACHE[cache_key] = result
             return result
 
     cached_strategy.__clear_cache = STRATEGY_CACHE.clear
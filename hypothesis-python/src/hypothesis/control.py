@@ -17,10 +17,12 @@
 
 from __future__ import absolute_import, division, print_function
 
+import math
 import traceback
 
 from hypothesis import Verbosity, settings
 from hypothesis.errors import CleanupFailed, InvalidArgument, UnsatisfiedAssumption
+from hypothesis.internal.compat import integer_types, string_types
 from hypothesis.reporting import report
 from hypothesis.utils.dynamicvariables import DynamicVariable
 
@@ -125,3 +127,54 @@ def event(value):
 
     if context.data is not None:
         context.data.note_event(value)
+
+
+def target(observation, label=""):
+    # type: (float, str) -> float
+    """Calling this function with an ``int`` or ``float`` observation gives it
+    feedback with which to guide our search for inputs that will cause an
+    error, in addition to all the usual heuristics. Observations must always
+    be finite.
+
+    Hypothesis will try to maximize the observed value over several examples;
+    almost any metric will work so long as it makes sense to increase it.
+    For example, ``-abs(error)`` is a metric that increases as ``error``
+    approaches zero.
+
+    Example metrics:
+
+    - Number of elements in a collection, or tasks in a queue
+    - Mean or maximum runtime of a task (or both, if you use ``label``)
+    - Compression ratio for data (perhaps per-algorithm or per-level)
+    - Number of steps taken by a state machine
+
+    The optional ``label`` argument can be used to distinguish between
+    and therefore separately optimise distinct observations, such as the
+    mean and standard deviation of a dataset. It is an error to call
+    ``target()`` with any label more than once per test case.
+    """
+    if not isinstance(observation, integer_types + (float,)) or isinstance(
+        observation, bool
+    ):
+        raise InvalidArgument(
+            "observation=%r must be an int or a float" % (observation,)
+        )
+    if math.isnan(observation) or math.isinf(observation):
+        raise InvalidArgument("observation=%r must be finite" % (observation,))
+    if not isinstance(label, string_types):
+        raise InvalidArgument("label=%r must be a string" % (label,))
+
+    context = _current_build_context.value
+    if context is None:
+        raise InvalidArgument("Calling target() outside of a test is invalid.")
+
+    if context.data is not None:
+        observations = context.data.target_observations
+        if label in observations:
+            raise InvalidArgument(
+                "Calling target(%r, label=%r) would overwrite target(%r, label=%r)"
+                % (observation, label, observations[label], label)
+            )
+        observations[label] = observation
+
+    return observation
@@ -43,7 +43,11 @@ from hypothesis._settings import (
     local_settings,
     settings as Settings,
 )
-from hypothesis.control import BuildContext
+from hypothesis.control import (
+    BuildContext,
+    _current_build_context,
+    current_build_context,
+)
 from hypothesis.errors import (
     DeadlineExceeded,
     DidNotReproduce,
@@ -56,8 +60,13 @@ from hypothesis.errors import (
     NoSuchExample,
     Unsatisfiable,
     UnsatisfiedAssumption,
+    WorkerProcessError,
+)
+from hypothesis.executors import (
+    WorkerProcessPool,
+    default_new_style_executor,
+    new_style_executor,
 )
-from hypothesis.executors import new_style_executor
 from hypothesis.internal.compat import (
     PY2,
     bad_django_TestCase,
@@ -67,10 +76,22 @@ from hypothesis.internal.compat import (
     getfullargspec,
     hbytes,
     int_from_bytes,
+    integer_types,
     qualname,
 )
-from hypothesis.internal.conjecture.data import ConjectureData, StopTest
-from hypothesis.internal.conjecture.engine import ConjectureRunner, ExitReason, sort_key
+from hypothesis.internal.conjecture.data import ConjectureData, Status, StopTest
+from hypothesis.internal.conjecture.engine import (
+    FUZZ_CHECKPOINT_INTERVAL,
+    ConjectureRunner,
+    ExitReason,
+    corpus_keys,
+    sort_key,
+)
+from hypothesis.internal.coroutines import (
+    ContextStepper,
+    EventLoop,
+    is_coroutine_function,
+)
 from hypothesis.internal.entropy import deterministic_PRNG
 from hypothesis.internal.escalation import (
     escalate_hypothesis_internal_error,
@@ -88,15 +109,32 @@ from hypothesis.internal.reflection import (
     nicerepr,
     proxies,
 )
-from hypothesis.reporting import current_verbosity, report, verbose_report
+from hypothesis.internal.validation import check_type
+from hypothesis.reporting import (
+    current_verbosity,
+    report,
+    to_text,
+    verbose_report,
+    with_reporter,
+)
 from hypothesis.searchstrategy.collections import TupleStrategy
 from hypothesis.searchstrategy.strategies import SearchStrategy
 from hypothesis.statistics import note_engine_for_statistics
 from hypothesis.utils.conventions import infer
+from hypothesis.utils.dynamicvariables import DynamicVariable
 from hypothesis.version import __version__
 
 if False:
-    from typing import Any, Dict, Callable, Hashable, Optional, Union, TypeVar  # noqa
+    from typing import (  # noqa
+        Any,
+        Dict,
+        Callable,
+        Hashable,
+        Optional,
+        Tuple,
+        Union,
+        TypeVar,
+    )
     from hypothesis.utils.conventions import InferType  # noqa
 
     TestFunc = TypeVar("TestFunc", bound=Callable)
@@ -105,6 +143,10 @@ if False:
 running_under_pytest = False
 global_force_seed = None
 
+# Set by HypothesisHandle.fuzz to the arguments for ConjectureRunner.fuzz,
+# while it runs a @given test as a fuzzer rather than a normal test.
+fuzz_options = DynamicVariable(None)
+
 
 def new_random():
     return rnd_module.Random(rnd_module.getrandbits(128))
@@ -160,6 +202,34 @@ def seed(seed):
     return accept
 
 
+def batched(size):
+    # type: (int) -> Callable[[TestFunc], TestFunc]
+    """batched: Run the test on ``size`` examples at a time.
+
+    Each argument that the test gets from :func:`@given <hypothesis.given>`
+    is passed as a list of ``size`` values, one from each of ``size``
+    independently generated examples, so that the test can check them all in
+    one vectorised call. If the test fails, Hypothesis runs each of the
+    examples in a list of one value to find out which of them failed, and
+    shrinks and reports that example on its own.
+
+    :func:`~hypothesis.assume`, :func:`~hypothesis.note`,
+    :func:`~hypothesis.target`, :func:`~hypothesis.event` and
+    :func:`~hypothesis.strategies.data` only have their normal effect while
+    running a single example, and deadlines are only checked for single
+    examples.
+    """
+    check_type(integer_types, size, "size")
+    if size < 1:
+        raise InvalidArgument("size=%r must be at least 1" % (size,))
+
+    def accept(test):
+        test._hypothesis_internal_batch_size = size
+        return test
+
+    return accept
+
+
 def reproduce_failure(version, blob):
     """Run the example that corresponds to this data blob in order to reproduce
     a failure.
@@ -347,6 +417,26 @@ def get_random_for_wrapped_test(test, wrapped_test):
         return Random(seed)
 
 
+def prefetch_examples(wrapped_test):
+    """Hint to the database of a @given test that we are going to run it
+    soon, so that it can start loading its saved examples.
+
+    This is only a hint, so it does nothing for tests that don't look like
+    they came from @given, such as the TestCase of a stateful test."""
+    settings = getattr(wrapped_test, "_hypothesis_internal_use_settings", None)
+    handle = getattr(wrapped_test, "hypothesis", None)
+    if (
+        settings is None
+        or handle is None
+        or settings.database is None
+        or Phase.reuse not in settings.phases
+        or global_force_seed is not None
+    ):
+        return
+    database_key = function_digest(handle.inner_test)
+    settings.database.prefetch(corpus_keys(database_key))
+
+
 def process_arguments_to_given(
     wrapped_test,
     arguments,
@@ -483,13 +573,33 @@ def new_given_argspec(original_argspec, generator_kwargs):
     )
 
 
+def conclude_quietly(data, status, interesting_origin=None):
+    """Conclude ``data`` with ``status``, without raising the StopTest that
+    would normally stop the test there."""
+    try:
+        data.conclude_test(status, interesting_origin)
+    except StopTest as e:
+        assert e.testcounter == data.testcounter
+
+
 ROOT = os.path.dirname(__file__)
 
 STDLIB = os.path.dirname(os.__file__)
 
 
 class StateForActualGivenExecution(object):
-    def __init__(self, test_runner, search_strategy, test, settings, random, had_seed):
+    def __init__(
+        self,
+        test_runner,
+        search_strategy,
+        test,
+        settings,
+        random,
+        had_seed,
+        batch_size=1,
+        batch_arguments=(),
+        worker_processes=None,
+    ):
         self.test_runner = test_runner
         self.search_strategy = search_strategy
         self.settings = settings
@@ -503,6 +613,59 @@ class StateForActualGivenExecution(object):
 
         self.test = test
 
+        # An ``async def`` test is run to completion on our event loop, so
+        # everything else can call it like any other test. During a run we
+        # reuse one loop for every example, and may run several at once.
+        # Tests with a custom executor get the coroutine as before, because
+        # running it is that executor's job.
+        self.event_loop = EventLoop()
+        if is_coroutine_function(test) and test_runner is default_new_style_executor:
+            self.call_test = self.event_loop.synchronous(test)
+            self.concurrency = settings.concurrency
+        else:
+            self.call_test = test
+            self.concurrency = 1
+
+        # For tests decorated with @batched, the names of the arguments that
+        # are passed as a list of values.
+        self.batch_size = batch_size
+        self.batch_arguments = frozenset(batch_arguments) if batch_size > 1 else None
+
+        # For tests decorated with @worker_processes, we draw the arguments
+        # for each example here but call the test in a worker process, which
+        # draws the same arguments from a copy of the buffer.
+        if worker_processes is None:
+            self.worker_pool = None
+        else:
+            if batch_size > 1:
+                raise InvalidArgument(
+                    "%s cannot be both @batched and run in worker processes."
+                    % (test.__name__,)
+                )
+            self.worker_pool = WorkerProcessPool(self.run_in_worker, **worker_processes)
+            self.concurrency = 1
+            self.__call_test_here = self.call_test
+
+            @proxies(test)
+            def call_test_in_worker(*args, **kwargs):
+                return self.__call_test_in_worker(args, kwargs)
+
+            self.call_test = call_test_in_worker
+
+        # Explicit @example values are for a single example, so a @batched
+        # test gets them as a batch of one, just as when we run an example
+        # on its own to find out whether it failed.
+        if self.batch_arguments is None:
+            self.call_explicit_example = self.call_test
+        else:
+
+            @proxies(test)
+            def call_explicit_example(*args, **kwargs):
+                args, kwargs = convert_positional_arguments(test, args, kwargs)
+                return self.call_test(*args, **self.combine_batch([kwargs]))
+
+            self.call_explicit_example = call_explicit_example
+
         self.files_to_propagate = set()
         self.failed_normally = False
 
@@ -518,7 +681,7 @@ class StateForActualGivenExecution(object):
     ):
         text_repr = [None]
         if self.settings.deadline is None:
-            test = self.test
+            test = self.call_test
         else:
 
             @proxies(self.test)
@@ -526,7 +689,7 @@ class StateForActualGivenExecution(object):
                 self.__test_runtime = None
                 initial_draws = len(data.draw_times)
                 start = benchmark_time()
-                result = self.test(*args, **kwargs)
+                result = self.call_test(*args, **kwargs)
                 finish = benchmark_time()
                 internal_draw_time = sum(data.draw_times[initial_draws:])
                 runtime = (finish - start - internal_draw_time) * 1000
@@ -545,6 +708,8 @@ class StateForActualGivenExecution(object):
                 with BuildContext(data, is_final=is_final):
                     with deterministic_PRNG():
                         args, kwargs = data.draw(self.search_strategy)
+                        if self.batch_arguments is not None:
+                            kwargs = self.combine_batch([kwargs])
                         if expected_failure is not None:
                             text_repr[0] = arg_string(test, args, kwargs)
 
@@ -594,6 +759,241 @@ class StateForActualGivenExecution(object):
             )
         return result
 
+    def combine_batch(self, batch):
+        """Combine the keyword arguments for each example in ``batch`` into
+        the arguments for a single call to a @batched test."""
+        kwargs = dict(batch[0])
+        for name in self.batch_arguments:
+            kwargs[name] = [example[name] for example in batch]
+        return kwargs
+
+    def __draw_batch(self, datas):
+        """Draw the arguments for the test from each of ``datas``, and
+        return a list of ``(data, context, args, kwargs)`` for those that we
+        could draw from. Each ``context`` is the build context that the
+        example was drawn in, which the caller must close once it has run
+        the test."""
+        drawn = []
+        for data in datas:
+            context = BuildContext(data)
+            try:
+                with local_settings(self.settings):
+                    with _current_build_context.with_value(context):
+                        with deterministic_PRNG():
+                            args, kwargs = data.draw(self.search_strategy)
+            except UnsatisfiedAssumption:
+                context.close()
+                conclude_quietly(data, Status.INVALID)
+            except StopTest as e:
+                context.close()
+                if e.testcounter != data.testcounter:
+                    raise
+            else:
+                drawn.append((data, context, args, kwargs))
+        return drawn
+
+    def evaluate_test_batch(self, datas):
+        """Run a @batched test once, on an example drawn from each of
+        ``datas``. If that fails, we find out which examples were to blame
+        by running each of them on its own."""
+        drawn = self.__draw_batch(datas)
+        if not drawn:
+            return
+
+        args = drawn[0][2]
+        kwargs = self.combine_batch([kwargs for _, _, _, kwargs in drawn])
+
+        def run(data):
+            # The combined call doesn't belong to any one example, so it
+            # runs in a build context without data, where note(), event()
+            # and target() have no effect (just as for explicit examples).
+            # They take effect if we run each example on its own.
+            try:
+                with local_settings(self.settings):
+                    with BuildContext(None):
+                        with deterministic_PRNG():
+                            return self.call_test(*args, **kwargs)
+            finally:
+                for _, context, _, _ in drawn:
+                    context.close()
+
+        try:
+            self.test_runner(drawn[0][0], run)
+        except (
+            HypothesisDeprecationWarning,
+            FailedHealthCheck,
+            StopTest,
+        ) + skip_exceptions_to_reraise():
+            raise
+        except failure_exceptions_to_catch() as e:
+            escalate_hypothesis_internal_error()
+            self.__evaluate_batch_individually(
+                [data for data, _, _, _ in drawn],
+                expect_failure=not isinstance(e, UnsatisfiedAssumption),
+            )
+
+    def evaluate_test_concurrently(self, datas):
+        """Run an ``async def`` test on an example drawn from each of
+        ``datas``, all at once on our event loop. Each coroutine sees the
+        build context of its own example, so notes, events and interactive
+        draws work as usual. Examples that fail are run again on their own,
+        so that each failure is attributed and shrunk as if the examples
+        had never been run together."""
+        drawn = self.__draw_batch(datas)
+        if not drawn:
+            return
+
+        def run(data):
+            try:
+                with local_settings(self.settings):
+                    with deterministic_PRNG():
+                        return self.event_loop.gather(
+                            [
+                                ContextStepper(
+                                    self.test(*args, **kwargs),
+                                    lambda context=context: (
+                                        _current_build_context.with_value(context)
+                                    ),
+                                )
+                                for _, context, args, kwargs in drawn
+                            ]
+                        )
+            finally:
+                for _, context, _, _ in drawn:
+                    context.close()
+
+        results = self.test_runner(drawn[0][0], run)
+
+        failed = []
+        for (data, _, _, _), result in zip(drawn, results):
+            if isinstance(result, UnsatisfiedAssumption):
+                conclude_quietly(data, Status.INVALID)
+            elif (
+                isinstance(result, StopTest)
+                and result.testcounter == data.testcounter
+            ):
+                # The test overran the buffer in an interactive draw, which
+                # has already concluded this example.
+                pass
+            elif isinstance(
+                result,
+                (HypothesisDeprecationWarning, FailedHealthCheck, StopTest)
+                + skip_exceptions_to_reraise(),
+            ):
+                raise result
+            elif isinstance(result, failure_exceptions_to_catch()):
+                failed.append(data)
+            elif isinstance(result, BaseException):
+                raise result
+            elif result is not None:
+                fail_health_check(
+                    self.settings,
+                    (
+                        "Tests run under @given should return None, but "
+                        "%s returned %r instead."
+                    )
+                    % (self.test.__name__, result),
+                    HealthCheck.return_value,
+                )
+        if failed:
+            self.__evaluate_batch_individually(failed, expect_failure=True)
+
+    def __evaluate_batch_individually(self, datas, expect_failure):
+        failed = False
+        for data in datas:
+            replay = ConjectureData.for_buffer(hbytes(data.buffer))
+            try:
+                self.evaluate_test_data(replay)
+            except StopTest as e:
+                if e.testcounter != replay.testcounter:
+                    raise
+            data.events.update(replay.events)
+            data.target_observations.update(replay.target_observations)
+            if replay.status == Status.INTERESTING:
+                failed = True
+                data.extra_information = replay.extra_information
+                conclude_quietly(data, Status.INTERESTING, replay.interesting_origin)
+            elif replay.status < Status.VALID:
+                conclude_quietly(data, Status.INVALID)
+        if expect_failure and not failed:
+            self.__flaky(
+                "Hypothesis %s failed when run on %d examples at once, but "
+                "passed when each of them was run on its own."
+                % (get_pretty_function_description(self.test), len(datas))
+            )
+
+    def __call_test_in_worker(self, args, kwargs):
+        context = current_build_context()
+        if context.data is None:
+            # There is no buffer to send for an explicit @example, so we
+            # have to run those here.
+            return self.__call_test_here(*args, **kwargs)
+        data = context.data
+        replied, outcome = self.worker_pool.run(hbytes(data.buffer), context.is_final)
+        if not replied:
+            raise WorkerProcessError(
+                "The worker process running this example died, with exit code %r."
+                % (outcome,),
+                interesting_origin=(WorkerProcessError, "<worker process>", outcome),
+            )
+        kind, value, events, target_observations, output = outcome
+        data.events.update(events)
+        data.target_observations.update(target_observations)
+        for line in output:
+            report(line)
+        if kind == "rejected":
+            raise UnsatisfiedAssumption()
+        if kind == "overrun":
+            raise InvalidArgument(
+                "Tests run in worker processes cannot draw more data once "
+                "they have started, e.g. with st.data()."
+            )
+        if kind == "raised":
+            text, origin = value
+            raise WorkerProcessError(text, interesting_origin=origin)
+        return value
+
+    def close_worker_pool(self):
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+
+    def run_in_worker(self, buffer, is_final):
+        """Run the test in a worker process, on the arguments drawn from
+        ``buffer``, and return a picklable summary of what happened. This
+        must never raise, or the worker would die."""
+        data = ConjectureData.for_buffer(buffer)
+        output = []
+        value = None
+        try:
+            with with_reporter(output.append):
+                with local_settings(self.settings):
+                    with BuildContext(data, is_final=is_final):
+                        with deterministic_PRNG():
+                            args, kwargs = data.draw(self.search_strategy)
+                            result = self.__call_test_here(*args, **kwargs)
+            kind = "returned"
+            if result is not None:
+                value = repr(result)
+        except UnsatisfiedAssumption:
+            kind = "rejected"
+        except StopTest:
+            kind = "overrun"
+        except BaseException as e:
+            kind = "raised"
+            tb = get_trimmed_traceback()
+            origin = traceback.extract_tb(tb)[-1]
+            value = (
+                "".join(traceback.format_exception(type(e), e, tb)),
+                (qualname(type(e)), origin[0], origin[1]),
+            )
+        return (
+            kind,
+            value,
+            set(data.events),
+            dict(data.target_observations),
+            list(map(to_text, output)),
+        )
+
     def evaluate_test_data(self, data):
         try:
             result = self.execute(data)
@@ -631,10 +1031,16 @@ class StateForActualGivenExecution(object):
                 info.__expected_exception = e
                 verbose_report(info.__expected_traceback)
 
-                origin = traceback.extract_tb(tb)[-1]
-                filename = origin[0]
-                lineno = origin[1]
-                data.mark_interesting((type(e), filename, lineno))
+                if isinstance(e, WorkerProcessError):
+                    # The traceback only goes as far as where we re-raised
+                    # the failure from the worker process.
+                    interesting_origin = e.interesting_origin
+                else:
+                    origin = traceback.extract_tb(tb)[-1]
+                    filename = origin[0]
+                    lineno = origin[1]
+                    interesting_origin = (type(e), filename, lineno)
+                data.mark_interesting(interesting_origin)
 
     def run(self):
         # Tell pytest to omit the body of this function from tracebacks
@@ -643,14 +1049,36 @@ class StateForActualGivenExecution(object):
             database_key = function_digest(self.test)
         else:
             database_key = None
+        if self.batch_size > 1:
+            batch_test_function = self.evaluate_test_batch
+            batch_size = self.batch_size
+        elif self.concurrency > 1:
+            batch_test_function = self.evaluate_test_concurrently
+            batch_size = self.concurrency
+        else:
+            batch_test_function = None
+            batch_size = 1
         runner = ConjectureRunner(
             self.evaluate_test_data,
             settings=self.settings,
             random=self.random,
             database_key=database_key,
+            batch_test_function=batch_test_function,
+            batch_size=batch_size,
+            # Labels are computed from the names of strategy classes, so are
+            # the same in every process (unlike reprs, which can include the
+            # addresses of functions). Changing a strategy's arguments changes
+            # the source of the test, and so the database_key.
+            strategy_label=self.search_strategy.label,
         )
+        if self.worker_pool is not None:
+            self.worker_pool.start()
         try:
-            runner.run()
+            with self.event_loop:
+                if fuzz_options.value is None:
+                    runner.run()
+                else:
+                    runner.fuzz(**fuzz_options.value)
         finally:
             self.used_examples_from_database = runner.used_examples_from_database
         note_engine_for_statistics(runner)
@@ -800,6 +1228,69 @@ class HypothesisHandle(object):
     """
 
     inner_test = attr.ib()
+    _get_fuzz_target = attr.ib(repr=False)
+    _run_fuzzer = attr.ib(repr=False)
+
+    @property
+    def fuzz_one_input(self):
+        # type: () -> Callable[[Union[bytes, bytearray, memoryview]], Optional[bytes]]
+        """Run the test once on a buffer of bytes, for use as the entry point
+        of an external fuzzer such as AFL or libFuzzer.
+
+        The returned function draws the arguments for the test from the
+        buffer, as ``ConjectureData.for_buffer`` would, without any of the
+        generating, shrinking or reporting that a normal call to the test
+        does. It returns None if the buffer was too short or invalid (e.g.
+        it failed an assumption), and otherwise the part of the buffer that
+        the test used. If the test fails, the buffer is saved to the
+        example database so that the next normal run of the test will
+        replay (and shrink) it, and the exception is re-raised.
+        """
+        try:
+            return self.__cached_target
+        except AttributeError:
+            self.__cached_target = self._get_fuzz_target()
+            return self.__cached_target
+
+    def fuzz(
+        self, max_calls=None, checkpoint_interval=FUZZ_CHECKPOINT_INTERVAL, shard=None
+    ):
+        # type: (Optional[int], int, Optional[Tuple[int, int]]) -> None
+        """Run the test as a long-running fuzzer: Keep generating examples
+        until the test fails or ``max_calls`` new examples have been run
+        (forever if that is None), then report any failure as a normal call
+        would.
+
+        Every ``checkpoint_interval`` examples, the current pool of examples
+        that Hypothesis is mutating is saved to the example database, so
+        that fuzzing the same test again resumes from where it stopped.
+        The test must take all of its arguments from ``@given``.
+
+        If ``shard`` is a pair ``(index, count)``, this run only explores
+        its share of the inputs that ``count`` runs with the same ``count``
+        and different indices would explore between them.
+        """
+        if shard is not None:
+            check_type(tuple, shard, "shard")
+            if len(shard) != 2:
+                raise InvalidArgument(
+                    "shard=%r must be a pair (index, count)" % (shard,)
+                )
+            index, count = shard
+            check_type(integer_types, index, "index")
+            check_type(integer_types, count, "count")
+            if not 0 <= index < count:
+                raise InvalidArgument(
+                    "shard=%r must have 0 <= index < count" % (shard,)
+                )
+        with fuzz_options.with_value(
+            {
+                "max_calls": max_calls,
+                "checkpoint_interval": checkpoint_interval,
+                "shard": shard,
+            }
+        ):
+            self._run_fuzzer()
 
 
 def given(
@@ -841,6 +1332,19 @@ def given(
 
         argspec = new_given_argspec(original_argspec, generator_kwargs)
 
+        def resolve_inferred_arguments(test):
+            if infer in generator_kwargs.values():
+                hints = get_type_hints(test)
+            for name in [
+                name for name, value in generator_kwargs.items() if value is infer
+            ]:
+                if name not in hints:
+                    raise InvalidArgument(
+                        "passed %s=infer for %s, but %s has no type annotation"
+                        % (name, test.__name__, name)
+                    )
+                generator_kwargs[name] = st.from_type(hints[name])
+
         @impersonate(test)
         @define_function_signature(test.__name__, test.__doc__, argspec)
         def wrapped_test(*arguments, **kwargs):
@@ -863,20 +1367,13 @@ def given(
                 )
 
             settings = wrapped_test._hypothesis_internal_use_settings
+            if fuzz_options.value is not None:
+                # As in get_fuzz_target, fuzzing ignores deadlines.
+                settings = Settings(parent=settings, deadline=None)
 
             random = get_random_for_wrapped_test(test, wrapped_test)
 
-            if infer in generator_kwargs.values():
-                hints = get_type_hints(test)
-            for name in [
-                name for name, value in generator_kwargs.items() if value is infer
-            ]:
-                if name not in hints:
-                    raise InvalidArgument(
-                        "passed %s=infer for %s, but %s has no type annotation"
-                        % (name, test.__name__, name)
-                    )
-                generator_kwargs[name] = st.from_type(hints[name])
+            resolve_inferred_arguments(test)
 
             processed_args = process_arguments_to_given(
                 wrapped_test,
@@ -915,6 +1412,9 @@ def given(
                 settings,
                 random,
                 had_seed=wrapped_test._hypothesis_internal_use_seed,
+                batch_size=wrapped_test._hypothesis_internal_batch_size,
+                batch_arguments=generator_kwargs,
+                worker_processes=wrapped_test._hypothesis_internal_worker_processes,
             )
 
             reproduce_failure = wrapped_test._hypothesis_internal_use_reproduce_failure
@@ -953,12 +1453,21 @@ def given(
                         "test. Have you added it since this blob was "
                         "generated?"
                     )
+                finally:
+                    state.close_worker_pool()
 
             execute_explicit_examples(
-                test_runner, test, wrapped_test, settings, arguments, kwargs
+                test_runner,
+                state.call_explicit_example,
+                wrapped_test,
+                settings,
+                arguments,
+                kwargs,
             )
 
-            if settings.max_examples <= 0:
+            # Fuzzing isn't limited by max_examples, so tests which don't
+            # run any examples normally can still be fuzzed.
+            if settings.max_examples <= 0 and fuzz_options.value is None:
                 return
 
             if not (
@@ -1013,6 +1522,59 @@ def given(
                         get_trimmed_traceback()
                     )
                     raise the_error_hypothesis_found
+            finally:
+                state.close_worker_pool()
+
+        def get_fuzz_target():
+            test = wrapped_test.hypothesis.inner_test
+            # Deadlines are for catching slow tests in normal runs, and would
+            # only make the results of fuzzing depend on how busy we are.
+            settings = Settings(
+                parent=wrapped_test._hypothesis_internal_use_settings, deadline=None
+            )
+            random = get_random_for_wrapped_test(test, wrapped_test)
+            resolve_inferred_arguments(test)
+            _, _, test_runner, search_strategy = process_arguments_to_given(
+                wrapped_test,
+                (),
+                {},
+                generator_arguments,
+                generator_kwargs,
+                argspec,
+                test,
+                settings,
+            )
+            state = StateForActualGivenExecution(
+                test_runner,
+                search_strategy,
+                test,
+                settings,
+                random,
+                had_seed=False,
+                batch_size=wrapped_test._hypothesis_internal_batch_size,
+                batch_arguments=generator_kwargs,
+                worker_processes=wrapped_test._hypothesis_internal_worker_processes,
+            )
+            database_key = function_digest(test)
+
+            def fuzz_one_input(buffer):
+                # type: (Union[bytes, bytearray, memoryview]) -> Optional[bytes]
+                data = ConjectureData.for_buffer(buffer)
+                try:
+                    state.execute(data)
+                except (StopTest, UnsatisfiedAssumption):
+                    return None
+                except BaseException:
+                    if settings.database is not None:
+                        settings.database.save(database_key, hbytes(data.buffer))
+                        settings.database.flush()
+                    raise
+                return hbytes(data.buffer)
+
+            return fuzz_one_input
+
+        def run_fuzzer():
+            wrapped_test()
 
         for attrib in dir(test):
             if not (attrib.startswith("_") or hasattr(wrapped_test, attrib)):
@@ -1030,7 +1592,13 @@ def given(
         wrapped_test._hypothesis_internal_use_reproduce_failure = getattr(
             test, "_hypothesis_internal_use_reproduce_failure", None
         )
-        wrapped_test.hypothesis = HypothesisHandle(test)
+        wrapped_test._hypothesis_internal_batch_size = getattr(
+            test, "_hypothesis_internal_batch_size", 1
+        )
+        wrapped_test._hypothesis_internal_worker_processes = getattr(
+            test, "_hypothesis_internal_worker_processes", None
+        )
+        wrapped_test.hypothesis = HypothesisHandle(test, get_fuzz_target, run_fuzzer)
         return wrapped_test
 
     return run_test_with_generator
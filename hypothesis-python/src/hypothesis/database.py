@@ -19,14 +19,37 @@ from __future__ import absolute_import, division, print_function
 
 import binascii
 import os
+import struct
+import threading
 import warnings
+import zlib
+from contextlib import contextmanager
 from hashlib import sha1
 
 from hypothesis.configuration import storage_directory
-from hypothesis.errors import HypothesisException, HypothesisWarning
-from hypothesis.internal.compat import FileNotFoundError, hbytes
+from hypothesis.errors import HypothesisException, HypothesisWarning, InvalidArgument
+from hypothesis.internal.compat import (
+    FileNotFoundError,
+    OrderedDict,
+    binary_type,
+    hbytes,
+    struct_pack,
+    struct_unpack,
+)
 from hypothesis.utils.conventions import not_set
 
+try:
+    import queue
+except ImportError:  # pragma: no cover
+    import Queue as queue  # type: ignore
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # On Windows, PackedExampleDatabase can't lock its segments, so it never
+    # compacts them.
+    fcntl = None
+
 
 def _db_for_path(path=None):
     if path is not_set:
@@ -52,7 +75,10 @@ def _db_for_path(path=None):
             return InMemoryExampleDatabase()
     if path in (None, ":memory:"):
         return InMemoryExampleDatabase()
-    return DirectoryBasedExampleDatabase(str(path))
+    path = str(path)
+    if path.endswith(SQLITE_SUFFIXES) and not os.path.isdir(path):
+        return SQLiteExampleDatabase(path)
+    return DirectoryBasedExampleDatabase(path)
 
 
 class EDMeta(type):
@@ -103,6 +129,42 @@ class ExampleDatabase(EDMeta("ExampleDatabase", (object,), {})):  # type: ignore
         """Return all values matching this key."""
         raise NotImplementedError("%s.fetch" % (type(self).__name__))
 
+    def fetch_many(self, keys):
+        """Return a dict mapping each of ``keys`` to a list of all values
+        matching it.
+
+        By default this calls ``fetch`` once per key, but databases for which
+        each request is a round trip may be able to do better.
+        """
+        return {key: list(self.fetch(key)) for key in keys}
+
+    def save_many(self, items):
+        """Save each ``(key, value)`` pair in ``items``, as ``save`` would."""
+        for key, value in items:
+            self.save(key, value)
+
+    def delete_many(self, items):
+        """Delete each ``(key, value)`` pair in ``items``, as ``delete``
+        would."""
+        for key, value in items:
+            self.delete(key, value)
+
+    def prefetch(self, keys):
+        """A hint that the values for ``keys`` are likely to be fetched soon,
+        e.g. because they belong to the next test to run. Databases may
+        start loading them in the background.
+
+        By default this does nothing.
+        """
+
+    def flush(self):
+        """Write any changes that this database has buffered to its
+        underlying storage. Hypothesis calls this at the end of each test.
+
+        Most databases don't buffer changes, so by default this does
+        nothing.
+        """
+
     def close(self):
         """Clear up any resources associated with this database."""
         raise NotImplementedError("%s.close" % (type(self).__name__))
@@ -116,7 +178,9 @@ class InMemoryExampleDatabase(ExampleDatabase):
         return "InMemoryExampleDatabase(%r)" % (self.data,)
 
     def fetch(self, key):
-        for v in self.data.get(key, ()):
+        # Copy the values, so that saves from other threads can't change
+        # them while we iterate.
+        for v in list(self.data.get(key, ())):
             yield v
 
     def save(self, key, value):
@@ -141,10 +205,44 @@ def _hash(key):
     return sha1(key).hexdigest()[:16]
 
 
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3")
+
+
+def _directory_entries(path):
+    """Yields a triple ``(key_hash, value_hash, value)`` for every entry of
+    the :class:`DirectoryBasedExampleDatabase` at ``path``."""
+    for kh in os.listdir(path):
+        key_path = os.path.join(path, kh)
+        if not os.path.isdir(key_path):
+            continue
+        for vh in os.listdir(key_path):
+            # Skip temporary files from saves that were in progress.
+            if "." in vh:
+                continue
+            try:
+                with open(os.path.join(key_path, vh), "rb") as i:
+                    value = hbytes(i.read())
+            except (IOError, OSError):
+                continue
+            yield kh, vh, value
+
+
 class DirectoryBasedExampleDatabase(ExampleDatabase):
     def __init__(self, path):
         self.path = path
         self.keypaths = {}
+        # Values for keys that have been read in the background by prefetch,
+        # each of which is used by the next fetch of that key and then
+        # dropped. We count the changes to each key, so that a background
+        # read that raced with a change made through this object is thrown
+        # away, as is a prefetched value once its key changes. The reads are
+        # done by a single worker thread, which takes each key and its
+        # change count at the time of the prefetch from __queue.
+        self.__lock = threading.Lock()
+        self.__prefetched = {}
+        self.__changes = {}
+        self.__queue = queue.Queue()
+        self.__worker = None
 
     def __repr__(self):
         return "DirectoryBasedExampleDatabase(%r)" % (self.path,)
@@ -166,6 +264,13 @@ class DirectoryBasedExampleDatabase(ExampleDatabase):
         return os.path.join(self._key_path(key), sha1(value).hexdigest()[:16])
 
     def fetch(self, key):
+        with self.__lock:
+            prefetched = self.__prefetched.pop(key, None)
+        if prefetched is not None:
+            return iter(prefetched)
+        return self.__read(key)
+
+    def __read(self, key):
         kp = self._key_path(key)
         for path in os.listdir(kp):
             try:
@@ -174,8 +279,43 @@ class DirectoryBasedExampleDatabase(ExampleDatabase):
             except FileNotFoundError:
                 pass
 
+    def prefetch(self, keys):
+        with self.__lock:
+            for key in keys:
+                self.__queue.put((key, self.__changes.get(key, 0)))
+            if self.__worker is None:
+                self.__worker = threading.Thread(target=self.__prefetch)
+                self.__worker.daemon = True
+                self.__worker.start()
+
+    def __prefetch(self):
+        while True:
+            key, count = self.__queue.get()
+            try:
+                with self.__lock:
+                    stale = self.__changes.get(key, 0) != count
+                    if stale or key in self.__prefetched:
+                        continue
+                try:
+                    values = list(self.__read(key))
+                except (IOError, OSError):
+                    continue
+                with self.__lock:
+                    if self.__changes.get(key, 0) == count:
+                        self.__prefetched[key] = values
+            finally:
+                self.__queue.task_done()
+
+    def __note_change(self, key):
+        with self.__lock:
+            self.__changes[key] = self.__changes.get(key, 0) + 1
+            self.__prefetched.pop(key, None)
+
     def save(self, key, value):
-        path = self._value_path(key, value)
+        self.__note_change(key)
+        self.__write(self._value_path(key, value), value)
+
+    def __write(self, path, value):
         if not os.path.exists(path):
             suffix = binascii.hexlify(os.urandom(16))
             if not isinstance(suffix, str):  # pragma: no branch
@@ -190,10 +330,29 @@ class DirectoryBasedExampleDatabase(ExampleDatabase):
                 os.unlink(tmpname)
             assert not os.path.exists(tmpname)
 
+    def import_directory(self, path):
+        """Copy every entry of the :class:`DirectoryBasedExampleDatabase`
+        at ``path`` into this database, skipping any that it already has,
+        and return the number of entries copied. ``path`` is left unchanged.
+
+        Entries are named by hashes of their keys and values, so this merges
+        the two databases without having to know what the keys are."""
+        with self.__lock:
+            self.__prefetched.clear()
+        count = 0
+        for kh, vh, value in _directory_entries(path):
+            target = os.path.join(mkdirp(os.path.join(self.path, kh)), vh)
+            if not os.path.exists(target):
+                self.__write(target, value)
+                count += 1
+        return count
+
     def move(self, src, dest, value):
         if src == dest:
             self.save(src, value)
             return
+        self.__note_change(src)
+        self.__note_change(dest)
         try:
             os.rename(self._value_path(src, value), self._value_path(dest, value))
         except OSError:
@@ -201,7 +360,380 @@ class DirectoryBasedExampleDatabase(ExampleDatabase):
             self.save(dest, value)
 
     def delete(self, key, value):
+        self.__note_change(key)
         try:
             os.unlink(self._value_path(key, value))
         except OSError:
             pass
+
+
+# The journal modes of SQLite that keep the file safe if we crash.
+_SQLITE_JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "WAL")
+
+
+class SQLiteExampleDatabase(ExampleDatabase):
+    """An example database stored in a single SQLite file at ``path``.
+
+    Changes are buffered in memory and written in a single transaction when
+    :meth:`flush` is called (which Hypothesis does at the end of each test,
+    and before it starts shrinking a failing example), or once ``batch_size`` of
+    them have built up. Until then they are only visible to this database
+    object. Many processes (e.g. pytest-xdist workers) can share the file,
+    and the object itself can be shared between threads.
+
+    ``journal_mode`` is the SQLite journal mode of the file. The default
+    rollback journal works on network filesystems such as NFS, as long as
+    they support file locking. ``"WAL"`` is faster when many processes on
+    one machine share the file, but needs shared memory, so it must not be
+    used for a file on a network filesystem.
+
+    Entries are stored under the same hashes of their keys and values as
+    :class:`DirectoryBasedExampleDatabase` uses, so its contents can be
+    brought across with :meth:`import_directory`.
+    """
+
+    def __init__(self, path, batch_size=1000, journal_mode="DELETE"):
+        if journal_mode not in _SQLITE_JOURNAL_MODES:
+            raise InvalidArgument(
+                "journal_mode=%r must be one of %s"
+                % (journal_mode, ", ".join(_SQLITE_JOURNAL_MODES))
+            )
+        self.path = path
+        self.batch_size = batch_size
+        self.journal_mode = journal_mode
+        self.__connection = None
+        self.__pid = None
+        # Changes that have not been flushed yet, as a map from key hash to
+        # a map from value hash to the value, or None if it was deleted.
+        self.__pending = {}
+        self.__pending_count = 0
+        # The connection and pending changes are shared by every thread, so
+        # every method that uses them holds this lock.
+        self.__lock = threading.RLock()
+
+    def __repr__(self):
+        return "SQLiteExampleDatabase(%r)" % (self.path,)
+
+    def __connect(self):
+        if self.__connection is not None and self.__pid == os.getpid():
+            return self.__connection
+        # If we have been forked, the connection belongs to our parent and
+        # we must not use it, so we just make a new one.
+        import sqlite3
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        mkdirp(directory)
+        connection = sqlite3.connect(
+            self.path, timeout=60, isolation_level=None, check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=%s" % (self.journal_mode,))
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS examples ("
+            "key TEXT NOT NULL, value_hash TEXT NOT NULL, value BLOB NOT NULL, "
+            "PRIMARY KEY (key, value_hash))"
+        )
+        self.__connection = connection
+        self.__pid = os.getpid()
+        return connection
+
+    def fetch(self, key):
+        kh = _hash(key)
+        with self.__lock:
+            pending = dict(self.__pending.get(kh, {}))
+            rows = self.__connect().execute(
+                "SELECT value_hash, value FROM examples WHERE key = ?", (kh,)
+            ).fetchall()
+        for vh, value in rows:
+            if vh not in pending:
+                yield hbytes(value)
+        for value in pending.values():
+            if value is not None:
+                yield value
+
+    def fetch_many(self, keys):
+        with self.__lock:
+            return self.__fetch_many(keys)
+
+    def __fetch_many(self, keys):
+        hashes = {}
+        for key in keys:
+            hashes.setdefault(_hash(key), set()).add(key)
+        result = {key: [] for key in keys}
+        if not hashes:
+            return result
+        rows = self.__connect().execute(
+            "SELECT key, value_hash, value FROM examples WHERE key IN (%s)"
+            % (", ".join("?" * len(hashes)),),
+            list(hashes),
+        ).fetchall()
+        for kh, vh, value in rows:
+            if vh not in self.__pending.get(kh, ()):
+                for key in hashes[kh]:
+                    result[key].append(hbytes(value))
+        for kh, ks in hashes.items():
+            for value in self.__pending.get(kh, {}).values():
+                if value is not None:
+                    for key in ks:
+                        result[key].append(value)
+        return result
+
+    def save(self, key, value):
+        value = hbytes(value)
+        self.__record(_hash(key), sha1(value).hexdigest()[:16], value)
+
+    def delete(self, key, value):
+        self.__record(_hash(key), sha1(hbytes(value)).hexdigest()[:16], None)
+
+    def __record(self, kh, vh, value):
+        with self.__lock:
+            self.__pending.setdefault(kh, {})[vh] = value
+            self.__pending_count += 1
+            if self.__pending_count >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        with self.__lock:
+            self.__flush()
+
+    def __flush(self):
+        if not self.__pending:
+            return
+        import sqlite3
+
+        saves = []
+        deletes = []
+        for kh, changes in self.__pending.items():
+            for vh, value in changes.items():
+                if value is None:
+                    deletes.append((kh, vh))
+                else:
+                    saves.append((kh, vh, sqlite3.Binary(value)))
+        connection = self.__connect()
+        # BEGIN IMMEDIATE takes the write lock up front, so that if another
+        # process is writing we wait for it here (for up to the connection
+        # timeout) rather than failing part way through.
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "DELETE FROM examples WHERE key = ? AND value_hash = ?", deletes
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO examples (key, value_hash, value) "
+                "VALUES (?, ?, ?)",
+                saves,
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        self.__pending.clear()
+        self.__pending_count = 0
+
+    def import_directory(self, path):
+        """Copy every entry of the :class:`DirectoryBasedExampleDatabase`
+        at ``path`` (e.g. ``.hypothesis/examples``) into this database, and
+        return the number of entries copied. ``path`` is left unchanged."""
+        count = 0
+        for kh, vh, value in _directory_entries(path):
+            self.__record(kh, vh, value)
+            count += 1
+        self.flush()
+        return count
+
+    def close(self):
+        with self.__lock:
+            if self.__pid in (None, os.getpid()):
+                self.__flush()
+                if self.__connection is not None:
+                    self.__connection.close()
+            self.__connection = None
+
+
+# Record kinds in the segment files of a PackedExampleDatabase.
+_PACKED_SAVE = 1
+_PACKED_DELETE = 2
+_PACKED_SNAPSHOT = 3
+_PACKED_HEADER = ">BI"
+_PACKED_HEADER_SIZE = 5
+
+
+def _value_digest(value):
+    return sha1(value).digest()
+
+
+class PackedExampleDatabase(ExampleDatabase):
+    """An example database that stores all the values for each key in a
+    single compressed segment file, so that fetching a key is one read.
+
+    A segment is an append-only log of length-prefixed records, each of which
+    either saves a zlib-compressed value or deletes a value by its hash. When
+    enough of a segment is made up of records that no longer matter, the
+    next ``fetch`` compacts it into a single snapshot record holding all of
+    the live values compressed together, which is much smaller than
+    compressing them one at a time because values for the same key tend to
+    be very similar.
+
+    Segment files are named by the same hash of their key that
+    :class:`DirectoryBasedExampleDatabase` uses for its directories.
+    Several processes can share the same ``path``: appends and compaction
+    both hold an exclusive lock on the segment, so compaction never loses a
+    concurrent save. Where file locking is not available (on Windows),
+    segments are never compacted.
+    """
+
+    def __init__(self, path, compact_threshold=32):
+        self.path = path
+        self.compact_threshold = compact_threshold
+
+    def __repr__(self):
+        return "PackedExampleDatabase(%r)" % (self.path,)
+
+    def close(self):
+        pass
+
+    def _segment_path(self, key):
+        return os.path.join(mkdirp(self.path), _hash(key) + ".seg")
+
+    @contextmanager
+    def __locked(self, path, mode):
+        """Opens the segment at ``path`` in ``mode``, holding an exclusive
+        lock on it while the context is active.
+
+        Compaction replaces the segment with a new file while holding the
+        lock on the old one, so if the file that we locked is no longer the
+        segment at ``path`` once we hold the lock, we try again with the
+        new one."""
+        while True:
+            f = open(path, mode)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                    try:
+                        current = os.stat(path).st_ino
+                    except OSError:  # pragma: no cover
+                        current = None
+                    if current != os.fstat(f.fileno()).st_ino:
+                        continue
+                yield f
+                return
+            finally:
+                f.close()
+
+    def save(self, key, value):
+        payload = zlib.compress(binary_type(hbytes(value)))
+        record = struct_pack(_PACKED_HEADER, _PACKED_SAVE, len(payload)) + payload
+        with self.__locked(self._segment_path(key), "ab") as o:
+            o.write(record)
+
+    def delete(self, key, value):
+        path = self._segment_path(key)
+        if not os.path.exists(path):
+            return
+        digest = _value_digest(binary_type(hbytes(value)))
+        record = struct_pack(_PACKED_HEADER, _PACKED_DELETE, len(digest)) + digest
+        with self.__locked(path, "a+b") as f:
+            # We only write a record for values that are in the segment, so
+            # that deleting values that were never saved doesn't grow it.
+            f.seek(0)
+            values, _, _ = self.__replay(f.read())
+            if digest in values:
+                f.write(record)
+
+    def fetch(self, key):
+        path = self._segment_path(key)
+        try:
+            with open(path, "rb") as i:
+                contents = i.read()
+        except (IOError, OSError):
+            return iter(())
+        values, dead, _ = self.__replay(contents)
+        if fcntl is not None and dead >= max(self.compact_threshold, len(values)):
+            self.__compact(path)
+        return iter(list(values.values()))
+
+    def __replay(self, contents):
+        """Returns an ordered map from hash to value of the values present in
+        a segment, the number of records that no longer contribute to that,
+        and whether the segment ends with a complete record."""
+        values = OrderedDict()
+        dead = 0
+        i = 0
+        while i + _PACKED_HEADER_SIZE <= len(contents):
+            kind, length = struct_unpack(
+                _PACKED_HEADER, contents[i : i + _PACKED_HEADER_SIZE]
+            )
+            i += _PACKED_HEADER_SIZE
+            payload = contents[i : i + length]
+            i += length
+            if len(payload) < length:
+                # A write that is still in progress, or was interrupted.
+                return values, dead, False
+            try:
+                if kind == _PACKED_SAVE:
+                    value = hbytes(zlib.decompress(payload))
+                    digest = _value_digest(binary_type(value))
+                    if digest in values:
+                        dead += 1
+                    values[digest] = value
+                elif kind == _PACKED_DELETE:
+                    dead += 1
+                    if values.pop(payload, None) is not None:
+                        dead += 1
+                elif kind == _PACKED_SNAPSHOT:
+                    snapshot = zlib.decompress(payload)
+                    j = 0
+                    while j < len(snapshot):
+                        (n,) = struct_unpack(">I", snapshot[j : j + 4])
+                        value = hbytes(snapshot[j + 4 : j + 4 + n])
+                        if len(value) < n:
+                            raise ValueError("Truncated snapshot")
+                        j += 4 + n
+                        values[_value_digest(binary_type(value))] = value
+                else:
+                    dead += 1
+            except (zlib.error, struct.error, ValueError):
+                # Like the other databases, we treat entries that we can't
+                # read as missing. Compaction will drop this record.
+                dead += 1
+        return values, dead, i == len(contents)
+
+    def __compact(self, path):
+        """Replace the segment at ``path`` with a single snapshot of the
+        values in it."""
+        try:
+            with self.__locked(path, "rb") as i:
+                # We read the segment again now that nobody can append to it.
+                contents = i.read()
+                values, _, complete = self.__replay(contents)
+                if not complete:
+                    # Appends are written while holding the lock, so this is
+                    # an interrupted write or one from a process that can't
+                    # lock the segment. Rather than risk dropping a save that
+                    # is still being written, we leave the segment alone.
+                    return
+                snapshot = zlib.compress(
+                    b"".join(
+                        binary_type(struct_pack(">I", len(v)) + v)
+                        for v in values.values()
+                    )
+                )
+                record = (
+                    struct_pack(_PACKED_HEADER, _PACKED_SNAPSHOT, len(snapshot))
+                    + snapshot
+                )
+                suffix = binascii.hexlify(os.urandom(16))
+                if not isinstance(suffix, str):  # pragma: no branch
+                    # On Python 3, binascii.hexlify returns bytes
+                    suffix = suffix.decode("ascii")
+                tmpname = path + "." + suffix
+                try:
+                    with open(tmpname, "wb") as o:
+                        o.write(record)
+                    # Anyone waiting to append to the old segment will find
+                    # that it has been replaced once we release the lock.
+                    os.rename(tmpname, path)
+                finally:
+                    if os.path.exists(tmpname):
+                        os.unlink(tmpname)
+        except (IOError, OSError):  # pragma: no cover
+            pass
@@ -152,6 +152,21 @@ class DeadlineExceeded(HypothesisException):
         self.deadline = deadline
 
 
+class WorkerProcessError(HypothesisException):
+    """Raised when the body of a test run in a worker process (see
+    :func:`~hypothesis.executors.worker_processes`) raised an exception,
+    whose traceback is in the message, or crashed the worker process.
+
+    ``interesting_origin`` identifies the failure in the same way as the
+    type and location of an exception raised in-process would, so that
+    distinct failures are still shrunk and reported separately.
+    """
+
+    def __init__(self, message, interesting_origin):
+        super(WorkerProcessError, self).__init__(message)
+        self.interesting_origin = interesting_origin
+
+
 class StopTest(BaseException):
     """Raised when a test should stop running and return control to
     the Hypothesis engine, which should then continue normally.
@@ -17,6 +17,15 @@
 
 from __future__ import absolute_import, division, print_function
 
+import multiprocessing
+import sys
+from collections import deque
+
+from hypothesis.errors import InvalidArgument
+from hypothesis.internal.compat import integer_types
+from hypothesis.internal.conjecture.workers import can_fork
+from hypothesis.internal.validation import check_type
+
 
 def default_executor(function):  # pragma: nocover
     raise NotImplementedError()  # We don't actually use this any more
@@ -72,3 +81,176 @@ def new_style_executor(runner):
         return default_new_style_executor
     else:
         return lambda data, function: old_school(lambda: function(data))
+
+
+def worker_processes(processes=2, max_examples_per_worker=1000, max_rss_growth=None):
+    """Run the body of a :func:`@given <hypothesis.given>` test in a pool of
+    worker processes, so that a crash in the code under test (e.g. a segfault
+    in a C extension) fails the example that caused it instead of killing
+    the whole test run.
+
+    Hypothesis draws the arguments for each example as usual, then sends the
+    bytes it drew them from to a worker, which draws the same arguments from
+    those bytes and calls the test. If the worker dies, the example is
+    treated as a failure, and shrunk and reported like any other. The
+    workers are forked when the test starts running, so they inherit
+    everything that the test has set up, and each worker is reused for up to
+    ``max_examples_per_worker`` examples or until its peak resident set size
+    has grown by more than ``max_rss_growth`` bytes (if that is not None),
+    whichever comes first. ``processes`` workers are kept ready, so that
+    one which is replaced doesn't hold up the next example.
+
+    This is only available on platforms with :func:`python:os.fork`.
+    """
+    check_type(integer_types, processes, "processes")
+    check_type(integer_types, max_examples_per_worker, "max_examples_per_worker")
+    if max_rss_growth is not None:
+        check_type(integer_types, max_rss_growth, "max_rss_growth")
+    for name, value in [
+        ("processes", processes),
+        ("max_examples_per_worker", max_examples_per_worker),
+        ("max_rss_growth", max_rss_growth),
+    ]:
+        if value is not None and value < 1:
+            raise InvalidArgument("%s=%r must be at least one." % (name, value))
+    options = {
+        "processes": processes,
+        "max_examples_per_worker": max_examples_per_worker,
+        "max_rss_growth": max_rss_growth,
+    }
+
+    def accept(test):
+        test._hypothesis_internal_worker_processes = options
+        return test
+
+    return accept
+
+
+def peak_rss():
+    """Returns the peak resident set size of this process in bytes, or None
+    if we can't tell."""
+    try:
+        import resource
+    except ImportError:  # pragma: no cover
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports this in kilobytes, but OS X in bytes.
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def _worker_loop(
+    function, connection, inherited, max_examples, max_rss_growth
+):  # pragma: no cover
+    # This only ever runs in a worker process, so coverage can't see it.
+    # We inherited the coordinator's ends of the pipes to the workers forked
+    # before us, and must close them so that those workers still see when
+    # the coordinator closes its end.
+    for c in inherited:
+        c.close()
+    baseline = peak_rss()
+    examples = 0
+    while True:
+        try:
+            args = connection.recv()
+        except EOFError:
+            return
+        if args is None:
+            return
+        result = function(*args)
+        examples += 1
+        retire = examples >= max_examples or (
+            max_rss_growth is not None
+            and baseline is not None
+            and peak_rss() - baseline > max_rss_growth
+        )
+        connection.send((retire, result))
+        if retire:
+            return
+
+
+class WorkerProcessPool(object):
+    """A pool of forked processes which each call ``function`` with the
+    arguments passed to ``run``, one call at a time, and send back the
+    result.
+
+    ``function`` must not raise, and must return something that can be
+    pickled. Workers are only forked when they are first needed, or by
+    ``start``, and so inherit the state of this process at that point.
+    """
+
+    def __init__(
+        self, function, processes=2, max_examples_per_worker=1000, max_rss_growth=None
+    ):
+        self.function = function
+        self.processes = processes
+        self.max_examples_per_worker = max_examples_per_worker
+        self.max_rss_growth = max_rss_growth
+        self.workers_started = 0
+        self.__idle = deque()
+
+    def start(self):
+        """Fork workers until ``processes`` of them are ready."""
+        if not can_fork():
+            raise InvalidArgument(
+                "Running tests in worker processes requires os.fork, which "
+                "is not available on this platform."
+            )
+        while len(self.__idle) < self.processes:
+            self.__idle.append(self.__spawn())
+
+    def __spawn(self):
+        get_context = getattr(multiprocessing, "get_context", None)
+        if get_context is not None:
+            context = get_context("fork")
+        else:  # pragma: no cover
+            # Python 2 has no contexts, but always forks on POSIX systems.
+            context = multiprocessing
+        ours, theirs = context.Pipe()
+        process = context.Process(
+            target=_worker_loop,
+            args=(
+                self.function,
+                theirs,
+                [c for _, c in self.__idle],
+                self.max_examples_per_worker,
+                self.max_rss_growth,
+            ),
+        )
+        process.daemon = True
+        process.start()
+        theirs.close()
+        self.workers_started += 1
+        return process, ours
+
+    def run(self, *args):
+        """Returns ``(True, function(*args))`` as computed by a worker, or
+        ``(False, exitcode)`` if the worker died before it replied."""
+        self.start()
+        process, connection = self.__idle.popleft()
+        try:
+            connection.send(args)
+            retire, result = connection.recv()
+        except (EOFError, IOError, OSError):
+            connection.close()
+            process.join()
+            self.start()
+            return False, process.exitcode
+        if retire:
+            connection.close()
+            process.join()
+        else:
+            self.__idle.append((process, connection))
+        self.start()
+        return True, result
+
+    def close(self):
+        """Shut down all of the workers. The pool can still be used
+        afterwards, and will fork new ones."""
+        while self.__idle:
+            process, connection = self.__idle.popleft()
+            try:
+                connection.send(None)
+            except (IOError, OSError):  # pragma: no cover
+                pass
+            connection.close()
+            process.join()
@@ -0,0 +1,153 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+"""
+------------------------
+hypothesis.extra.fuzzing
+------------------------
+
+This module is a command line interface for running a ``@given`` test as a
+long-running fuzzer, with ``test.hypothesis.fuzz()``:
+
+.. code-block:: none
+
+    python -m hypothesis.extra.fuzzing mypackage.tests.test_parser:test_roundtrip
+
+The test must be defined at the top level of its module, and take all of its
+arguments from ``@given``. Fuzzing stops when the test fails, when it has
+run ``--max-calls`` examples, or when you interrupt it. Run the same command
+again later to resume from where it stopped.
+
+To fuzz one test on several machines at once, run it with a different
+``--shard index/count`` on each of them, then combine the example databases
+that they saved their progress to with ``--merge``, which replays and shrinks
+the failures that any of them found without generating new examples.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import importlib
+import os
+import sys
+import traceback
+
+from hypothesis.internal.conjecture.engine import FUZZ_CHECKPOINT_INTERVAL
+
+
+def load_test(name):
+    """Import and return the ``@given`` test named by ``name``, which has
+    the form ``module:test``."""
+    module_name, sep, attribute = name.partition(":")
+    if not (sep and module_name and attribute):
+        raise ValueError("expected a test of the form module:test, got %r" % (name,))
+    test = getattr(importlib.import_module(module_name), attribute)
+    if not hasattr(getattr(test, "hypothesis", None), "fuzz"):
+        raise ValueError("%s is not a test decorated with @given" % (name,))
+    return test
+
+
+def parse_shard(value):
+    """Parse a shard of the form ``index/count``, with ``0 <= index < count``,
+    to the pair ``(index, count)``."""
+    index, sep, count = value.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        index = count = None
+    if not sep or index is None or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(
+            "expected a shard of the form index/count with 0 <= index < count, "
+            "got %r" % (value,)
+        )
+    return index, count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m hypothesis.extra.fuzzing",
+        description="Run a @given test as a fuzzer, until it fails.",
+    )
+    parser.add_argument("test", help="the test to fuzz, as module:test")
+    parser.add_argument(
+        "--max-calls",
+        type=int,
+        default=None,
+        help="stop after running this many examples (default: never)",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=int,
+        default=FUZZ_CHECKPOINT_INTERVAL,
+        help="save progress every this many examples (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        metavar="INDEX/COUNT",
+        help="explore only this shard of the inputs, e.g. 0/4",
+    )
+    parser.add_argument(
+        "--merge",
+        nargs="+",
+        default=None,
+        metavar="DIRECTORY",
+        help="copy these example databases into the test's database and replay "
+        "them, instead of fuzzing",
+    )
+    args = parser.parse_args(argv)
+
+    # Tests can be defined relative to the directory we're run from, as
+    # they would be under pytest.
+    if "" not in sys.path:
+        sys.path.insert(0, "")
+    try:
+        test = load_test(args.test)
+    except (ImportError, AttributeError, ValueError) as e:
+        parser.error(str(e))
+
+    max_calls = args.max_calls
+    if args.merge is not None:
+        database = test._hypothesis_internal_use_settings.database
+        if not hasattr(database, "import_directory"):
+            parser.error(
+                "cannot merge into the database of %s, %r" % (args.test, database)
+            )
+        for path in args.merge:
+            if not os.path.isdir(path):
+                parser.error("%r is not a directory" % (path,))
+            count = database.import_directory(path)
+            print("Merged %d new examples from %s" % (count, path))
+        max_calls = 0
+
+    try:
+        test.hypothesis.fuzz(
+            max_calls=max_calls,
+            checkpoint_interval=args.checkpoint_interval,
+            shard=args.shard,
+        )
+    except KeyboardInterrupt:
+        return 0
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -17,21 +17,31 @@
 
 from __future__ import absolute_import, division, print_function
 
+import json
 from distutils.version import LooseVersion
 
 import pytest
 
 from hypothesis import Verbosity, core, settings
 from hypothesis._settings import note_deprecation
-from hypothesis.internal.compat import OrderedDict, text_type
+from hypothesis.internal.compat import OrderedDict, benchmark_time, text_type
 from hypothesis.internal.detection import is_hypothesis_test
+from hypothesis.internal.reflection import function_digest
+from hypothesis.internal.scheduling import (
+    BudgetScheduler,
+    RunHistory,
+    load_history,
+    save_history,
+)
 from hypothesis.reporting import default as default_reporter, with_reporter
-from hypothesis.statistics import collector
+from hypothesis.statistics import aggregate_engine_profiles, collector
 
 LOAD_PROFILE_OPTION = "--hypothesis-profile"
 VERBOSITY_OPTION = "--hypothesis-verbosity"
 PRINT_STATISTICS_OPTION = "--hypothesis-show-statistics"
 SEED_OPTION = "--hypothesis-seed"
+TIMING_JSON_OPTION = "--hypothesis-timing-json"
+SESSION_BUDGET_OPTION = "--hypothesis-session-budget"
 
 
 class StoringReporter(object):
@@ -66,6 +76,20 @@ def pytest_addoption(parser):
         help="Configure when statistics are printed",
         default=False,
     )
+    group.addoption(
+        TIMING_JSON_OPTION,
+        action="store",
+        metavar="PATH",
+        help="Write per-test and total engine profiling data as JSON to PATH",
+    )
+    group.addoption(
+        SESSION_BUDGET_OPTION,
+        action="store",
+        type=float,
+        metavar="SECONDS",
+        help="Share out this many seconds between all Hypothesis tests, "
+        "instead of running max_examples for each",
+    )
     group.addoption(
         SEED_OPTION, action="store", help="Set a seed to use for all Hypothesis tests"
     )
@@ -104,29 +128,109 @@ def pytest_configure(config):
         except ValueError:
             pass
         core.global_force_seed = seed
+    budget = config.getoption(SESSION_BUDGET_OPTION)
+    if budget is not None:
+        # Under pytest-xdist, each worker process shares out its part of the
+        # budget between the tests that it runs.
+        workerinput = getattr(config, "workerinput", None)
+        workers = 1 if workerinput is None else workerinput["workercount"]
+        config._hypothesis_scheduler = BudgetScheduler(budget, workers=workers)
     config.addinivalue_line("markers", "hypothesis: Tests which use hypothesis.")
 
 
 gathered_statistics = OrderedDict()  # type: dict
 
 
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    # Give the database a head start on loading the examples for the next
+    # test while this one runs.
+    if hasattr(nextitem, "obj") and is_hypothesis_test(nextitem.obj):
+        core.prefetch_examples(nextitem.obj)
+    yield
+
+
+def is_hypothesis_item(item):
+    return hasattr(item, "obj") and is_hypothesis_test(item.obj)
+
+
+def history_location(item):
+    """Returns the database and key under which we save the RunHistory of
+    ``item``, or None if it doesn't have a database."""
+    test = item.obj
+    database = test._hypothesis_internal_use_settings.database
+    if database is None:
+        return None
+    return database, function_digest(test.hypothesis.inner_test)
+
+
+def pytest_collection_finish(session):
+    # We wait until now, rather than doing this in
+    # pytest_collection_modifyitems, so that deselected tests don't get a
+    # share of the budget.
+    scheduler = getattr(session.config, "_hypothesis_scheduler", None)
+    if scheduler is None:
+        return
+    for item in session.items:
+        if is_hypothesis_item(item):
+            location = history_location(item)
+            if location is None:
+                scheduler.add(item.nodeid, RunHistory())
+            else:
+                database, key = location
+                scheduler.add(item.nodeid, load_history(database, key))
+
+
 @pytest.hookimpl(hookwrapper=True)
 def pytest_runtest_call(item):
-    if not (hasattr(item, "obj") and is_hypothesis_test(item.obj)):
+    if not is_hypothesis_item(item):
         yield
     else:
         store = StoringReporter(item.config)
+        scheduler = getattr(item.config, "_hypothesis_scheduler", None)
+        if scheduler is not None and item.nodeid in scheduler.histories:
+            # The settings are looked up on the function when the test is
+            # called, so we can swap in our share of the budget for this run.
+            test = getattr(item.obj, "__func__", item.obj)
+            original_settings = test._hypothesis_internal_use_settings
+            allocation = scheduler.allocate(item.nodeid)
+            test._hypothesis_internal_use_settings = settings(
+                original_settings,
+                max_examples=allocation.max_examples,
+                time_budget=allocation.time_budget,
+            )
+        else:
+            scheduler = None
+        item.hypothesis_examples = 0
 
         def note_statistics(stats):
             lines = [item.nodeid + ":", ""] + stats.get_description() + [""]
             gathered_statistics[item.nodeid] = lines
             item.hypothesis_statistics = lines
+            item.hypothesis_engine_profile = stats.engine_profile
+            item.hypothesis_examples = stats.engine_profile["calls"]
 
-        with collector.with_value(note_statistics):
-            with with_reporter(store):
-                yield
+        start = benchmark_time()
+        try:
+            with collector.with_value(note_statistics):
+                with with_reporter(store):
+                    outcome = yield
+        finally:
+            if scheduler is not None:
+                test._hypothesis_internal_use_settings = original_settings
         if store.results:
             item.hypothesis_report_information = list(store.results)
+        if scheduler is not None:
+            history = scheduler.record(
+                item.nodeid,
+                seconds=benchmark_time() - start,
+                examples=item.hypothesis_examples,
+                failed=outcome.excinfo is not None,
+            )
+            location = history_location(item)
+            if location is not None:
+                database, key = location
+                save_history(database, key, history)
 
 
 @pytest.hookimpl(hookwrapper=True)
@@ -140,15 +244,24 @@ def pytest_runtest_makereport(item, call):
         # Running on pytest < 3.5 where user_properties doesn't exist, fall
         # back on the global gathered_statistics (which breaks under xdist)
         if hasattr(report, "user_properties"):  # pragma: no branch
-            val = ("hypothesis-stats", item.hypothesis_statistics)
+            vals = [
+                ("hypothesis-stats", item.hypothesis_statistics),
+                ("hypothesis-engine-profile", item.hypothesis_engine_profile),
+            ]
             # Workaround for https://github.com/pytest-dev/pytest/issues/4034
             if isinstance(report.user_properties, tuple):
-                report.user_properties += (val,)
+                report.user_properties += tuple(vals)
             else:
-                report.user_properties.append(val)
+                report.user_properties.extend(vals)
 
 
 def pytest_terminal_summary(terminalreporter):
+    timing_path = terminalreporter.config.getoption(TIMING_JSON_OPTION)
+    if timing_path:
+        write_engine_profiles(terminalreporter, timing_path)
+    scheduler = getattr(terminalreporter.config, "_hypothesis_scheduler", None)
+    if scheduler is not None and scheduler.allocations:
+        write_budget_allocation(terminalreporter, scheduler)
     if not terminalreporter.config.getoption(PRINT_STATISTICS_OPTION):
         return
     terminalreporter.section("Hypothesis Statistics")
@@ -174,6 +287,44 @@ def pytest_terminal_summary(terminalreporter):
                     terminalreporter.write_line(li)
 
 
+def write_engine_profiles(terminalreporter, path):
+    # As with the statistics above, the profiles travel on the reports so
+    # that this works under xdist too.
+    profiles = OrderedDict()
+    for test_report in terminalreporter.stats.get("", []):
+        for name, profile in getattr(test_report, "user_properties", ()):
+            if name == "hypothesis-engine-profile" and test_report.when == "teardown":
+                profiles[test_report.nodeid] = profile
+    with open(path, "w") as f:
+        json.dump(
+            {"tests": profiles, "total": aggregate_engine_profiles(profiles.values())},
+            f,
+            indent=2,
+        )
+    terminalreporter.write_line(
+        "Wrote Hypothesis profiling data for %d tests to %s" % (len(profiles), path)
+    )
+
+
+def write_budget_allocation(terminalreporter, scheduler):
+    terminalreporter.section("Hypothesis Session Budget")
+    terminalreporter.write_line(
+        "Used %.2f of %.2f seconds for %d tests"
+        % (scheduler.seconds_used, scheduler.budget, len(scheduler.allocations))
+    )
+    for name, allocation in scheduler.allocations.items():
+        terminalreporter.write_line(
+            "  - %s: ran %d examples in %.2fs (allotted %d examples in %.2fs)"
+            % (
+                name,
+                allocation.examples_used or 0,
+                allocation.seconds_used or 0.0,
+                allocation.max_examples,
+                allocation.seconds,
+            )
+        )
+
+
 def pytest_collection_modifyitems(items):
     for item in items:
         if not isinstance(item, pytest.Function):
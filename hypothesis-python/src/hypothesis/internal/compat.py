@@ -139,6 +139,8 @@ else:
             return struct.unpack(fmt, str(string))
 
     def int_from_bytes(data):
+        if isinstance(data, memoryview):
+            data = bytearray(data)
         if CAN_UNPACK_BYTE_ARRAY:
             unpackable_data = data
         elif isinstance(data, bytearray):
@@ -17,6 +17,8 @@
 
 from __future__ import absolute_import, division, print_function
 
+import itertools
+from array import array
 from enum import IntEnum
 
 import attr
@@ -63,7 +65,6 @@ class Status(IntEnum):
         return "Status.%s" % (self.name,)
 
 
-@attr.s(slots=True)
 class Example(object):
     """Examples track the hierarchical structure of draws from the byte stream,
     within a single test run.
@@ -79,49 +80,189 @@ class Example(object):
     Example-tracking allows the shrinker to try "high-level" transformations,
     such as rearranging or deleting the elements of a list, without having
     to understand their exact representation in the byte stream.
+
+    An ``Example`` is a lightweight view onto a single row of an
+    ``Examples`` table, which is where the data actually lives.
     """
 
-    # Depth of this example in the example tree. The top-level example has a
-    # depth of 0.
-    depth = attr.ib(repr=False)
+    __slots__ = ("owner", "index")
+
+    def __init__(self, owner, index):
+        self.owner = owner
+        # Index of this example inside the overall list of examples.
+        self.index = index
+
+    def __repr__(self):
+        return "Example(label=%r, index=%d, parent=%r, start=%d, end=%d)" % (
+            self.label,
+            self.index,
+            self.parent,
+            self.start,
+            self.end,
+        )
+
+    def __key(self):
+        return (
+            self.index,
+            self.start,
+            self.end,
+            self.label,
+            self.depth,
+            self.parent,
+            self.owner.flags[self.index],
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, Example):
+            return NotImplemented
+        if self.owner is other.owner:
+            return self.index == other.index
+        return self.__key() == other.__key()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    @property
+    def depth(self):
+        """Depth of this example in the example tree. The top-level example
+        has a depth of 0."""
+        return self.owner.depths[self.index]
 
-    # A label is an opaque value that associates each example with its
-    # approximate origin, such as a particular strategy class or a particular
-    # kind of draw.
-    label = attr.ib()
+    @property
+    def label(self):
+        """A label is an opaque value that associates each example with its
+        approximate origin, such as a particular strategy class or a
+        particular kind of draw."""
+        return self.owner.labels[self.owner.label_indices[self.index]]
 
-    # Index of this example inside the overall list of examples.
-    index = attr.ib()
+    @property
+    def parent(self):
+        """Index of the parent of this example, or None if this is the
+        root."""
+        parent = self.owner.parents[self.index]
+        return None if parent < 0 else parent
 
-    # Index of the parent of this example, or None if this is the root.
-    parent = attr.ib()
+    @property
+    def start(self):
+        return self.owner.starts[self.index]
 
-    start = attr.ib()
-    end = attr.ib(default=None)
+    @property
+    def end(self):
+        return self.owner.ends[self.index]
 
-    # An example is "trivial" if it only contains forced bytes and zero bytes.
-    # All examples start out as trivial, and then get marked non-trivial when
-    # we see a byte that is neither forced nor zero.
-    trivial = attr.ib(default=True, repr=False)
+    @property
+    def length(self):
+        return self.owner.ends[self.index] - self.owner.starts[self.index]
 
-    # True if we believe that the shrinker should be able to delete this
-    # example completely, without affecting the value produced by its enclosing
-    # strategy. Typically set when a rejection sampler decides to reject a
-    # generated value and try again.
-    discarded = attr.ib(default=None, repr=False)
+    @property
+    def trivial(self):
+        """An example is "trivial" if it only contains forced bytes and zero
+        bytes."""
+        return bool(self.owner.flags[self.index] & EXAMPLE_TRIVIAL)
 
-    # List of child examples, represented as indices into the example list.
-    children = attr.ib(default=attr.Factory(list), repr=False)
+    @property
+    def discarded(self):
+        """True if we believe that the shrinker should be able to delete this
+        example completely, without affecting the value produced by its
+        enclosing strategy. Typically set when a rejection sampler decides
+        to reject a generated value and try again."""
+        return bool(self.owner.flags[self.index] & EXAMPLE_DISCARDED)
 
-    # We access length a lot, and Python is annoyingly bad at basic integer
-    # arithmetic, so it makes sense to cache this on a field for speed
-    # reasons. It also reduces allocation, though most of the integers
-    # allocated from this should be easily collected garbage and/or
-    # small enough to be interned.
-    length = attr.ib(init=False, repr=False)
+    @property
+    def children(self):
+        """List of child examples, in index order."""
+        owner = self.owner
+        return [Example(owner, i) for i in owner.children_of(self.index)]
+
+
+EXAMPLE_TRIVIAL = 1
+EXAMPLE_DISCARDED = 2
+
+
+class Examples(object):
+    """The examples of a single test run, stored as parallel arrays indexed
+    by example index rather than as a tree of objects, because there may be
+    tens of thousands of them. Indexing or iterating over this returns
+    ``Example`` views onto it."""
+
+    def __init__(self):
+        self.starts = array("I")
+        self.ends = array("I")
+        self.depths = array("I")
+        # The parent of each example, or -1 for the root.
+        self.parents = array("i")
+        self.flags = array("B")
+        # Labels are 64-bit, so we store each distinct one once and refer to
+        # it by its position in self.labels.
+        self.label_indices = array("I")
+        self.labels = []
+        self.__label_index = {}
+        self.__children = None
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [Example(self, j) for j in hrange(*i.indices(len(self)))]
+        n = len(self.starts)
+        if i < 0:
+            i += n
+        if not (0 <= i < n):
+            raise IndexError("Example index %d out of range" % (i,))
+        return Example(self, i)
+
+    def __iter__(self):
+        for i in hrange(len(self.starts)):
+            yield Example(self, i)
+
+    def start_example(self, label, start, depth, parent, trivial):
+        """Append a new example that starts at ``start`` and return its
+        index. Its end is filled in by ``stop_example``."""
+        try:
+            label_index = self.__label_index[label]
+        except KeyError:
+            label_index = self.__label_index[label] = len(self.labels)
+            self.labels.append(label)
+        i = len(self.starts)
+        self.starts.append(start)
+        self.ends.append(start)
+        self.depths.append(depth)
+        self.parents.append(-1 if parent is None else parent)
+        self.label_indices.append(label_index)
+        self.flags.append(EXAMPLE_TRIVIAL if trivial else 0)
+        return i
+
+    def stop_example(self, i, end, discarded):
+        self.ends[i] = end
+        flags = self.flags[i]
+        if end == self.starts[i]:
+            flags |= EXAMPLE_TRIVIAL
+        if discarded:
+            flags |= EXAMPLE_DISCARDED
+        self.flags[i] = flags
+        parent = self.parents[i]
+        if parent >= 0 and not flags & EXAMPLE_TRIVIAL:
+            self.flags[parent] &= ~EXAMPLE_TRIVIAL
+
+    def children_of(self, i):
+        """Returns the indices of the children of the example at index
+        ``i``. These are calculated for every example the first time they
+        are asked for, as most users never need them."""
+        if self.__children is None:
+            children = [[] for _ in self.starts]
+            for j, parent in enumerate(self.parents):
+                if parent >= 0:
+                    children[parent].append(j)
+            self.__children = children
+        return self.__children[i]
 
 
-@attr.s(slots=True, frozen=True)
 class Block(object):
     """Blocks track the flat list of lowest-level draws from the byte stream,
     within a single test run.
@@ -129,22 +270,63 @@ class Block(object):
     Block-tracking allows the shrinker to try "low-level"
     transformations, such as minimizing the numeric value of an
     individual call to ``draw_bits``.
+
+    A ``Block`` is a lightweight view onto a single row of a ``Blocks``
+    table, which is where the data actually lives.
     """
 
-    start = attr.ib()
-    end = attr.ib()
+    __slots__ = ("owner", "index")
+
+    def __init__(self, owner, index):
+        self.owner = owner
+        # Index of this block inside the overall list of blocks.
+        self.index = index
+
+    def __repr__(self):
+        return "Block(start=%d, end=%d, index=%d)" % (
+            self.start,
+            self.end,
+            self.index,
+        )
+
+    def __key(self):
+        return (self.start, self.end, self.index, self.forced, self.all_zero)
+
+    def __eq__(self, other):
+        if not isinstance(other, Block):
+            return NotImplemented
+        return self.__key() == other.__key()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
 
-    # Index of this block inside the overall list of blocks.
-    index = attr.ib()
+    def __hash__(self):
+        return hash(self.__key())
 
-    # True if this block's byte values were forced by a write operation.
-    # As long as the bytes before this block remain the same, modifying this
-    # block's bytes will have no effect.
-    forced = attr.ib(repr=False)
+    @property
+    def start(self):
+        return self.owner.starts[self.index]
+
+    @property
+    def end(self):
+        return self.owner.ends[self.index]
+
+    @property
+    def forced(self):
+        """True if this block's byte values were forced by a write operation.
+        As long as the bytes before this block remain the same, modifying
+        this block's bytes will have no effect."""
+        return bool(self.owner.flags[self.index] & BLOCK_FORCED)
 
-    # True if this block's byte values are all 0. Reading this flag can be
-    # more convenient than explicitly checking a slice for non-zero bytes.
-    all_zero = attr.ib(repr=False)
+    @property
+    def all_zero(self):
+        """True if this block's byte values are all 0. Reading this flag can
+        be more convenient than explicitly checking a slice for non-zero
+        bytes."""
+        return bool(self.owner.flags[self.index] & BLOCK_ALL_ZERO)
 
     @property
     def bounds(self):
@@ -156,7 +338,51 @@ class Block(object):
 
     @property
     def trivial(self):
-        return self.forced or self.all_zero
+        return bool(self.owner.flags[self.index])
+
+
+BLOCK_FORCED = 1
+BLOCK_ALL_ZERO = 2
+
+
+class Blocks(object):
+    """The blocks of a single test run, stored as parallel arrays indexed by
+    block index. Indexing or iterating over this returns ``Block`` views
+    onto it."""
+
+    def __init__(self):
+        self.starts = array("I")
+        self.ends = array("I")
+        self.flags = array("B")
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [Block(self, j) for j in hrange(*i.indices(len(self)))]
+        n = len(self.starts)
+        if i < 0:
+            i += n
+        if not (0 <= i < n):
+            raise IndexError("Block index %d out of range" % (i,))
+        return Block(self, i)
+
+    def __iter__(self):
+        for i in hrange(len(self.starts)):
+            yield Block(self, i)
+
+    def add(self, start, end, forced, all_zero):
+        self.starts.append(start)
+        self.ends.append(end)
+        self.flags.append(
+            (BLOCK_FORCED if forced else 0) | (BLOCK_ALL_ZERO if all_zero else 0)
+        )
+
+    def non_trivial_starts(self):
+        """Returns the set of start positions of blocks that are neither
+        forced nor all zero."""
+        return {u for u, f in zip(self.starts, self.flags) if not f}
 
 
 class _Overrun(object):
@@ -168,67 +394,50 @@ class _Overrun(object):
 
 Overrun = _Overrun()
 
-global_test_counter = 0
+# Every ConjectureData gets a distinct testcounter from this. next() on a
+# count is atomic, so this is safe to share between threads.
+global_test_counter = itertools.count()
 
 
 MAX_DEPTH = 100
 
 
 def calc_examples(self):
-    """Build the list of examples from either a ``ConjectureResult``
+    """Build the examples from either a ``ConjectureResult``
     or a ``ConjectureData`` object by interpreting the recorded
-    example boundaries and parsing them into a tree of ``Example``
-    objects, returning the resulting list.
+    example boundaries and parsing them into an ``Examples`` table,
+    returning the result.
 
     This is needed because we want to calculate these lazily.
-    The ``Example`` tree is fairly memory hungry and mildly
-    expensive to compute and, especially during generation, we
-    will often not need it, so we only want to compute it on
-    demand."""
+    The examples are mildly expensive to compute and, especially
+    during generation, we will often not need them, so we only want
+    to compute them on demand."""
     assert self.example_boundaries
 
     example_stack = []
-    examples = []
+    examples = Examples()
 
-    non_trivial_block_starts = {
-        b.start for b in self.blocks if not (b.all_zero or b.forced)
-    }
+    non_trivial_block_starts = self.blocks.non_trivial_starts()
 
     for index, labels in self.example_boundaries:
         for label in labels:
             if label in (Stop, StopDiscard):
-                discard = label is StopDiscard
-                k = example_stack.pop()
-                ex = examples[k]
-                ex.end = index
-                ex.length = ex.end - ex.start
-
-                if ex.length == 0:
-                    ex.trivial = True
-
-                if example_stack and not ex.trivial:
-                    examples[example_stack[-1]].trivial = False
-
-                ex.discarded = discard
+                examples.stop_example(
+                    example_stack.pop(), index, discarded=label is StopDiscard
+                )
             else:
-                i = len(examples)
-                ex = Example(
-                    index=i,
-                    depth=len(example_stack),
-                    label=label,
-                    start=index,
-                    trivial=index not in non_trivial_block_starts,
-                    parent=example_stack[-1] if example_stack else None,
+                example_stack.append(
+                    examples.start_example(
+                        label=label,
+                        start=index,
+                        depth=len(example_stack),
+                        parent=example_stack[-1] if example_stack else None,
+                        trivial=index not in non_trivial_block_starts,
+                    )
                 )
-                examples.append(ex)
-                if example_stack:
-                    p = example_stack[-1]
-                    examples[p].children.append(ex)
-                example_stack.append(i)
-    for ex in examples:
-        assert ex.end is not None
-
-    assert examples
+    assert not example_stack
+
+    assert len(examples) > 0
     return examples
 
 
@@ -246,6 +455,7 @@ class ConjectureResult(object):
     output = attr.ib()
     extra_information = attr.ib()
     has_discards = attr.ib()
+    target_observations = attr.ib()
     __examples = attr.ib(init=False, default=None)
 
     index = attr.ib(init=False)
@@ -272,25 +482,26 @@ class ConjectureData(object):
     @classmethod
     def for_buffer(self, buffer):
         buffer = hbytes(buffer)
-        return ConjectureData(
-            max_length=len(buffer),
-            draw_bytes=lambda data, n: hbytes(buffer[data.index : data.index + n]),
-        )
+        data = ConjectureData(max_length=len(buffer), draw_bytes=None)
+        data.__replay_source = memoryview(buffer)
+        return data
 
     def __init__(self, max_length, draw_bytes):
         self.max_length = max_length
         self.is_find = False
         self._draw_bytes = draw_bytes
+        # When we are replaying a known buffer (see for_buffer), this is a
+        # view of it that draw_bits reads from directly instead of calling
+        # _draw_bytes.
+        self.__replay_source = None
         self.block_starts = {}
-        self.blocks = []
+        self.blocks = Blocks()
         self.buffer = bytearray()
         self.index = 0
         self.output = u""
         self.status = Status.VALID
         self.frozen = False
-        global global_test_counter
-        self.testcounter = global_test_counter
-        global_test_counter += 1
+        self.testcounter = next(global_test_counter)
         self.start_time = benchmark_time()
         self.events = set()
         self.forced_indices = set()
@@ -300,6 +511,13 @@ class ConjectureData(object):
         self.max_depth = 0
         self.has_discards = False
 
+        # Observations passed to hypothesis.target(), keyed by label.
+        self.target_observations = {}
+
+        # The branches of the code under test that this test case executed,
+        # if the runner was tracing them (see ConjectureRunner.test_function).
+        self.branches = frozenset()
+
         self.example_boundaries = []
 
         self.__result = None
@@ -342,6 +560,7 @@ class ConjectureData(object):
                 if self.extra_information.has_information()
                 else None,
                 has_discards=self.has_discards,
+                target_observations=self.target_observations,
             )
         return self.__result
 
@@ -445,6 +664,7 @@ class ConjectureData(object):
         self.buffer = hbytes(self.buffer)
         self.events = frozenset(self.events)
         del self._draw_bytes
+        self.__replay_source = None
 
     def draw_bits(self, n, forced=None):
         """Return an ``n``-bit integer from the underlying source of
@@ -458,40 +678,41 @@ class ConjectureData(object):
         n_bytes = bits_to_bytes(n)
         self.__check_capacity(n_bytes)
 
-        if forced is not None:
-            buf = bytearray(int_to_bytes(forced, n_bytes))
+        initial = self.index
+
+        if forced is None and self.__replay_source is not None:
+            # This is the hot path when shrinking or replaying examples, so
+            # we decode straight from a view of the source buffer and copy
+            # it into self.buffer, without any intermediate allocations.
+            view = self.__replay_source[initial : initial + n_bytes]
+            result = int_from_bytes(view)
+            self.buffer += view
         else:
-            buf = bytearray(self._draw_bytes(self, n_bytes))
-        assert len(buf) == n_bytes
+            if forced is not None:
+                buf = int_to_bytes(forced, n_bytes)
+            else:
+                buf = self._draw_bytes(self, n_bytes)
+            assert len(buf) == n_bytes
+            result = int_from_bytes(buf)
+            self.buffer.extend(buf)
 
         # If we have a number of bits that is not a multiple of 8
         # we have to mask off the high bits.
         if n % 8 != 0:
             mask = (1 << (n % 8)) - 1
             assert mask != 0
-            buf[0] &= mask
-            self.masked_indices[self.index] = mask
-        buf = hbytes(buf)
-        result = int_from_bytes(buf)
+            self.buffer[initial] &= mask
+            self.masked_indices[initial] = mask
+            result &= (1 << n) - 1
 
         self.start_example(DRAW_BYTES_LABEL)
-        initial = self.index
 
-        block = Block(
-            start=initial,
-            end=initial + n_bytes,
-            index=len(self.blocks),
-            forced=forced is not None,
-            all_zero=result == 0,
-        )
+        end = initial + n_bytes
+        self.blocks.add(initial, end, forced=forced is not None, all_zero=result == 0)
 
-        if block.forced:
-            self.forced_indices.update(hrange(block.start, block.end))
-        self.block_starts.setdefault(n_bytes, []).append(block.start)
-        self.blocks.append(block)
-        assert self.blocks[block.index] is block
-        assert self.index == initial
-        self.buffer.extend(buf)
+        if forced is not None:
+            self.forced_indices.update(hrange(initial, end))
+        self.block_starts.setdefault(n_bytes, []).append(initial)
         self.index = len(self.buffer)
         self.stop_example()
 
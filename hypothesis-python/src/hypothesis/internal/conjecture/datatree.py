@@ -14,12 +14,31 @@
 # obtain one at https://mozilla.org/MPL/2.0/.
 #
 # END HEADER
-
 from __future__ import absolute_import, division, print_function
 
-from hypothesis.internal.compat import hbytes, hrange
+import struct
+import zlib
+from array import array
+
+from hypothesis.internal.compat import hbytes, hrange, struct_pack, struct_unpack
 from hypothesis.internal.conjecture.data import Status
 
+# Special values of DataTree's child array for nodes that do not have exactly
+# one child.
+NO_CHILDREN = -1
+BRANCH = -2
+
+# The value of DataTree's leaf status array for nodes that are not leaves,
+# and for leaves of a tree loaded by DataTree.from_bytes, whose results we
+# don't know.
+NOT_A_LEAF = 255
+UNKNOWN_RESULT = 254
+
+# The version of the format written by DataTree.to_bytes. Data in any other
+# format is rejected by DataTree.from_bytes.
+TREE_FORMAT_VERSION = 1
+_TREE_HEADER = ">BII"
+
 
 class DataTree(object):
     """Tracks the tree structure of a collection of ConjectureData
@@ -35,17 +54,42 @@ class DataTree(object):
         #   since that should only result in overrun.
         # - Generate stream prefixes that we haven't tried before.
 
-        # Tree nodes are stored in an array to prevent heavy nesting of data
-        # structures. Branches are dicts mapping bytes to child nodes (which
-        # will in general only be partially populated). Leaves are
-        # ConjectureData objects that have been previously seen as the result
-        # of following that path.
-        self.nodes = [{}]
+        # The tree can easily grow to millions of nodes over a long run, so
+        # rather than giving each node its own object we store nodes as
+        # integer indices into a set of parallel arrays, each of which holds
+        # one small value per node.
+
+        # The vast majority of nodes have exactly one child, because each
+        # new buffer adds a chain of fresh nodes to the tree. For such a node
+        # we store the byte that leads to its child in __run_bytes and the
+        # index of the child in __child. As fresh nodes are allocated
+        # consecutively, __run_bytes ends up holding each novel suffix as a
+        # contiguous byte string.
+        # Nodes with more than one child have __child set to BRANCH, and
+        # their children are stored in __branches, which maps the node index
+        # to a dict mapping bytes to child nodes (which will in general only
+        # be partially populated).
+        self.__child = array("i")
+        self.__run_bytes = bytearray()
+        self.__branches = {}
+
+        # Leaves are nodes that we have previously seen as the end of a
+        # buffer that did not overrun. For those we store the resulting
+        # status, and NOT_A_LEAF for every other node.
+        self.__leaf_status = bytearray()
 
         # A node is dead if there is nothing left to explore past that point.
         # Recursively, a node is dead if either it is a leaf or every byte
-        # leads to a dead node when starting from here.
-        self.dead = set()
+        # leads to a dead node when starting from here. This is stored as a
+        # bitset indexed by node.
+        self.__dead = bytearray()
+
+        # The number of each node's children that are dead, so that we can
+        # tell how many byte values are still worth trying at a node (see
+        # __live_children) without looking at its children. This is kept up
+        # to date by __mark_dead, which is the only thing that should ever
+        # mark a node as dead.
+        self.__dead_children = array("H")
 
         # We rewrite the byte stream at various points during parsing, to one
         # that will produce an equivalent result but is in some sense more
@@ -54,69 +98,284 @@ class DataTree(object):
         # treat all bytes there as equivalent. This significantly reduces the
         # size of the search space and removes a lot of redundant examples.
 
-        # Maps tree indices where to the unique byte that is valid at that
-        # point. Corresponds to data.write() calls.
-        self.forced = {}
+        # A bitset of nodes where there is a unique byte that is valid at that
+        # point, with that byte stored in __forced_bytes. Corresponds to
+        # data.write() calls.
+        self.__forced = bytearray()
+        self.__forced_bytes = bytearray()
 
-        # Maps tree indices to a mask that restricts bytes at that point.
-        # Currently this is only updated by draw_bits, but it potentially
-        # could get used elsewhere.
-        self.masks = {}
+        # The mask that restricts bytes at each node, which is 0xFF where
+        # there is no restriction. Currently this is only updated by
+        # draw_bits, but it potentially could get used elsewhere.
+        self.__masks = bytearray()
 
         # Where a tree node consists of the beginning of a block we track the
-        # size of said block. This allows us to tell when an example is too
-        # short even if it goes off the unexplored region of the tree - if it
-        # is at the beginning of a block of size 4 but only has 3 bytes left,
-        # it's going to overrun the end of the buffer regardless of the
-        # buffer contents.
-        self.block_sizes = {}
+        # size of said block (and 0 elsewhere). This allows us to tell when an
+        # example is too short even if it goes off the unexplored region of
+        # the tree - if it is at the beginning of a block of size 4 but only
+        # has 3 bytes left, it's going to overrun the end of the buffer
+        # regardless of the buffer contents.
+        self.__block_sizes = array("I")
+
+        self.__allocate(1)
+
+    def __len__(self):
+        """Returns the number of nodes in the tree."""
+        return len(self.__child)
+
+    def to_bytes(self):
+        """Returns a compressed serialisation of the parts of the tree that
+        have been explored: its structure, which nodes are dead, and the
+        forced bytes and masks that determine what is left to explore at
+        each node.
+
+        The results stored at leaves and the block sizes are not included,
+        so a tree loaded with ``from_bytes`` knows where there is nothing
+        left to explore, but can't predict what running a buffer would do.
+        """
+        n = len(self)
+        leaves = bytearray(len(self.__dead))
+        for i in hrange(n):
+            if self.__leaf_status[i] != NOT_A_LEAF:
+                _set_bit(leaves, i)
+        branches = []
+        for node, children in sorted(self.__branches.items()):
+            for byte, child in sorted(children.items()):
+                branches.extend((node, byte, child))
+        return zlib.compress(
+            struct_pack(_TREE_HEADER, TREE_FORMAT_VERSION, n, len(branches))
+            + struct_pack(">%di" % (n,), *self.__child)
+            + struct_pack(">%di" % (len(branches),), *branches)
+            + hbytes(self.__run_bytes)
+            + hbytes(self.__dead)
+            + hbytes(leaves)
+            + hbytes(self.__forced)
+            + hbytes(self.__forced_bytes)
+            + hbytes(self.__masks)
+        )
+
+    @classmethod
+    def from_bytes(cls, data, cap):
+        """Returns a tree with the explored parts of the tree that ``data``
+        was returned by ``to_bytes`` for, raising ValueError if ``data`` is
+        not in the current format."""
+        try:
+            data = bytearray(zlib.decompress(data))
+            header_size = struct.calcsize(_TREE_HEADER)
+            version, n, n_branches = struct_unpack(
+                _TREE_HEADER, hbytes(data[:header_size])
+            )
+        except (zlib.error, struct.error):
+            raise ValueError("Not a serialised DataTree")
+        if version != TREE_FORMAT_VERSION:
+            raise ValueError("Unsupported DataTree format %d" % (version,))
+        bitset_size = (n + 7) >> 3
+        sizes = [4 * n, 4 * n_branches, n] + [bitset_size] * 3 + [n, n]
+        if n == 0 or n_branches % 3 or len(data) != header_size + sum(sizes):
+            raise ValueError("Malformed serialised DataTree")
+        sections = []
+        i = header_size
+        for size in sizes:
+            sections.append(hbytes(data[i : i + size]))
+            i += size
+        child = struct_unpack(">%di" % (n,), sections[0])
+        branches = struct_unpack(">%di" % (n_branches,), sections[1])
+        if not all(BRANCH <= c < n for c in child):
+            raise ValueError("Malformed serialised DataTree")
+
+        tree = cls(cap)
+        tree.__allocate(n - 1)
+        tree.__child = array("i", child)
+        for j in hrange(0, n_branches, 3):
+            node, byte, c = branches[j : j + 3]
+            if not (0 <= node < n and 0 <= c < n and 0 <= byte <= 255):
+                raise ValueError("Malformed serialised DataTree")
+            if child[node] != BRANCH:
+                raise ValueError("Malformed serialised DataTree")
+            tree.__branches.setdefault(node, {})[byte] = c
+        if len(tree.__branches) != child.count(BRANCH):
+            raise ValueError("Malformed serialised DataTree")
+        tree.__run_bytes = bytearray(sections[2])
+        tree.__dead = bytearray(sections[3])
+        for i in hrange(n):
+            if _get_bit(sections[4], i):
+                tree.__leaf_status[i] = UNKNOWN_RESULT
+        tree.__forced = bytearray(sections[5])
+        tree.__forced_bytes = bytearray(sections[6])
+        tree.__masks = bytearray(sections[7])
+        if not all(_is_simple_mask(m) for m in tree.__masks):
+            raise ValueError("Malformed serialised DataTree")
+        for i in hrange(n):
+            if tree.__child[i] != NO_CHILDREN:
+                tree.__dead_children[i] = sum(
+                    _get_bit(tree.__dead, c) for c in tree.__children(i)
+                )
+        return tree
 
     @property
     def is_exhausted(self):
         """Returns True if every possible node is dead and thus the language
         described must have been fully explored."""
-        return 0 in self.dead
+        return self.is_dead(0)
+
+    def is_dead(self, node):
+        """Returns True if there is nothing left to explore past ``node``."""
+        return _get_bit(self.__dead, node)
+
+    def is_explored(self, prefix):
+        """Returns True if there is nothing left to explore past ``prefix``.
+
+        This never trusts the tree any further than following ``prefix``
+        down it, so it is safe to call with prefixes generated from a tree
+        for a slightly different test function."""
+        node_index = 0
+        for c in prefix:
+            if _get_bit(self.__dead, node_index):
+                return True
+            if _get_bit(self.__forced, node_index):
+                c = self.__forced_bytes[node_index]
+            node_index = self.__lookup(node_index, c & self.__masks[node_index])
+            if node_index is None:
+                return False
+        return _get_bit(self.__dead, node_index)
+
+    def child(self, node, byte):
+        """Returns the index of the node reached from ``node`` by ``byte``,
+        raising KeyError if there is no such node yet."""
+        result = self.__lookup(node, byte)
+        if result is None:
+            raise KeyError(byte)
+        return result
+
+    def __lookup(self, node, byte):
+        child = self.__child[node]
+        if child >= 0:
+            if self.__run_bytes[node] == byte:
+                return child
+            return None
+        elif child == BRANCH:
+            return self.__branches[node].get(byte)
+        return None
+
+    def __children(self, node):
+        child = self.__child[node]
+        if child == BRANCH:
+            return self.__branches[node].values()
+        assert child >= 0
+        return (child,)
+
+    def __live_children(self, node):
+        """Returns the number of byte values at ``node`` that lead somewhere
+        that is either unexplored or not yet dead, which is zero if and only
+        if ``node`` should be dead."""
+        child = self.__child[node]
+        if child == BRANCH:
+            children = len(self.__branches[node])
+        else:
+            children = int(child >= 0)
+        if _get_bit(self.__forced, node):
+            # Only the forced byte is worth trying here, but a node can have
+            # recorded other children before it was seen to be forced, and
+            # it stays alive until they are dead too.
+            unexplored = 0
+        else:
+            mask = self.__masks[node]
+            assert _is_simple_mask(mask)
+            unexplored = max(mask + 1 - children, 0)
+        return unexplored + children - self.__dead_children[node]
+
+    def __mark_dead(self, node, parent):
+        """Marks ``node``, whose parent is ``parent`` (or None for the root),
+        as dead."""
+        if not _get_bit(self.__dead, node):
+            _set_bit(self.__dead, node)
+            if parent is not None:
+                self.__dead_children[parent] += 1
+
+    def __allocate(self, n):
+        """Appends ``n`` fresh nodes with no children to the tree, returning
+        the index of the first of them."""
+        start = len(self.__child)
+        self.__child.extend(array("i", [NO_CHILDREN]) * n)
+        self.__run_bytes.extend(bytearray(n))
+        self.__leaf_status.extend(bytearray([NOT_A_LEAF]) * n)
+        self.__forced_bytes.extend(bytearray(n))
+        self.__masks.extend(bytearray([0xFF]) * n)
+        self.__block_sizes.extend(array("I", [0]) * n)
+        self.__dead_children.extend(array("H", [0]) * n)
+        padding = bytearray(((start + n + 7) >> 3) - len(self.__dead))
+        self.__dead.extend(padding)
+        self.__forced.extend(padding)
+        return start
+
+    def __add_run(self, node, run):
+        """Adds a chain of fresh nodes below ``node``, one for each byte of
+        ``run``, and returns the index of the first of them. Each new node
+        is the only child of the one before it."""
+        n = len(run)
+        start = self.__allocate(n)
+        self.__child[start : start + n - 1] = array("i", hrange(start + 1, start + n))
+        self.__run_bytes[start : start + n - 1] = run[1:]
+
+        child = self.__child[node]
+        if child == NO_CHILDREN:
+            self.__child[node] = start
+            self.__run_bytes[node] = run[0]
+        elif child == BRANCH:
+            self.__branches[node][run[0]] = start
+        else:
+            # This node is about to get its second child, so it has to
+            # become a branch.
+            self.__branches[node] = {self.__run_bytes[node]: child, run[0]: start}
+            self.__child[node] = BRANCH
+        return start
 
     def add(self, data):
-        """Add a ConjectureData object to the current collection."""
+        """Add a ConjectureData object to the current collection.
+
+        Returns the index of the leaf node that holds its result, or None if
+        it overran or passed through a part of the tree that has already been
+        marked as dead (in which case the tree does not track this buffer
+        all the way to its end)."""
 
         # First, iterate through the result's buffer, to create the node that
-        # will hold this result. Also note any forced or masked bytes.
-        tree_node = self.nodes[0]
+        # will hold this result.
+        buffer = data.buffer
         indices = []
         node_index = 0
-        for i, b in enumerate(data.buffer):
+        for i, b in enumerate(buffer):
             # We build a list of all the node indices visited on our path
             # through the tree, since we'll need to refer to them later.
             indices.append(node_index)
 
-            # If this buffer position was forced or masked, then mark its
-            # corresponding node as forced/masked.
-            if i in data.forced_indices:
-                self.forced[node_index] = b
-            try:
-                self.masks[node_index] = data.masked_indices[i]
-            except KeyError:
-                pass
-
-            try:
-                # Use the current byte to find the next node on our path.
-                node_index = tree_node[b]
-            except KeyError:
-                # That node doesn't exist yet, so create it.
-                node_index = len(self.nodes)
-                # Create a new branch node. If this should actually be a leaf
-                # node, it will be overwritten when we store the result.
-                self.nodes.append({})
-                tree_node[b] = node_index
-
-            tree_node = self.nodes[node_index]
-
-            if node_index in self.dead:
+            # Use the current byte to find the next node on our path.
+            next_index = self.__lookup(node_index, b)
+            if next_index is None:
+                # That node doesn't exist yet, and so neither does anything
+                # after it, so create them all in one go. If the last one
+                # should actually be a leaf node, it will be marked as one
+                # when we store the result.
+                start = self.__add_run(node_index, buffer[i:])
+                node_index = start + len(buffer) - i - 1
+                indices.extend(hrange(start, node_index))
+                break
+            node_index = next_index
+
+            if _get_bit(self.__dead, node_index):
                 # This part of the tree has already been marked as dead, so
                 # there's no need to traverse any deeper.
                 break
 
+        # If any buffer position that we visited was forced or masked, then
+        # mark its corresponding node as forced/masked.
+        for i in data.forced_indices:
+            if i < len(indices):
+                _set_bit(self.__forced, indices[i])
+                self.__forced_bytes[indices[i]] = buffer[i]
+        for i, mask in data.masked_indices.items():
+            if i < len(indices):
+                self.__masks[indices[i]] = mask
+
         # At each node that begins a block, record the size of that block.
         for b in data.blocks:
             u, v = b.bounds
@@ -124,44 +383,42 @@ class DataTree(object):
             # In that case we already have this section of the tree mapped.
             if u >= len(indices):
                 break
-            self.block_sizes[indices[u]] = v - u
+            self.__block_sizes[indices[u]] = v - u
 
         # Forcibly mark all nodes beyond the zero-bound point as dead,
         # because we don't intend to try any other values there.
-        self.dead.update(indices[self.cap :])
+        for k in hrange(self.cap, len(indices)):
+            self.__mark_dead(indices[k], indices[k - 1] if k else None)
 
         # Now store this result in the tree (if appropriate), and check if
         # any nodes need to be marked as dead.
-        if data.status != Status.OVERRUN and node_index not in self.dead:
+        if data.status != Status.OVERRUN and not _get_bit(self.__dead, node_index):
             # Mark this node as dead, because it produced a result.
             # Trying to explore suffixes of it would not be helpful.
-            self.dead.add(node_index)
-            # Store the result in the tree as a leaf. This will overwrite the
-            # branch node that was created during traversal.
-            self.nodes[node_index] = data.status
+            self.__mark_dead(node_index, indices[-1] if indices else None)
+            # Store the result in the tree as a leaf.
+            self.__leaf_status[node_index] = data.status
 
             # Review the traversed nodes, to see if any should be marked
             # as dead. We check them in reverse order, because as soon as we
             # find a live node, all nodes before it must still be live too.
-            for j in reversed(indices):
-                mask = self.masks.get(j, 0xFF)
-                assert _is_simple_mask(mask)
-                max_size = mask + 1
-
-                if len(self.nodes[j]) < max_size and j not in self.forced:
-                    # There are still byte values to explore at this node,
-                    # so it isn't dead yet.
-                    break
-                if set(self.nodes[j].values()).issubset(self.dead):
-                    # Everything beyond this node is known to be dead,
-                    # and there are no more values to explore here (see above),
-                    # so this node must be dead too.
-                    self.dead.add(j)
-                else:
-                    # Even though all of this node's possible values have been
-                    # tried, there are still some deeper nodes that remain
-                    # alive, so this node isn't dead yet.
+            for k in hrange(len(indices) - 1, -1, -1):
+                j = indices[k]
+                if self.__live_children(j):
+                    # There are still byte values to explore at this node, or
+                    # deeper nodes below it that remain alive, so it isn't
+                    # dead yet.
                     break
+                # Everything beyond this node is known to be dead, and there
+                # are no more values to explore here, so this node must be
+                # dead too.
+                self.__mark_dead(j, indices[k - 1] if k else None)
+
+        if len(indices) == len(buffer):
+            status = self.__leaf_status[node_index]
+            if status != NOT_A_LEAF and status != UNKNOWN_RESULT:
+                return node_index
+        return None
 
     def generate_novel_prefix(self, random):
         """Generate a short random string that (after rewriting) is not
@@ -171,116 +428,153 @@ class DataTree(object):
         node = 0
         while True:
             assert len(prefix) < self.cap
-            assert node not in self.dead
+            assert not self.is_dead(node)
 
             # Figure out the range of byte values we should be trying.
             # Normally this will be 0-255, unless the current position has a
             # mask.
-            mask = self.masks.get(node, 0xFF)
+            mask = self.__masks[node]
             assert _is_simple_mask(mask)
             upper_bound = mask + 1
 
-            try:
-                c = self.forced[node]
+            if _get_bit(self.__forced, node):
                 # This position has a forced byte value, so trying a different
                 # value wouldn't be helpful. Just add the forced byte, and
                 # move on to the next position.
+                c = self.__forced_bytes[node]
                 prefix.append(c)
-                node = self.nodes[node][c]
+                node = self.child(node, c)
                 continue
-            except KeyError:
-                pass
 
             # Provisionally choose the next byte value.
             # This will change later if we find that it was a bad choice.
             c = random.randrange(0, upper_bound)
 
-            try:
-                next_node = self.nodes[node][c]
-                if next_node in self.dead:
-                    # Whoops, the byte value we chose for this position has
-                    # already been fully explored. Let's pick a new value, and
-                    # this time choose a value that's definitely still alive.
-                    choices = [
-                        b
-                        for b in hrange(upper_bound)
-                        if self.nodes[node].get(b) not in self.dead
-                    ]
+            next_node = self.__lookup(node, c)
+            if next_node is not None and _get_bit(self.__dead, next_node):
+                # Whoops, the byte value we chose for this position has
+                # already been fully explored. Let's pick a new value, and
+                # this time choose a value that's definitely still alive.
+                live = self.__live_children(node)
+                assert live > 0
+                if live * 4 >= upper_bound:
+                    # At least a quarter of the values here are alive, so
+                    # it's cheaper to keep guessing until we find one than to
+                    # list them all.
+                    while not self.__is_live_byte(node, c):
+                        c = random.randrange(0, upper_bound)
+                else:
+                    dead = self.__dead_bytes(node)
+                    choices = [b for b in hrange(upper_bound) if b not in dead]
                     assert choices
                     c = random.choice(choices)
-                    node = self.nodes[node][c]
-                else:
-                    # The byte value we chose is in the tree, but it still has
-                    # some unexplored descendants, so it's a valid choice.
-                    node = next_node
-                prefix.append(c)
-            except KeyError:
+                next_node = self.__lookup(node, c)
+            prefix.append(c)
+            if next_node is None:
                 # The byte value we chose isn't in the tree at this position,
                 # which means we've successfully found a novel prefix.
-                prefix.append(c)
                 break
-        assert node not in self.dead
+            # The byte value we chose is in the tree, but it still has
+            # some unexplored descendants, so it's a valid choice.
+            node = next_node
+        assert not self.is_dead(node)
         return hbytes(prefix)
 
+    def __dead_bytes(self, node):
+        """Returns the set of byte values at ``node`` that lead to a dead
+        node."""
+        child = self.__child[node]
+        if child == BRANCH:
+            return {
+                b for b, c in self.__branches[node].items() if _get_bit(self.__dead, c)
+            }
+        if child >= 0 and _get_bit(self.__dead, child):
+            return {self.__run_bytes[node]}
+        return set()
+
+    def __is_live_byte(self, node, byte):
+        """Returns True if ``byte`` at ``node`` leads somewhere that is either
+        unexplored or not yet dead."""
+        child = self.__lookup(node, byte)
+        return child is None or not _get_bit(self.__dead, child)
+
     def rewrite(self, buffer):
         """Use previously seen ConjectureData objects to return a tuple of
         the rewritten buffer and the status we would get from running that
         buffer with the test function. If the status cannot be predicted
         from the existing values it will be None."""
         buffer = hbytes(buffer)
-
         rewritten = bytearray()
-        return_status = None
-
+        status, _ = self.__walk(buffer, rewritten)
+        if status is None:
+            # The walk stopped at a byte that isn't in the tree. Everything
+            # after that is left as it is.
+            rewritten.extend(buffer[len(rewritten) :])
+            assert len(rewritten) == len(buffer)
+        return hbytes(rewritten), status
+
+    def lookup(self, buffer):
+        """Returns a tuple of the status that ``rewrite`` would predict for
+        ``buffer`` and the index of the leaf node holding that result (or
+        None if there is no such leaf, e.g. because the status is OVERRUN).
+
+        This is a single walk of the tree that doesn't build the rewritten
+        buffer, so is cheaper than ``rewrite`` when only the result is
+        needed."""
+        return self.__walk(hbytes(buffer), None)
+
+    def __leaf_result(self, status, node_index):
+        if status == UNKNOWN_RESULT:
+            return None, None
+        return Status(status), node_index
+
+    def __walk(self, buffer, rewritten):
         node_index = 0
         for i, c in enumerate(buffer):
+            status = self.__leaf_status[node_index]
+            if status != NOT_A_LEAF:
+                # This buffer (or a prefix of it) has already been tested.
+                # Return the stored result instead of trying it again.
+                return self.__leaf_result(status, node_index)
+
             # If there's a forced value or a mask at this position, then
             # pretend that the buffer already contains a matching value,
             # because the test function is going to do the same.
-            try:
-                c = self.forced[node_index]
-            except KeyError:
-                pass
-            try:
-                c = c & self.masks[node_index]
-            except KeyError:
-                pass
-
-            try:
-                # If we know how many bytes are read at this point and
-                # there aren't enough, then it doesn't actually matter
-                # what the values are, we're definitely going to overrun.
-                if i + self.block_sizes[node_index] > len(buffer):
-                    return_status = Status.OVERRUN
-                    break
-            except KeyError:
-                pass
+            if _get_bit(self.__forced, node_index):
+                c = self.__forced_bytes[node_index]
+            c &= self.__masks[node_index]
+
+            # If we know how many bytes are read at this point and
+            # there aren't enough, then it doesn't actually matter
+            # what the values are, we're definitely going to overrun.
+            block_size = self.__block_sizes[node_index]
+            if block_size and i + block_size > len(buffer):
+                return Status.OVERRUN, None
+
+            if rewritten is not None:
+                rewritten.append(c)
+
+            node_index = self.__lookup(node_index, c)
+            if node_index is None:
+                # The byte at this position isn't in the tree, which means
+                # we haven't tested this buffer.
+                return None, None
 
-            rewritten.append(c)
+        status = self.__leaf_status[node_index]
+        if status != NOT_A_LEAF:
+            return self.__leaf_result(status, node_index)
+        # Falling off the end of this loop means that we're about to test
+        # a prefix of a previously-tested byte stream, so the test would
+        # overrun.
+        return Status.OVERRUN, None
+
+
+def _get_bit(bits, i):
+    return (bits[i >> 3] & (1 << (i & 7))) != 0
 
-            try:
-                node_index = self.nodes[node_index][c]
-            except KeyError:
-                # The byte at this position isn't in the tree, which means
-                # we haven't tested this buffer. Break out of the tree
-                # traversal, and run the test function normally.
-                rewritten.extend(buffer[i + 1 :])
-                assert len(rewritten) == len(buffer)
-                break
-            node = self.nodes[node_index]
-            if isinstance(node, Status):
-                # This buffer (or a prefix of it) has already been tested.
-                # Return the stored result instead of trying it again.
-                assert node != Status.OVERRUN
-                return_status = node
-                break
-        else:
-            # Falling off the end of this loop means that we're about to test
-            # a prefix of a previously-tested byte stream, so the test would
-            # overrun.
-            return_status = Status.OVERRUN
 
-        return hbytes(rewritten), return_status
+def _set_bit(bits, i):
+    bits[i >> 3] |= 1 << (i & 7)
 
 
 def _is_simple_mask(mask):
@@ -17,7 +17,9 @@
 
 from __future__ import absolute_import, division, print_function
 
+from contextlib import contextmanager
 from enum import Enum
+from hashlib import sha1
 from random import Random, getrandbits
 from weakref import WeakKeyDictionary
 
@@ -28,14 +30,18 @@ from hypothesis._settings import local_settings
 from hypothesis.internal.cache import LRUReusedCache
 from hypothesis.internal.compat import (
     Counter,
+    OrderedDict,
+    benchmark_time,
     ceil,
     hbytes,
     hrange,
     int_from_bytes,
     int_to_bytes,
+    struct_pack,
     to_bytes_sequence,
 )
 from hypothesis.internal.conjecture.data import (
+    DRAW_BYTES_LABEL,
     MAX_DEPTH,
     ConjectureData,
     ConjectureResult,
@@ -44,9 +50,23 @@ from hypothesis.internal.conjecture.data import (
     StopTest,
 )
 from hypothesis.internal.conjecture.datatree import DataTree
-from hypothesis.internal.conjecture.shrinker import Shrinker, sort_key
+from hypothesis.internal.conjecture.optimiser import NO_SCORE, Optimiser
+from hypothesis.internal.conjecture.shrinker import (
+    SHRINK_PASS_DEFINITIONS,
+    Shrinker,
+    sort_key,
+)
+from hypothesis.internal.conjecture.tracing import Tracer
+from hypothesis.internal.conjecture.workers import (
+    ReplayTask,
+    WorkerPool,
+    WorkerResult,
+    WorkerTask,
+    can_fork,
+)
 from hypothesis.internal.healthcheck import fail_health_check
 from hypothesis.reporting import debug_report
+from hypothesis.version import __version__
 
 # Tell pytest to omit the body of this module from tracebacks
 # https://docs.pytest.org/en/latest/example/simple.html#writing-well-integrated-assertion-helpers
@@ -57,6 +77,49 @@ MAX_SHRINKS = 500
 CACHE_SIZE = 10000
 MUTATION_POOL_SIZE = 100
 
+# The operators that the mutator can use to draw each block, with the weight
+# that MutationScheduler gives them before it has learned anything.
+MUTATION_OPERATORS = (
+    ("draw_new", 1),
+    ("redraw_last", 2),
+    ("reuse_existing", 2),
+    ("draw_existing", 1),
+    ("draw_smaller", 1),
+    ("draw_larger", 1),
+    ("flip_bit", 1),
+    ("draw_zero", 2),
+    ("draw_max", 2),
+    ("draw_constant", 1),
+)
+
+# The probability that we generate a test case by splicing together two
+# examples from the mutation pool rather than by mutating one of them.
+SPLICE_PROBABILITY = 0.2
+
+# When fuzzing, we save the mutation pool to the database every this many
+# calls to the test function, and start again with an empty DataTree and
+# cache whenever the tree grows past this many nodes, so that memory use
+# doesn't grow with the length of the run.
+FUZZ_CHECKPOINT_INTERVAL = 1000
+FUZZ_MAX_TREE_SIZE = 100000
+
+# The number of novel prefixes that we try for one that belongs to our shard
+# (when a fuzzing run is one shard of several) and that no earlier run has
+# explored, before we use one that doesn't.
+NOVEL_PREFIX_ATTEMPTS = 100
+
+# We only save the parts of the search space that we have explored for the
+# next run if they fit in a DataTree with at most this many nodes. This is
+# mostly useful for tests with a small search space, which a few runs can
+# explore completely.
+MAX_EXPLORED_TREE_SIZE = 2000
+
+
+def shard_of(prefix, count):
+    """Returns which of ``count`` shards the novel prefix ``prefix`` belongs
+    to. This must agree between processes, so we don't use ``hash``."""
+    return int_from_bytes(sha1(prefix).digest()[:8]) % count
+
 
 @attr.s
 class HealthCheckState(object):
@@ -72,6 +135,8 @@ class ExitReason(Enum):
     max_shrinks = 3
     finished = 4
     flaky = 5
+    max_calls = 6
+    time_budget = 7
 
 
 class RunIsComplete(Exception):
@@ -79,7 +144,17 @@ class RunIsComplete(Exception):
 
 
 class ConjectureRunner(object):
-    def __init__(self, test_function, settings=None, random=None, database_key=None):
+    def __init__(
+        self,
+        test_function,
+        settings=None,
+        random=None,
+        database_key=None,
+        workers=1,
+        batch_test_function=None,
+        batch_size=1,
+        strategy_label=None,
+    ):
         self._test_function = test_function
         self.settings = settings or Settings()
         self.shrinks = 0
@@ -90,27 +165,108 @@ class ConjectureRunner(object):
         self.database_key = database_key
         self.status_runtimes = {}
 
+        # If workers > 1, we run the generate phase in a pool of that many
+        # forked processes. This is only supported where fork is available,
+        # and we silently fall back to running in process otherwise.
+        self.workers = workers if can_fork() else 1
+
+        # If batch_test_function is not None, it runs a list of up to
+        # batch_size test cases with a single call, and we generate novel and
+        # mutated test cases in batches of that size (see
+        # test_function_batch). Everything else runs one at a time.
+        self._batch_test_function = batch_test_function
+        self.batch_size = batch_size if batch_test_function is not None else 1
+
         self.all_drawtimes = []
         self.all_runtimes = []
 
+        # Wall clock time spent in each Phase, and the accumulated profiling
+        # counters of every shrink pass that has run, keyed by pass name.
+        # These are reported by hypothesis.statistics.
+        self.phase_times = {}
+        self.shrink_pass_stats = {}
+
         self.events_to_strings = WeakKeyDictionary()
 
         self.target_selector = TargetSelector(self.random)
+        self.mutation_scheduler = MutationScheduler(self.random)
+
+        # If the coverage_guided setting is enabled, we trace the branches
+        # that each test case executes while reusing and generating examples,
+        # and keep every branch that some valid test case has reached here.
+        self.covered_branches = set()
+        self.__trace_branches = False
+
+        # The highest score observed for each label passed to target(), and
+        # the test case that observed it, as a starting point for the
+        # Optimiser.
+        self.best_observed_targets = {}
+        self.best_examples_of_observed_targets = {}
+
+        # Set by fuzz(), which runs the generate phase until it finds a bug or
+        # has made fuzz_max_calls calls to the test function, rather than
+        # stopping after max_examples.
+        self.fuzzing = False
+        self.fuzz_max_calls = None
+        self.fuzz_checkpoint_interval = FUZZ_CHECKPOINT_INTERVAL
+        # The number of calls that replayed examples from the database, which
+        # don't count towards fuzz_max_calls, or None until we've finished.
+        self.fuzz_calls_reused = None
+
+        # Either None or a pair (index, count), in which case this run is
+        # shard number index of count runs of the same test (usually on
+        # different machines), and only explores the novel prefixes that
+        # shard_of assigns to it. See generate_novel_prefix.
+        self.shard = None
+
+        # If the time_budget setting is set, the time by which the current
+        # phase must finish, and that phase. See start_time_budget.
+        self.time_budget_deadline = None
+        self.time_budget_phase = None
 
         self.interesting_examples = {}
 
         self.shrunk_examples = set()
 
+        # The buffers of interesting examples that the shrinker has run to
+        # completion on, in this run or (if they are saved under shrunk_key
+        # by this version of Hypothesis) an earlier one. We don't shrink
+        # these again. See shrink_interesting_examples.
+        self.fully_shrunk_buffers = set()
+        self.__saved_shrunk_records = []
+
         self.health_check_state = None
 
         self.used_examples_from_database = False
         self.tree = DataTree(cap=self.cap)
 
+        # If we have a database and strategy_label is not None, we save the
+        # parts of the search space that we explore to the database at the
+        # end of each run, and load them again at the start of the next run
+        # with the same database_key and strategy_label. While there are
+        # parts that no run has explored, generate_novel_prefix prefers
+        # those. See load_explored_tree.
+        self.strategy_label = strategy_label
+        self.explored_tree = None
+        self.__avoid_explored = True
+        self.__saved_explored_trees = []
+
         # We want to be able to get the ConjectureData object that results
         # from running a buffer without recalculating, especially during
         # shrinking where we need to know about the structure of the
-        # executed test case.
+        # executed test case. Results are keyed by the index of the leaf
+        # node in self.tree that holds them, so that a single walk of the
+        # tree both canonicalises a buffer and finds its cached result,
+        # without hashing whole buffers. The only exception is for test
+        # cases that the tree doesn't track all the way to a leaf, which we
+        # key by their buffer instead.
         self.__data_cache = LRUReusedCache(CACHE_SIZE)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # A pool of worker processes for run_speculatively, which we only
+        # start up if the shrinker asks us to.
+        self.__speculation_pool = None
 
     def __tree_is_exhausted(self):
         return self.tree.is_exhausted
@@ -120,7 +276,10 @@ class ConjectureRunner(object):
         into a normal return.
         """
         try:
-            self._test_function(data)
+            if self.__trace_branches:
+                self.__traced_test_function(data)
+            else:
+                self._test_function(data)
         except StopTest as e:
             if e.testcounter == data.testcounter:
                 # This StopTest has successfully stopped its test, and can now
@@ -132,6 +291,14 @@ class ConjectureRunner(object):
                 # correct engine.
                 raise
 
+    def __traced_test_function(self, data):
+        tracer = Tracer()
+        try:
+            with tracer:
+                self._test_function(data)
+        finally:
+            data.branches = frozenset(tracer.branches)
+
     def test_function(self, data):
         self.call_count += 1
 
@@ -144,12 +311,61 @@ class ConjectureRunner(object):
             data.freeze()
             self.note_details(data)
 
-        self.target_selector.add(data)
-
         self.debug_data(data)
 
+        self.record_test_result(data, data.as_result())
+
+    def test_function_batch(self, datas):
+        """Run each of ``datas`` as ``test_function`` would, but with a single
+        call to the batch test function if we have one. That function must
+        leave each test case either concluded or valid, as a normal test
+        function would on returning."""
+        if self._batch_test_function is None or len(datas) == 1:
+            for data in datas:
+                self.test_function(data)
+            return
+
+        self.call_count += len(datas)
+
+        try:
+            self._batch_test_function(datas)
+        except BaseException:
+            for data in datas:
+                self.save_buffer(data.buffer)
+            raise
+        finally:
+            for data in datas:
+                data.freeze()
+                self.note_details(data)
+
+        for data in datas:
+            self.debug_data(data)
+
+        # Interesting test cases go first, so that we can't stop because of
+        # max_examples before we've seen one.
+        for data in sorted(datas, key=lambda d: d.status, reverse=True):
+            self.record_test_result(data, data.as_result())
+
+    def record_test_result(self, data, result=None):
+        """Update the state of the run with the results of running a test
+        case, and check whether we should stop. ``data`` is either a frozen
+        ``ConjectureData`` or a ``WorkerResult`` for an uninteresting test
+        case that was run in a worker process. If ``result`` is not None, it
+        is the ``ConjectureResult`` for ``data``, which we cache."""
+        self.target_selector.add(data)
+
         if data.status == Status.VALID:
             self.valid_examples += 1
+            if data.branches:
+                self.__note_branches(data)
+
+        if data.status >= Status.VALID:
+            for label, score in data.target_observations.items():
+                if score > self.best_observed_targets.get(label, NO_SCORE):
+                    self.best_observed_targets[label] = score
+                    self.best_examples_of_observed_targets[label] = (
+                        data if result is None else result
+                    )
 
         # Record the test result in the tree, to avoid unnecessary work in
         # the future.
@@ -173,7 +389,15 @@ class ConjectureRunner(object):
         # something will lead to a known result, and to canonicalize it into
         # the buffer that would belong to the ConjectureData that you get
         # from running it.
-        self.tree.add(data)
+        node = self.tree.add(data)
+        cache_key = data.buffer if node is None else node
+        if self.explored_tree is not None:
+            self.explored_tree.add(data)
+            if len(self.explored_tree) > MAX_EXPLORED_TREE_SIZE:
+                self.debug("Too much explored to save for the next run")
+                self.explored_tree = None
+        if result is not None and result is not Overrun:
+            self.__data_cache[cache_key] = result
 
         if data.status == Status.INTERESTING:
             key = data.interesting_origin
@@ -186,19 +410,33 @@ class ConjectureRunner(object):
                 if sort_key(data.buffer) < sort_key(existing.buffer):
                     self.shrinks += 1
                     self.downgrade_buffer(existing.buffer)
-                    self.__data_cache.unpin(existing.buffer)
+                    self.__data_cache.unpin(self.__cache_key(existing.buffer))
                     changed = True
 
             if changed:
                 self.save_buffer(data.buffer)
                 self.interesting_examples[key] = data.as_result()
-                self.__data_cache.pin(data.buffer)
+                self.__data_cache.pin(cache_key)
                 self.shrunk_examples.discard(key)
 
             if self.shrinks >= MAX_SHRINKS:
                 self.exit_with(ExitReason.max_shrinks)
 
-        if not self.interesting_examples:
+        if (
+            self.time_budget_deadline is not None
+            and benchmark_time() >= self.time_budget_deadline
+            # Running out of time for generating examples shouldn't stop us
+            # shrinking one that we've just found.
+            and (
+                self.time_budget_phase == Phase.shrink
+                or not self.interesting_examples
+            )
+        ):
+            self.exit_with(ExitReason.time_budget)
+
+        if self.fuzzing:
+            self.__fuzz_maintenance()
+        elif not self.interesting_examples:
             if self.valid_examples >= self.settings.max_examples:
                 self.exit_with(ExitReason.max_examples)
             if self.call_count >= max(
@@ -214,6 +452,47 @@ class ConjectureRunner(object):
 
         self.record_for_health_check(data)
 
+    def __fuzz_maintenance(self):
+        if self.interesting_examples:
+            return
+        self.__check_fuzz_max_calls()
+        if self.call_count % self.fuzz_checkpoint_interval == 0:
+            self.checkpoint()
+            # These grow by one entry per call, so for a run of unbounded
+            # length we only keep them for the current checkpoint interval.
+            del self.all_runtimes[:]
+            del self.all_drawtimes[:]
+            for runtimes in self.status_runtimes.values():
+                del runtimes[:]
+        if len(self.tree) > FUZZ_MAX_TREE_SIZE:
+            self.debug("Discarding DataTree with %d nodes" % (len(self.tree),))
+            # Cached results are keyed by nodes of the tree, so they have to
+            # go with it.
+            self.tree = DataTree(cap=self.cap)
+            self.__data_cache = LRUReusedCache(CACHE_SIZE)
+
+    def checkpoint(self):
+        """Save the buffers of the current mutation pool to the database
+        under ``fuzz_key``, replacing the previous checkpoint, so that a
+        fuzzing run which is interrupted can resume from where it was."""
+        if self.database is None:
+            return
+        pool = set(hbytes(data.buffer) for data in self.target_selector.examples())
+        previous = set(self.database.fetch(self.fuzz_key))
+        self.database.delete_many((self.fuzz_key, b) for b in previous - pool)
+        self.database.save_many((self.fuzz_key, b) for b in pool - previous)
+        self.database.flush()
+
+    def __check_fuzz_max_calls(self):
+        # We always finish replaying the examples we resumed from, or the next
+        # checkpoint would lose the ones that we didn't get to.
+        if (
+            self.fuzz_max_calls is not None
+            and self.fuzz_calls_reused is not None
+            and self.call_count - self.fuzz_calls_reused >= self.fuzz_max_calls
+        ):
+            self.exit_with(ExitReason.max_calls)
+
     def generate_novel_prefix(self):
         """Uses the tree to proactively generate a starting sequence of bytes
         that we haven't explored yet for this test.
@@ -221,8 +500,37 @@ class ConjectureRunner(object):
         When this method is called, we assume that there must be at
         least one novel prefix left to find. If there were not, then the
         test run should have already stopped due to tree exhaustion.
+
+        If earlier runs left parts of the search space unexplored, or this
+        run is one shard of several, we try to return a prefix that is in an
+        unexplored part and belongs to this shard, so that each run explores
+        something new. If there don't seem to be any such prefixes left we
+        return one that isn't rather than stopping.
         """
-        return self.tree.generate_novel_prefix(self.random)
+        prefix = self.tree.generate_novel_prefix(self.random)
+        if self.explored_tree is not None and self.explored_tree.is_exhausted:
+            self.explored_tree = None
+        avoid_explored = self.explored_tree is not None and self.__avoid_explored
+        if not avoid_explored and self.shard is None:
+            return prefix
+        for _ in hrange(NOVEL_PREFIX_ATTEMPTS):
+            if self.__is_wanted_prefix(prefix, avoid_explored):
+                return prefix
+            prefix = self.tree.generate_novel_prefix(self.random)
+        # If we can't find anything that no earlier run has explored, there
+        # probably isn't anything, so we stop looking for the rest of the run.
+        self.__avoid_explored = False
+        return prefix
+
+    def __is_wanted_prefix(self, prefix, avoid_explored):
+        if self.shard is not None:
+            index, count = self.shard
+            if shard_of(prefix, count) != index:
+                return False
+        # We only use explored_tree as a filter, rather than generating
+        # prefixes from it directly, because a tree saved by an earlier run
+        # may not agree with how the test behaves now.
+        return not (avoid_explored and self.explored_tree.is_explored(prefix))
 
     @property
     def cap(self):
@@ -317,20 +625,153 @@ class ConjectureRunner(object):
                 return
             self.settings.database.save(key, hbytes(buffer))
 
+    def __note_branches(self, data):
+        """If ``data`` executed any branches that no test case before it
+        did, make it a preferred target for mutation and save it to the
+        coverage corpus, so that future runs can start from here."""
+        new_branches = data.branches - self.covered_branches
+        if not new_branches:
+            return
+        self.covered_branches.update(new_branches)
+        self.target_selector.add_covering(data)
+        if self.database is not None:
+            self.settings.database.save(self.covering_key, hbytes(data.buffer))
+
     def downgrade_buffer(self, buffer):
         if self.settings.database is not None and self.database_key is not None:
             self.settings.database.move(self.database_key, self.secondary_key, buffer)
 
     @property
     def secondary_key(self):
-        return b".".join((self.database_key, b"secondary"))
+        return corpus_keys(self.database_key)[1]
 
     @property
     def covering_key(self):
-        return b".".join((self.database_key, b"coverage"))
+        return corpus_keys(self.database_key)[2]
+
+    @property
+    def fuzz_key(self):
+        return b".".join((self.database_key, b"fuzz"))
+
+    @property
+    def explored_tree_key(self):
+        return b".".join((self.database_key, b"tree"))
+
+    @property
+    def shrunk_key(self):
+        return b".".join((self.database_key, b"shrunk"))
+
+    @property
+    def __shrunk_header(self):
+        # Another version of Hypothesis, or one with different shrink passes,
+        # might be able to shrink a buffer that this one couldn't.
+        return sha1(
+            " ".join([__version__] + sorted(SHRINK_PASS_DEFINITIONS)).encode("ascii")
+        ).digest()[:8]
+
+    def load_shrunk_buffers(self):
+        """Add the buffers that an earlier run recorded as fully shrunk by
+        this version of Hypothesis to ``fully_shrunk_buffers``."""
+        if not self.has_existing_examples():
+            return
+        header = self.__shrunk_header
+        self.__saved_shrunk_records = list(self.database.fetch(self.shrunk_key))
+        for record in self.__saved_shrunk_records:
+            if record[: len(header)] == header:
+                self.fully_shrunk_buffers.add(record[len(header) :])
+
+    def save_shrunk_buffers(self):
+        """Replace the records under ``shrunk_key`` with one for each
+        interesting example that is fully shrunk."""
+        if not self.has_existing_examples():
+            return
+        header = self.__shrunk_header
+        records = [
+            header + v.buffer
+            for v in self.interesting_examples.values()
+            if v.buffer in self.fully_shrunk_buffers
+        ]
+        self.database.delete_many(
+            (self.shrunk_key, r)
+            for r in self.__saved_shrunk_records
+            if r not in records
+        )
+        self.database.save_many(
+            (self.shrunk_key, r)
+            for r in records
+            if r not in self.__saved_shrunk_records
+        )
+        self.__saved_shrunk_records = records
+
+    def clear_shrunk_buffers(self):
+        """Delete the records under ``shrunk_key`` when a run that replayed
+        examples from the database found nothing interesting, so that they
+        don't outlive the failures they were for. If the run didn't replay
+        anything, an earlier run has already done this."""
+        if not (self.has_existing_examples() and self.used_examples_from_database):
+            return
+        records = list(self.database.fetch(self.shrunk_key))
+        self.database.delete_many((self.shrunk_key, r) for r in records)
+
+    @property
+    def __explored_tree_header(self):
+        # A saved tree is only valid for the strategy it was explored with,
+        # and the cap changes where it is marked as dead.
+        return struct_pack(">QI", self.strategy_label, self.cap)
+
+    def load_explored_tree(self):
+        """Load the parts of the search space that earlier runs explored from
+        the database into ``explored_tree``, so that generate_novel_prefix
+        can avoid them.
+
+        We ignore saved trees for a different strategy. Test functions that
+        change get a different database_key, so they never see old trees.
+        Once everything has been explored we start again from nothing, so
+        that repeated runs never stop testing altogether.
+        """
+        if (
+            not self.has_existing_examples()
+            or self.strategy_label is None
+            or self.fuzzing
+            or Phase.generate not in self.settings.phases
+        ):
+            return
+        self.explored_tree = DataTree(cap=self.cap)
+        self.__saved_explored_trees = list(self.database.fetch(self.explored_tree_key))
+        header = self.__explored_tree_header
+        for saved in self.__saved_explored_trees:
+            if saved[: len(header)] != header:
+                continue
+            try:
+                tree = DataTree.from_bytes(saved[len(header) :], cap=self.cap)
+            except ValueError:
+                continue
+            if not tree.is_exhausted:
+                self.debug("Loaded explored tree with %d nodes" % (len(tree),))
+                self.explored_tree = tree
+            break
+
+    def save_explored_tree(self):
+        """Replace the explored tree in the database with ``explored_tree``,
+        unless there is nothing left to explore in it."""
+        if self.database is None:
+            return
+        values = []
+        if self.explored_tree is not None and not self.explored_tree.is_exhausted:
+            values.append(self.__explored_tree_header + self.explored_tree.to_bytes())
+        self.database.delete_many(
+            (self.explored_tree_key, v)
+            for v in self.__saved_explored_trees
+            if v not in values
+        )
+        self.database.save_many(
+            (self.explored_tree_key, v)
+            for v in values
+            if v not in self.__saved_explored_trees
+        )
+        self.__saved_explored_trees = values
 
     def note_details(self, data):
-        self.__data_cache[data.buffer] = data.as_result()
         runtime = max(data.finish_time - data.start_time, 0.0)
         self.all_runtimes.append(runtime)
         self.all_drawtimes.extend(data.draw_times)
@@ -386,7 +827,15 @@ class ConjectureRunner(object):
             try:
                 self._run()
             except RunIsComplete:
-                pass
+                if not self.interesting_examples:
+                    self.clear_shrunk_buffers()
+            finally:
+                if self.__speculation_pool is not None:
+                    self.__speculation_pool.close()
+                    self.__speculation_pool = None
+                self.save_explored_tree()
+                if self.settings.database is not None:
+                    self.settings.database.flush()
             for v in self.interesting_examples.values():
                 self.debug_data(v)
             self.debug(
@@ -394,6 +843,36 @@ class ConjectureRunner(object):
                 % (self.call_count, self.valid_examples, self.shrinks)
             )
 
+    def fuzz(
+        self, max_calls=None, checkpoint_interval=FUZZ_CHECKPOINT_INTERVAL, shard=None
+    ):
+        """Run the test function as a long-running fuzzer: Like ``run``, but
+        the generate phase goes on until it finds a bug or has made
+        ``max_calls`` calls to the test function after replaying the examples
+        in the database (forever if that is None), instead of stopping after
+        ``settings.max_examples``.
+
+        Memory use is bounded for runs of any length, and every
+        ``checkpoint_interval`` calls the mutation pool is saved to the
+        database, so that a later call to ``fuzz`` for the same
+        ``database_key`` picks up where this one left off.
+
+        If ``shard`` is not None, it is a pair ``(index, count)``, and this
+        run explores mostly different inputs to the other ``count - 1``
+        shards of the same test, so that one test can be fuzzed on several
+        machines at once. Each should use its own database, and the results
+        can then be combined (see ``python -m hypothesis.extra.fuzzing
+        --merge``).
+        """
+        self.fuzzing = True
+        self.fuzz_max_calls = max_calls
+        self.fuzz_checkpoint_interval = checkpoint_interval
+        self.shard = shard
+        try:
+            self.run()
+        finally:
+            self.checkpoint()
+
     def _new_mutator(self):
         target_data = [None]
 
@@ -451,45 +930,49 @@ class ConjectureRunner(object):
             else:
                 return uniform(self.random, n)
 
-        options = [
-            draw_new,
-            redraw_last,
-            redraw_last,
-            reuse_existing,
-            reuse_existing,
-            draw_existing,
-            draw_smaller,
-            draw_larger,
-            flip_bit,
-            draw_zero,
-            draw_max,
-            draw_zero,
-            draw_max,
-            draw_constant,
-        ]
-
-        bits = [self.random.choice(options) for _ in hrange(3)]
+        options = {
+            f.__name__: f
+            for f in [
+                draw_new,
+                redraw_last,
+                reuse_existing,
+                draw_existing,
+                draw_smaller,
+                draw_larger,
+                flip_bit,
+                draw_zero,
+                draw_max,
+                draw_constant,
+            ]
+        }
+
+        names = [self.mutation_scheduler.choose() for _ in hrange(3)]
+        bits = [options[name] for name in names]
+
+        def mutate_from(origin, novel_prefix=None):
+            target_data[0] = origin
+            if novel_prefix is None:
+                novel_prefix = self.generate_novel_prefix()
 
-        prefix = [None]
+            # Each call gets its own prefix, so that several test cases
+            # mutated from the same origin can be run as a batch.
+            def draw_mutated(data, n):
+                if data.index + n > len(target_data[0].buffer):
+                    result = uniform(self.random, n)
+                else:
+                    draw = self.random.choice(bits)
+                    result = draw(data, n)
+                if data.index < len(novel_prefix):
+                    start = novel_prefix[data.index : data.index + n]
+                    result = start + result[len(start) :]
+                assert len(result) == n
+                return self.__zero_bound(data, result)
 
-        def mutate_from(origin):
-            target_data[0] = origin
-            prefix[0] = self.generate_novel_prefix()
             return draw_mutated
 
-        def draw_mutated(data, n):
-            if data.index + n > len(target_data[0].buffer):
-                result = uniform(self.random, n)
-            else:
-                draw = self.random.choice(bits)
-                result = draw(data, n)
-            p = prefix[0]
-            if data.index < len(p):
-                start = p[data.index : data.index + n]
-                result = start + result[len(start) :]
-            assert len(result) == n
-            return self.__zero_bound(data, result)
-
+        # This lets the caller tell the MutationScheduler how well the
+        # operators that this mutator uses did.
+        mutate_from.operators = tuple(names)
         return mutate_from
 
     def __rewrite(self, data, result):
@@ -550,14 +1033,27 @@ class ConjectureRunner(object):
             # interesting examples, but there are a lot of them, so we down
             # sample the secondary corpus to a more manageable size.
 
-            corpus = sorted(
-                self.settings.database.fetch(self.database_key), key=sort_key
-            )
+            keys = corpus_keys(self.database_key)
+            if self.fuzzing:
+                keys.append(self.fuzz_key)
+            corpora = self.settings.database.fetch_many(keys)
+            corpus = sorted(corpora[self.database_key], key=sort_key)
             desired_size = max(2, ceil(0.1 * self.settings.max_examples))
 
-            for extra_key in [self.secondary_key, self.covering_key]:
+            # When we're tracing coverage, the coverage corpus is what lets us
+            # pick up where the last run left off, so we replay all of it
+            # rather than just making up a shortfall from it. It only ever
+            # contains examples that reached new branches, so it stays small.
+            extra_keys = [self.secondary_key]
+            covering = set()
+            if self.settings.coverage_guided:
+                covering.update(corpora[self.covering_key])
+            else:
+                extra_keys.append(self.covering_key)
+
+            for extra_key in extra_keys:
                 if len(corpus) < desired_size:
-                    extra_corpus = list(self.settings.database.fetch(extra_key))
+                    extra_corpus = corpora[extra_key]
 
                     shortfall = desired_size - len(corpus)
 
@@ -568,16 +1064,39 @@ class ConjectureRunner(object):
                     extra.sort(key=sort_key)
                     corpus.extend(extra)
 
+            covering.difference_update(corpus)
+            corpus.extend(sorted(covering, key=sort_key))
+
+            # A fuzzing run resumes from its last checkpoint by replaying all
+            # of it, which refills the mutation pool and the DataTree.
+            if self.fuzzing:
+                resumed = set(corpora[self.fuzz_key]).difference(corpus)
+                corpus.extend(sorted(resumed, key=sort_key))
+
             self.used_examples_from_database = len(corpus) > 0
 
-            for existing in corpus:
-                last_data = ConjectureData.for_buffer(existing)
-                try:
-                    self.test_function(last_data)
-                finally:
-                    if last_data.status != Status.INTERESTING:
-                        self.settings.database.delete(self.database_key, existing)
-                        self.settings.database.delete(self.secondary_key, existing)
+            stale = []
+            try:
+                for existing in corpus:
+                    last_data = ConjectureData.for_buffer(existing)
+                    covered = len(self.covered_branches)
+                    try:
+                        self.test_function(last_data)
+                    finally:
+                        if last_data.status != Status.INTERESTING:
+                            stale.append((self.database_key, existing))
+                            stale.append((self.secondary_key, existing))
+                        # Examples that no longer reach any branch that the
+                        # examples before them didn't are dead weight. If we
+                        # couldn't trace at all we have no idea, so keep them.
+                        if (
+                            existing in covering
+                            and last_data.branches
+                            and len(self.covered_branches) == covered
+                        ):
+                            stale.append((self.covering_key, existing))
+            finally:
+                self.settings.database.delete_many(stale)
 
     def exit_with(self, reason):
         self.exit_reason = reason
@@ -589,7 +1108,7 @@ class ConjectureRunner(object):
 
         zero_data = self.cached_test_function(hbytes(self.settings.buffer_size))
         if zero_data.status > Status.OVERRUN:
-            self.__data_cache.pin(zero_data.buffer)
+            self.__data_cache.pin(self.__cache_key(zero_data.buffer))
 
         if zero_data.status == Status.OVERRUN or (
             zero_data.status == Status.VALID
@@ -633,35 +1152,37 @@ class ConjectureRunner(object):
 
         self.health_check_state = HealthCheckState()
 
+        if self.workers > 1:
+            self.generate_in_parallel()
+            return
+
         count = 0
         while not self.interesting_examples and (
             count < 10 or self.health_check_state is not None
         ):
-            prefix = self.generate_novel_prefix()
-
-            def draw_bytes(data, n):
-                if data.index < len(prefix):
-                    result = prefix[data.index : data.index + n]
-                    if len(result) < n:
-                        result += uniform(self.random, n - len(result))
-                else:
-                    result = uniform(self.random, n)
-                return self.__zero_bound(data, result)
-
-            last_data = ConjectureData(
-                max_length=self.settings.buffer_size, draw_bytes=draw_bytes
-            )
-            self.test_function(last_data)
-            last_data.freeze()
+            batch = [
+                ConjectureData(
+                    max_length=self.settings.buffer_size,
+                    draw_bytes=self.__draw_from_prefix(self.generate_novel_prefix()),
+                )
+                for _ in hrange(self.batch_size)
+            ]
+            self.test_function_batch(batch)
 
-            count += 1
+            count += len(batch)
 
         mutations = 0
         mutator = self._new_mutator()
 
         zero_bound_queue = []
 
+        ran_optimisations = False
+
         while not self.interesting_examples:
+            if not ran_optimisations and self.__should_optimise():
+                ran_optimisations = True
+                self.optimise_targets()
+                continue
             if zero_bound_queue:
                 # Whenever we generated an example and it hits a bound
                 # which forces zero blocks into it, this creates a weird
@@ -699,14 +1220,31 @@ class ConjectureRunner(object):
                 )
                 self.test_function(data)
                 data.freeze()
+            elif self.random.random() < SPLICE_PROBABILITY and self.__splice():
+                continue
             else:
                 origin = self.target_selector.select()
                 mutations += 1
-                data = ConjectureData(
-                    draw_bytes=mutator(origin), max_length=self.settings.buffer_size
-                )
-                self.test_function(data)
-                data.freeze()
+                tree_size = len(self.tree)
+                batch = [
+                    ConjectureData(
+                        draw_bytes=mutator(origin), max_length=self.settings.buffer_size
+                    )
+                    for _ in hrange(self.batch_size)
+                ]
+                self.test_function_batch(batch)
+                # A mutation was useful if it improved on the status of its
+                # origin, or reached somewhere new without making it worse.
+                for data in batch:
+                    self.mutation_scheduler.record(
+                        mutator.operators,
+                        data.status > origin.status
+                        or (
+                            data.status == origin.status
+                            and len(self.tree) > tree_size
+                        ),
+                    )
+                data = max(batch, key=lambda d: d.status)
                 if data.status > origin.status:
                     mutations = 0
                 elif data.status < origin.status or mutations >= 10:
@@ -719,12 +1257,350 @@ class ConjectureRunner(object):
                 zero_bound_queue.append(data)
             mutations += 1
 
+    def __should_optimise(self):
+        """We start hill climbing on the targets once half of the budget of
+        valid examples has been spent on generation, so that there are
+        reasonable starting points to climb from and budget left to climb."""
+        return (
+            Phase.target in self.settings.phases
+            and self.best_examples_of_observed_targets
+            and self.valid_examples >= self.settings.max_examples // 2
+        )
+
+    def optimise_targets(self):
+        """Hill climb on the score of each label passed to target(), starting
+        from the best example seen for it so far, until none of them improve
+        or we find a bug or run out of budget."""
+        any_improvements = True
+        while any_improvements and not self.interesting_examples:
+            any_improvements = False
+            for target, data in list(self.best_examples_of_observed_targets.items()):
+                optimiser = Optimiser(self, data, target)
+                optimiser.run()
+                if optimiser.improvements > 0:
+                    any_improvements = True
+                if self.interesting_examples:
+                    break
+
+    def __splice(self):
+        """Try to generate a test case by splicing together two examples
+        from the mutation pool, returning True if we managed to."""
+        if len(self.target_selector) < 2:
+            return False
+        origin = self.target_selector.select()
+        donor = self.target_selector.select()
+        if origin is donor:
+            return False
+        spliced = self.splice(origin, donor)
+        if spliced is None:
+            return False
+        # As with the mutator, we start from a novel prefix so that we don't
+        # just repeat a test case that we've already run.
+        prefix = self.generate_novel_prefix()
+        prefix += spliced[len(prefix) :]
+        tree_size = len(self.tree)
+        data = ConjectureData(
+            draw_bytes=self.__draw_from_prefix(prefix),
+            max_length=self.settings.buffer_size,
+        )
+        self.test_function(data)
+        data.freeze()
+        self.mutation_scheduler.record(
+            ["splice"],
+            data.status > origin.status
+            or (data.status == origin.status and len(self.tree) > tree_size),
+        )
+        return True
+
+    def splice(self, origin, donor):
+        """Returns a buffer that is ``origin`` with the bytes of one of its
+        examples replaced by those of an example from ``donor`` with the same
+        label, or None if they have no such examples in common.
+
+        Examples with the same label were usually drawn from the same
+        strategy, so this tends to produce a test case of the same shape as
+        ``origin`` in a way that byte level mutations rarely do.
+        """
+        if not (hasattr(origin, "examples") and hasattr(donor, "examples")):
+            # WorkerResults don't carry their examples.
+            return None
+
+        def structural(ex):
+            # Swapping the whole test case or a single draw is no better
+            # than what the mutator already does.
+            return ex.depth > 0 and ex.label != DRAW_BYTES_LABEL
+
+        by_label = {}
+        for ex in donor.examples:
+            if structural(ex):
+                by_label.setdefault(ex.label, []).append(ex)
+        candidates = [
+            ex for ex in origin.examples if structural(ex) and ex.label in by_label
+        ]
+        if not candidates:
+            return None
+        target = self.random.choice(candidates)
+        replacement = self.random.choice(by_label[target.label])
+        return hbytes(
+            origin.buffer[: target.start]
+            + donor.buffer[replacement.start : replacement.end]
+            + origin.buffer[target.end :]
+        )
+
+    def __draw_from_prefix(self, prefix):
+        """Returns a draw_bytes function that begins with ``prefix`` and
+        then draws uniformly at random."""
+
+        def draw_bytes(data, n):
+            if data.index < len(prefix):
+                result = prefix[data.index : data.index + n]
+                if len(result) < n:
+                    result += uniform(self.random, n - len(result))
+            else:
+                result = uniform(self.random, n)
+            return self.__zero_bound(data, result)
+
+        return draw_bytes
+
+    def generate_in_parallel(self):
+        """Run the generate phase in a pool of ``self.workers`` forked
+        processes.
+
+        This process remains in charge of the run: It hands out a novel
+        prefix and a fresh random seed (and, once generation is under way,
+        an origin to mutate) for each test case, and merges the results back
+        into the tree and target selector in the order the test cases were
+        submitted. All of the usual exit conditions apply as results are
+        merged, and we stop generating (abandoning any test cases still in
+        flight) as soon as any test case is interesting so that shrinking
+        can start.
+
+        Unlike in-process generation we don't requeue test cases that hit
+        the zero bound, as that would require sending whole buffers back to
+        the workers.
+        """
+        pool = WorkerPool(self, self.workers)
+        ran_optimisations = False
+        try:
+            count = 0
+            while not self.interesting_examples:
+                if not ran_optimisations and self.__should_optimise():
+                    # Hill climbing is inherently serial, so we do it here
+                    # while the workers finish off what's in flight.
+                    ran_optimisations = True
+                    self.optimise_targets()
+                    continue
+                # We keep a couple of tasks per process in flight so that no
+                # worker sits idle while we merge results.
+                while len(pool) < 2 * pool.processes:
+                    origin = None
+                    if count >= 10 and self.health_check_state is None:
+                        selected = self.target_selector.select()
+                        origin = WorkerResult(
+                            status=selected.status,
+                            buffer=hbytes(selected.buffer),
+                            blocks=selected.blocks,
+                        )
+                    pool.submit(
+                        WorkerTask(
+                            prefix=self.generate_novel_prefix(),
+                            seed=self.random.getrandbits(64),
+                            origin=origin,
+                        )
+                    )
+                    count += 1
+                self.incorporate_worker_result(pool.next_result())
+        finally:
+            pool.close()
+
+    def run_worker_task(self, task):
+        """Run the test case described by a ``WorkerTask`` and return a
+        ``WorkerResult`` for it.
+
+        This is called in worker processes forked from the coordinating
+        runner, so it is free to update the (copied) state of ``self``, but
+        none of those updates will be seen by the coordinator. It is
+        deliberately not in charge of any of the bookkeeping that
+        ``test_function`` does.
+        """
+        if isinstance(task, ReplayTask):
+            return self.__replay_in_worker(task.buffer)
+        self.random = Random(task.seed)
+        if task.origin is None:
+            draw_bytes = self.__draw_from_prefix(task.prefix)
+        else:
+            draw_bytes = self._new_mutator()(task.origin, task.prefix)
+        data = ConjectureData(
+            max_length=self.settings.buffer_size, draw_bytes=draw_bytes
+        )
+        try:
+            self.__stoppable_test_function(data)
+        except BaseException:
+            data.freeze()
+            return WorkerResult(status=None, buffer=data.buffer)
+        data.freeze()
+        return WorkerResult.from_data(data, self.event_to_string)
+
+    def __replay_in_worker(self, buffer):
+        data = ConjectureData.for_buffer(buffer)
+        try:
+            self.__stoppable_test_function(data)
+        except BaseException:
+            data.freeze()
+            return WorkerResult(status=None, buffer=data.buffer)
+        data.freeze()
+        if data.status == Status.INTERESTING:
+            return WorkerResult(status=data.status, buffer=data.buffer)
+        result = WorkerResult.from_data(data, self.event_to_string)
+        if data.status != Status.OVERRUN:
+            result.result = data.as_result()
+            # Calculating the examples now means that they get sent back
+            # with the result, which saves the shrinker doing it.
+            result.result.examples
+        return result
+
+    def run_speculatively(self, buffers):
+        """Run the test function on each of ``buffers`` that we don't
+        already know the result of, in parallel in the worker pool, and
+        cache the results so that later calls to ``cached_test_function``
+        for them return immediately.
+
+        Interesting results are not cached, because we need their full
+        details and those have to come from running them in this process.
+        Instead we return the list of buffers that were interesting, and
+        leave it up to the caller to decide which (if any) of them to run.
+
+        Does nothing and returns an empty list unless ``self.workers > 1``.
+        """
+        if self.workers <= 1:
+            return []
+
+        unknown = []
+        seen = set()
+        for buffer in buffers:
+            buffer = hbytes(buffer)
+            if buffer in seen:
+                continue
+            seen.add(buffer)
+            if self.__cached_result(buffer)[0] is None:
+                unknown.append(buffer)
+
+        if not unknown:
+            return []
+
+        if self.__speculation_pool is None:
+            self.__speculation_pool = WorkerPool(self, self.workers)
+        pool = self.__speculation_pool
+
+        for buffer in unknown:
+            pool.submit(ReplayTask(buffer))
+        # We collect every result before doing anything with them, so that
+        # the pool is ready for the next batch even if recording one of these
+        # ends the run.
+        results = [pool.next_result() for _ in unknown]
+
+        interesting = []
+        for buffer, result in zip(unknown, results):
+            if result.status is None:
+                # We'll get the error when (if) someone runs it for real.
+                continue
+            if result.status == Status.INTERESTING:
+                interesting.append(buffer)
+                continue
+            if self.tree.lookup(buffer)[0] is not None:
+                # We must have learned the answer from an earlier buffer in
+                # this batch (e.g. it was a prefix of this one).
+                continue
+            self.__note_worker_details(result)
+            self.record_test_result(result, result.result)
+        return interesting
+
+    def __note_worker_details(self, result):
+        """The equivalent of ``note_details`` and the call counting in
+        ``test_function`` for a ``WorkerResult``."""
+        self.call_count += 1
+        self.all_runtimes.append(result.runtime)
+        self.all_drawtimes.extend(result.draw_times)
+        self.status_runtimes.setdefault(result.status, []).append(result.runtime)
+        for event in result.events:
+            self.event_call_counts[event] += 1
+
+    def incorporate_worker_result(self, result):
+        """Update the state of the run with a ``WorkerResult``."""
+        if result.status is None or result.status == Status.INTERESTING:
+            # We need the full details of interesting test cases (the
+            # exception and traceback, for a start), and those can't be
+            # reliably sent between processes, so we replay them here. This
+            # also takes care of saving them to the database. If the test
+            # function raised an error, replaying it will raise it again.
+            self.test_function(ConjectureData.for_buffer(result.buffer))
+            return
+
+        if result.status != Status.OVERRUN:
+            # Because several test cases are in flight at once, two workers
+            # can end up running the same buffer. The second copy tells us
+            # nothing new, so we drop it rather than counting it twice.
+            known_status, _ = self.tree.lookup(result.buffer)
+            if known_status is not None:
+                return
+
+        self.__note_worker_details(result)
+
+        self.record_test_result(result)
+
     def _run(self):
-        self.reuse_existing_examples()
-        self.generate_new_examples()
-        self.shrink_interesting_examples()
+        # Tracing is only worth its overhead while we're looking for new
+        # behaviour, so we turn it off before shrinking.
+        self.__trace_branches = self.settings.coverage_guided
+        self.start_time_budget(Phase.generate)
+        self.load_explored_tree()
+        with self._timed_phase(Phase.reuse):
+            self.reuse_existing_examples()
+        if self.fuzzing:
+            self.fuzz_calls_reused = self.call_count
+            if not self.interesting_examples:
+                self.__check_fuzz_max_calls()
+        with self._timed_phase(Phase.generate):
+            self.generate_new_examples()
+        # We normally hill climb on targets part way through the generate
+        # phase, but if we've been asked to do that without generating we
+        # do it on its own here, starting from any examples we reused.
+        if (
+            Phase.target in self.settings.phases
+            and Phase.generate not in self.settings.phases
+        ):
+            with self._timed_phase(Phase.target):
+                self.optimise_targets()
+        self.__trace_branches = False
+        # Failing examples are the most valuable thing in the database, so we
+        # write them out before we start shrinking them rather than leaving
+        # them buffered where a crash could lose them.
+        if self.interesting_examples and self.settings.database is not None:
+            self.settings.database.flush()
+        self.start_time_budget(Phase.shrink)
+        with self._timed_phase(Phase.shrink):
+            self.shrink_interesting_examples()
         self.exit_with(ExitReason.finished)
 
+    def start_time_budget(self, phase):
+        """Give ``phase`` the whole of the time_budget setting, if there is
+        one. The budget for generating also covers reusing examples from the
+        database and hill climbing on targets, which are part of the search
+        for a failing example."""
+        self.time_budget_phase = phase
+        if self.settings.time_budget is not None:
+            self.time_budget_deadline = benchmark_time() + self.settings.time_budget
+
+    @contextmanager
+    def _timed_phase(self, phase):
+        start = benchmark_time()
+        try:
+            yield
+        finally:
+            self.phase_times[phase] = self.phase_times.get(phase, 0.0) + max(
+                benchmark_time() - start, 0.0
+            )
+
     def shrink_interesting_examples(self):
         """If we've found interesting examples, try to replace each of them
         with a minimal interesting example with the same interesting_origin.
@@ -744,27 +1620,44 @@ class ConjectureRunner(object):
             if data.status != Status.INTERESTING:
                 self.exit_with(ExitReason.flaky)
 
+        self.load_shrunk_buffers()
         self.clear_secondary_key()
 
-        while len(self.shrunk_examples) < len(self.interesting_examples):
-            target, example = min(
-                [
-                    (k, v)
-                    for k, v in self.interesting_examples.items()
-                    if k not in self.shrunk_examples
-                ],
-                key=lambda kv: (sort_key(kv[1].buffer), sort_key(repr(kv[0]))),
-            )
-            self.debug("Shrinking %r" % (target,))
-
-            def predicate(d):
-                if d.status < Status.INTERESTING:
-                    return False
-                return d.interesting_origin == target
-
-            self.shrink(example, predicate)
-
-            self.shrunk_examples.add(target)
+        try:
+            while len(self.shrunk_examples) < len(self.interesting_examples):
+                target, example = min(
+                    [
+                        (k, v)
+                        for k, v in self.interesting_examples.items()
+                        if k not in self.shrunk_examples
+                    ],
+                    key=lambda kv: (sort_key(kv[1].buffer), sort_key(repr(kv[0]))),
+                )
+                if example.buffer in self.fully_shrunk_buffers:
+                    # The shrinker has already run to completion on this
+                    # buffer, which is usually because we are replaying the
+                    # minimal example from an earlier run, and would just
+                    # spend a lot of calls finding that it can't do better.
+                    self.debug("Already fully shrunk %r" % (target,))
+                    self.shrunk_examples.add(target)
+                    continue
+                self.debug("Shrinking %r" % (target,))
+
+                def predicate(d):
+                    if d.status < Status.INTERESTING:
+                        return False
+                    return d.interesting_origin == target
+
+                self.shrink(example, predicate)
+
+                # Shrinking stops the run part way through if it makes too
+                # many shrinks or runs out of time, so if we get here the
+                # shrinker has reached a fixed point.
+                shrunk = self.interesting_examples[target]
+                self.fully_shrunk_buffers.add(shrunk.buffer)
+                self.shrunk_examples.add(target)
+        finally:
+            self.save_shrunk_buffers()
 
     def clear_secondary_key(self):
         if self.has_existing_examples():
@@ -794,7 +1687,27 @@ class ConjectureRunner(object):
 
     def shrink(self, example, predicate):
         s = self.new_shrinker(example, predicate)
-        s.shrink()
+        try:
+            s.shrink()
+        finally:
+            for p in s.passes:
+                if p.runs == 0:
+                    continue
+                stats = self.shrink_pass_stats.setdefault(
+                    p.name,
+                    {
+                        "runs": 0,
+                        "calls": 0,
+                        "shrinks": 0,
+                        "deletions": 0,
+                        "runtime": 0.0,
+                    },
+                )
+                stats["runs"] += p.runs
+                stats["calls"] += p.calls
+                stats["shrinks"] += p.shrinks
+                stats["deletions"] += p.deletions
+                stats["runtime"] += p.runtime
         return s.shrink_target
 
     def new_shrinker(self, example, predicate):
@@ -809,47 +1722,42 @@ class ConjectureRunner(object):
         """
         buffer = hbytes(buffer)
 
-        def check_result(result):
-            assert result is Overrun or (
-                isinstance(result, ConjectureResult) and result.status != Status.OVERRUN
-            )
-            return result
-
-        try:
-            return check_result(self.__data_cache[buffer])
-        except KeyError:
-            pass
-
-        rewritten, status = self.tree.rewrite(buffer)
-
-        try:
-            result = check_result(self.__data_cache[rewritten])
-        except KeyError:
-            pass
-        else:
-            assert result.status != Status.OVERRUN or result is Overrun
-            self.__data_cache[buffer] = result
+        result, status = self.__cached_result(buffer)
+        if result is not None:
+            self.cache_hits += 1
             return result
+        self.cache_misses += 1
 
         # We didn't find a match in the tree, so we need to run the test
         # function normally. Note that test_function will automatically
-        # add this to the tree so we don't need to update the cache.
-
-        result = None
+        # add this to the tree and the cache.
+        assert status != Status.OVERRUN
+        data = ConjectureData.for_buffer(buffer)
+        self.test_function(data)
+        result = data.as_result()
+        assert result is Overrun or (
+            isinstance(result, ConjectureResult) and result.status != Status.OVERRUN
+        )
+        assert status is None or result.status == status
+        return result
 
-        if status != Status.OVERRUN:
-            data = ConjectureData.for_buffer(buffer)
-            self.test_function(data)
-            result = check_result(data.as_result())
-            assert status is None or result.status == status
-            status = result.status
+    def __cached_result(self, buffer):
+        """Returns a tuple of the cached result of running ``buffer`` (or
+        None if we don't have one) and the status that the tree predicts
+        for it. This only needs a single walk of the tree."""
+        status, node = self.tree.lookup(buffer)
         if status == Status.OVERRUN:
-            result = Overrun
-
-        assert result is not None
+            return Overrun, status
+        try:
+            return self.__data_cache[buffer if node is None else node], status
+        except KeyError:
+            return None, status
 
-        self.__data_cache[buffer] = result
-        return result
+    def __cache_key(self, buffer):
+        """Returns the key under which the result of running ``buffer`` is
+        cached."""
+        _, node = self.tree.lookup(buffer)
+        return buffer if node is None else node
 
     def event_to_string(self, event):
         if isinstance(event, str):
@@ -863,6 +1771,16 @@ class ConjectureRunner(object):
         return result
 
 
+def corpus_keys(database_key):
+    """Returns the database keys of the primary, secondary and coverage
+    corpora for a ConjectureRunner with this ``database_key``."""
+    return [
+        database_key,
+        b".".join((database_key, b"secondary")),
+        b".".join((database_key, b"coverage")),
+    ]
+
+
 def _draw_predecessor(rnd, xs):
     r = bytearray()
     any_strict = False
@@ -909,6 +1827,54 @@ def pop_random(random, values):
     return values.pop()
 
 
+class MutationScheduler(object):
+    """Learns which of the operators in ``MUTATION_OPERATORS`` are useful
+    for mutating the test cases of a particular test.
+
+    This is a simple multi-armed bandit: Each operator is chosen with
+    probability proportional to its prior weight times an estimate of how
+    often mutators using it succeed. The estimate starts at one half and
+    is smoothed so that operators which have failed a lot still get tried
+    occasionally, in case they become useful later in the run.
+    """
+
+    def __init__(self, random, operators=MUTATION_OPERATORS):
+        self.random = random
+        self.priors = OrderedDict(operators)
+        self.trials = Counter()
+        self.successes = Counter()
+
+    def weight(self, name):
+        return (
+            self.priors[name] * (self.successes[name] + 1) / (self.trials[name] + 2)
+        )
+
+    @property
+    def weights(self):
+        """The current weight of each operator, normalised to sum to one."""
+        weights = OrderedDict((name, self.weight(name)) for name in self.priors)
+        total = sum(weights.values())
+        return OrderedDict((name, w / total) for name, w in weights.items())
+
+    def choose(self):
+        weights = [(name, self.weight(name)) for name in self.priors]
+        i = self.random.random() * sum(w for _, w in weights)
+        for name, w in weights:
+            i -= w
+            if i < 0:
+                return name
+        # Floating point error can leave us here, very rarely.
+        return weights[-1][0]  # pragma: no cover
+
+    def record(self, operators, success):
+        """Record the outcome of a test case that was generated by a
+        mutator using ``operators``."""
+        for name in set(operators):
+            self.trials[name] += 1
+            if success:
+                self.successes[name] += 1
+
+
 class TargetSelector(object):
     """Data structure for selecting targets to use for mutation.
 
@@ -925,6 +1891,11 @@ class TargetSelector(object):
        past examples discarded automatically, preferring ones that we have
        already explored from.
 
+    Separately, it keeps a pool of examples that reached new branches of the
+    code under test (see ``add_covering``). These are selected about half the
+    time when there are any, and those that have never been selected always
+    go first.
+
     These invariants are fairly heavily prone to change - they're not
     especially well validated as being optimal, and are mostly just a decent
     compromise between diversity and keeping the pool size bounded.
@@ -934,11 +1905,22 @@ class TargetSelector(object):
         self.random = random
         self.best_status = Status.OVERRUN
         self.pool_size = pool_size
+        self.fresh_covering = []
+        self.used_covering = []
         self.reset()
 
     def __len__(self):
         return len(self.fresh_examples) + len(self.used_examples)
 
+    def examples(self):
+        """Returns a list of every example currently in either pool."""
+        return (
+            self.fresh_examples
+            + self.used_examples
+            + self.fresh_covering
+            + self.used_covering
+        )
+
     def reset(self):
         self.fresh_examples = []
         self.used_examples = []
@@ -957,7 +1939,18 @@ class TargetSelector(object):
             pop_random(self.random, self.used_examples or self.fresh_examples)
             assert self.pool_size == len(self)
 
+    def add_covering(self, data):
+        self.fresh_covering.append(data)
+        if len(self.fresh_covering) + len(self.used_covering) > self.pool_size:
+            pop_random(self.random, self.used_covering or self.fresh_covering)
+
     def select(self):
+        if self.fresh_covering:
+            result = pop_random(self.random, self.fresh_covering)
+            self.used_covering.append(result)
+            return result
+        if self.used_covering and self.random.randint(0, 1):
+            return self.random.choice(self.used_covering)
         if self.fresh_examples:
             result = pop_random(self.random, self.fresh_examples)
             self.used_examples.append(result)
@@ -21,7 +21,13 @@ from collections import defaultdict
 
 import attr
 
-from hypothesis.internal.compat import hbytes, hrange, int_from_bytes, int_to_bytes
+from hypothesis.internal.compat import (
+    benchmark_time,
+    hbytes,
+    hrange,
+    int_from_bytes,
+    int_to_bytes,
+)
 from hypothesis.internal.conjecture.data import ConjectureResult, Overrun, Status
 from hypothesis.internal.conjecture.floats import (
     DRAW_FLOAT_LABEL,
@@ -64,6 +70,10 @@ def sort_key(buffer):
 
 SHRINK_PASS_DEFINITIONS = {}  # type: Dict[str, ShrinkPassDefinition]
 
+# When the engine has worker processes, we speculatively run this many steps
+# per worker ahead of where the shrinker has got to.
+SPECULATION_BATCH_SIZE = 4
+
 
 @attr.s()
 class ShrinkPassDefinition(object):
@@ -79,10 +89,18 @@ class ShrinkPassDefinition(object):
     ``fn(*args)`` has been called for every ``args`` in ``generate_arguments(self)``.
     No guarantee is made that all of these will be called if the shrink target
     changes.
+
+    A shrink pass may optionally define ``speculate``, which takes the same
+    arguments as ``run_step`` and returns the first buffer that that step
+    will try (or None if it's not easy to say). When the engine has worker
+    processes we use this to run many steps' first attempts in parallel
+    ahead of time. It only needs to be a good guess: if it's wrong we just
+    waste some work.
     """
 
     run_step = attr.ib()
     generate_arguments = attr.ib()
+    speculate = attr.ib(default=None)
 
     @property
     def name(self):
@@ -93,12 +111,14 @@ class ShrinkPassDefinition(object):
         SHRINK_PASS_DEFINITIONS[self.name] = self
 
 
-def defines_shrink_pass(generate_arguments):
+def defines_shrink_pass(generate_arguments, speculate=None):
     """A convenient decorator for defining shrink passes."""
 
     def accept(run_step):
         definition = ShrinkPassDefinition(
-            generate_arguments=generate_arguments, run_step=run_step
+            generate_arguments=generate_arguments,
+            run_step=run_step,
+            speculate=speculate,
         )
 
         def run(self):
@@ -299,6 +319,7 @@ class Shrinker(object):
         p = ShrinkPass(
             run_with_arguments=definition.run_step,
             generate_arguments=definition.generate_arguments,
+            speculate=definition.speculate,
             shrinker=self,
             index=len(self.passes),
         )
@@ -371,6 +392,51 @@ class Shrinker(object):
         self.incorporate_test_data(result)
         return result
 
+    def speculate(self, steps):
+        """Takes a list of ``(ShrinkPass, step)`` pairs that we are about
+        to run, and asks the engine to run the first buffer each of them
+        will try in parallel, so that when we get to them they are (mostly)
+        cache hits.
+
+        If any of those buffers turn out to be interesting, we immediately
+        run the shortlex smallest of them for real. Because each of these is
+        a buffer that its step would have tried anyway (as long as the shrink
+        target doesn't change first, in which case we've made progress
+        regardless), this does not affect whether running the steps makes
+        progress, only how quickly it gets there.
+        """
+        buffers = []
+        for sp, i in steps:
+            buffer = sp.speculative_buffer(i)
+            if buffer is not None and sort_key(buffer) < sort_key(self.buffer):
+                buffers.append(buffer)
+        interesting = self.__engine.run_speculatively(buffers)
+        for buffer in sorted(interesting, key=sort_key):
+            if self.incorporate_new_buffer(buffer):
+                break
+
+    def speculatively(self, steps):
+        """Iterates over ``steps``, a list of ``(ShrinkPass, step)`` pairs,
+        calling ``speculate`` on batches of upcoming steps as we go. A
+        batch is recalculated whenever the shrink target changes, because
+        its buffers are then unlikely to be the ones the steps will try.
+
+        If the engine has no worker processes this does nothing but
+        iterate."""
+        if self.__engine.workers <= 1:
+            for s in steps:
+                yield s
+            return
+        batch_size = SPECULATION_BATCH_SIZE * self.__engine.workers
+        speculated_up_to = 0
+        speculated_for = None
+        for i, s in enumerate(steps):
+            if i >= speculated_up_to or speculated_for is not self.shrink_target:
+                self.speculate(steps[i : i + batch_size])
+                speculated_up_to = i + batch_size
+                speculated_for = self.shrink_target
+            yield s
+
     def debug(self, msg):
         self.__engine.debug(msg)
 
@@ -394,7 +460,7 @@ class Shrinker(object):
 
             steps = sp.generate_steps()
             self.random.shuffle(steps)
-            for s in steps:
+            for _, s in self.speculatively([(sp, s) for s in steps]):
                 sp.run_step(s)
         finally:
             self.debug("Shrink Pass %s completed." % (sp.name,))
@@ -554,7 +620,7 @@ class Shrinker(object):
             # try again once all of the passes have been run.
             can_discard = self.remove_discarded()
 
-            for sp, step in passes_with_steps:
+            for sp, step in self.speculatively(passes_with_steps):
                 sp.run_step(step)
                 if can_discard:
                     can_discard &= self.remove_discarded()
@@ -941,12 +1007,19 @@ class Shrinker(object):
                 distinct_partitions.append(prev | endpoints_at_depth[d])
         return [sorted(endpoints) for endpoints in distinct_partitions[1:]]
 
+    def speculate_example_deletion(self, i, j):
+        partition = self.endpoints_by_depth[i]
+        if j + 1 >= len(partition) - 1:
+            return None
+        return self.buffer[: partition[j]] + self.buffer[partition[j + 1] :]
+
     @defines_shrink_pass(
         lambda self: [
             (i, j)
             for i, ls in enumerate(self.endpoints_by_depth)
             for j in hrange(len(ls))
-        ]
+        ],
+        speculate=speculate_example_deletion,
     )
     def adaptive_example_deletion(self, i, j):
         """Attempts to delete every example from the test case.
@@ -1137,7 +1210,15 @@ class Shrinker(object):
                 random=self.random,
             )
 
-    @defines_shrink_pass(lambda self: [(b,) for b in self.blocks])
+    def speculate_block_zeroing(self, block):
+        if block.all_zero:
+            return None
+        u, v = block.bounds
+        return self.buffer[:u] + hbytes(v - u) + self.buffer[v:]
+
+    @defines_shrink_pass(
+        lambda self: [(b,) for b in self.blocks], speculate=speculate_block_zeroing
+    )
     def minimize_individual_blocks(self, block):
         """Attempt to minimize each block in sequence.
 
@@ -1422,6 +1503,7 @@ class ShrinkPass(object):
     generate_arguments = attr.ib()
     index = attr.ib()
     shrinker = attr.ib()
+    speculate = attr.ib(default=None)
 
     __arguments = attr.ib(default=None, init=False)
     __target_at_argument_calculation = attr.ib(default=None, init=False)
@@ -1432,6 +1514,7 @@ class ShrinkPass(object):
     calls = attr.ib(default=0)
     shrinks = attr.ib(default=0)
     deletions = attr.ib(default=0)
+    runtime = attr.ib(default=0.0)
 
     @property
     def arguments(self):
@@ -1445,6 +1528,13 @@ class ShrinkPass(object):
             return []
         return list(hrange(len(self.arguments)))
 
+    def speculative_buffer(self, i):
+        """Returns a guess at the first buffer that ``run_step(i)`` will
+        try, or None if we can't make one."""
+        if self.speculate is None or i >= len(self.arguments):
+            return None
+        return self.speculate(self.shrinker, *self.arguments[i])
+
     def run_step(self, i):
         if i >= len(self.arguments):
             return
@@ -1453,9 +1543,11 @@ class ShrinkPass(object):
         initial_shrinks = self.shrinker.shrinks
         initial_calls = self.shrinker.calls
         size = len(self.shrinker.shrink_target.buffer)
+        start = benchmark_time()
         try:
             self.run_with_arguments(self.shrinker, *args)
         finally:
+            self.runtime += max(benchmark_time() - start, 0.0)
             self.calls += self.shrinker.calls - initial_calls
             self.shrinks += self.shrinker.shrinks - initial_shrinks
             self.deletions += size - len(self.shrinker.shrink_target.buffer)
@@ -0,0 +1,97 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import absolute_import, division, print_function
+
+import os
+import sys
+
+from hypothesis.internal.escalation import is_hypothesis_file
+
+STDLIB = os.path.dirname(os.__file__)
+
+
+def should_trace_file(filename):
+    """Returns True if lines in ``filename`` are worth tracing: We only
+    care about the code under test, not Hypothesis itself (which runs the
+    same code for every test case) or the standard library."""
+    return not (
+        filename.startswith("<")
+        or filename.startswith(STDLIB)
+        or is_hypothesis_file(filename)
+    )
+
+
+class Tracer(object):
+    """A context manager that records the branches taken by the code under
+    test while it is active, as ``(filename, source, destination)`` triples
+    of line numbers in ``self.branches``.
+
+    This is deliberately much cruder than a real coverage tool: A branch is
+    just a pair of consecutive lines executed in the same frame, which is
+    enough to tell test cases that take different paths through the code
+    apart, and cheap enough to leave on for a whole generate phase.
+
+    If a trace function is already installed (e.g. because the tests are
+    running under coverage or a debugger) we leave it alone and record
+    nothing, rather than break it.
+    """
+
+    def __init__(self):
+        self.branches = set()
+        self.__should_trace = {}
+        self.__previous_trace = None
+        self.__active = False
+
+    def __enter__(self):
+        self.__previous_trace = sys.gettrace()
+        if self.__previous_trace is None:
+            self.__active = True
+            sys.settrace(self.trace)
+        return self
+
+    def __exit__(self, *args):
+        if self.__active:
+            sys.settrace(self.__previous_trace)
+            self.__active = False
+
+    def trace(self, frame, event, arg):  # pragma: no cover
+        # Trace functions are never seen by coverage, because they replace
+        # its own trace function while they are installed. The behaviour
+        # they implement is tested in tests/nocover/test_tracing.py.
+        if event != "call":
+            return None
+        filename = frame.f_code.co_filename
+        try:
+            wanted = self.__should_trace[filename]
+        except KeyError:
+            wanted = should_trace_file(filename)
+            self.__should_trace[filename] = wanted
+        if not wanted:
+            return None
+
+        branches = self.branches
+        previous = [frame.f_lineno]
+
+        def trace_lines(frame, event, arg):
+            if event == "line":
+                line = frame.f_lineno
+                branches.add((filename, previous[0], line))
+                previous[0] = line
+            return trace_lines
+
+        return trace_lines
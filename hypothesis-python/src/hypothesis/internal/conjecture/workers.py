@@ -0,0 +1,188 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import absolute_import, division, print_function
+
+import multiprocessing
+import os
+from collections import deque
+
+import attr
+
+from hypothesis.errors import WorkerProcessError
+from hypothesis.internal.compat import hbytes
+
+# How often, in seconds, WorkerPool.next_result checks that none of the
+# worker processes have died while it waits for a result.
+WORKER_POLL_INTERVAL = 0.1
+
+
+def can_fork():
+    """Returns True if we can run test cases in forked worker processes.
+
+    Worker processes are never sent the test function: they inherit it
+    (along with the rest of the engine) from the coordinating process when
+    they are forked, so on platforms without ``fork`` we don't support
+    running them at all."""
+    return hasattr(os, "fork")
+
+
+@attr.s(slots=True)
+class WorkerTask(object):
+    """A description of a single test case for a worker process to run.
+
+    If ``origin`` is None then the worker generates a fresh test case
+    starting with ``prefix``, otherwise it mutates ``origin`` (which must
+    be a ``WorkerResult``). ``seed`` seeds the random number generator the
+    worker uses, so that every task draws from a distinct stream."""
+
+    prefix = attr.ib()
+    seed = attr.ib()
+    origin = attr.ib(default=None)
+
+
+@attr.s(slots=True)
+class ReplayTask(object):
+    """A request for a worker process to run the test function on exactly
+    ``buffer``, as ``ConjectureRunner.cached_test_function`` would."""
+
+    buffer = attr.ib()
+
+
+@attr.s(slots=True)
+class WorkerResult(object):
+    """A compact summary of running a test case in a worker process.
+
+    This contains exactly the parts of a ``ConjectureData`` that the
+    coordinating ``ConjectureRunner`` needs in order to update its
+    ``DataTree`` and ``TargetSelector`` and its exit conditions, and is
+    cheap to send between processes.
+
+    A status of None means that the test function raised an unexpected
+    exception. In that case, as with interesting test cases, the
+    coordinator replays the buffer itself to get the full details.
+
+    Results for a ``ReplayTask`` that was not interesting also carry the
+    full ``ConjectureResult`` (with its examples already calculated), or
+    None if it overran, so that the coordinator can cache it."""
+
+    status = attr.ib()
+    buffer = attr.ib()
+    blocks = attr.ib(default=())
+    forced_indices = attr.ib(default=frozenset())
+    masked_indices = attr.ib(default=attr.Factory(dict))
+    draw_times = attr.ib(default=())
+    runtime = attr.ib(default=0.0)
+    events = attr.ib(default=frozenset())
+    hit_zero_bound = attr.ib(default=False)
+    branches = attr.ib(default=frozenset())
+    target_observations = attr.ib(default=attr.Factory(dict))
+    result = attr.ib(default=None)
+
+    @classmethod
+    def from_data(cls, data, event_to_string=str):
+        return cls(
+            status=data.status,
+            buffer=hbytes(data.buffer),
+            blocks=data.blocks,
+            forced_indices=frozenset(data.forced_indices),
+            masked_indices=dict(data.masked_indices),
+            draw_times=tuple(data.draw_times),
+            runtime=max(data.finish_time - data.start_time, 0.0),
+            events=frozenset(map(event_to_string, data.events)),
+            hit_zero_bound=getattr(data, "hit_zero_bound", False),
+            branches=data.branches,
+            target_observations=dict(data.target_observations),
+        )
+
+
+# The runner that forked worker processes should run tasks against. This is
+# only ever set in the coordinating process for the duration of a call to
+# WorkerPool.__init__, so that the processes it forks inherit it.
+_worker_runner = [None]
+
+
+def _run_task(task):  # pragma: no cover
+    # This only ever runs in a worker process, so coverage can't see it. The
+    # method that does the actual work is tested directly.
+    return _worker_runner[0].run_worker_task(task)
+
+
+class WorkerPool(object):
+    """A pool of forked processes that run test cases for a ConjectureRunner.
+
+    Tasks are submitted with ``submit`` and their results are returned by
+    ``next_result`` in the order they were submitted, so that given the same
+    sequence of tasks the coordinator sees the same sequence of results
+    regardless of how the work was scheduled between processes.
+
+    If a worker process dies (e.g. because the test crashed the interpreter),
+    the task it was running is lost and we can't tell which one that was,
+    so ``next_result`` shuts the pool down and raises WorkerProcessError.
+    """
+
+    def __init__(self, runner, processes):
+        assert processes > 1
+        assert can_fork()
+        get_context = getattr(multiprocessing, "get_context", None)
+        if get_context is not None:
+            context = get_context("fork")
+        else:  # pragma: no cover
+            # Python 2 has no contexts, but always forks on POSIX systems.
+            context = multiprocessing
+        _worker_runner[0] = runner
+        try:
+            self.__pool = context.Pool(processes)
+        finally:
+            _worker_runner[0] = None
+        # The pool quietly replaces workers that exit, so we keep hold of
+        # the ones that it started with to see if any of them have died.
+        self.__processes = list(self.__pool._pool)
+        self.processes = processes
+        self.__pending = deque()
+
+    def __len__(self):
+        return len(self.__pending)
+
+    def submit(self, task):
+        self.__pending.append(self.__pool.apply_async(_run_task, (task,)))
+
+    def next_result(self):
+        pending = self.__pending[0]
+        while True:
+            try:
+                result = pending.get(WORKER_POLL_INTERVAL)
+                break
+            except multiprocessing.TimeoutError:
+                for process in self.__processes:
+                    if process.exitcode is not None:
+                        self.close()
+                        raise WorkerProcessError(
+                            "A worker process exited unexpectedly with "
+                            "exitcode %r while running a test case."
+                            % (process.exitcode,),
+                            interesting_origin=None,
+                        )
+        self.__pending.popleft()
+        return result
+
+    def close(self):
+        """Shut down all worker processes, discarding any results that
+        have not been collected yet."""
+        self.__pending.clear()
+        self.__pool.terminate()
+        self.__pool.join()
@@ -0,0 +1,131 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+"""Support for running ``async def`` tests. This module must be importable
+on Python 2, so it only imports asyncio when it is asked to run something."""
+
+from __future__ import absolute_import, division, print_function
+
+import inspect
+
+from hypothesis.internal.reflection import proxies
+
+
+def is_coroutine_function(f):
+    iscoroutinefunction = getattr(inspect, "iscoroutinefunction", None)
+    return iscoroutinefunction is not None and iscoroutinefunction(f)
+
+
+class EventLoop(object):
+    """Runs coroutines to completion from synchronous code.
+
+    Everything run inside a ``with`` block shares one event loop, which is
+    closed at the end of the outermost block. Outside of one, each call to
+    ``run`` gets an event loop of its own. The loop is only created when
+    something is run on it, so this costs nothing for tests that never use
+    it.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.__depth = 0
+
+    def __enter__(self):
+        self.__depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.__depth -= 1
+        if self.__depth == 0 and self.loop is not None:
+            loop, self.loop = self.loop, None
+            try:
+                # Asynchronous generators are new in Python 3.6.
+                if hasattr(loop, "shutdown_asyncgens"):
+                    loop.run_until_complete(loop.shutdown_asyncgens())
+            finally:
+                loop.close()
+
+    def get_loop(self):
+        if self.loop is None:
+            import asyncio
+
+            self.loop = asyncio.new_event_loop()
+        return self.loop
+
+    def run(self, awaitable):
+        with self:
+            return self.get_loop().run_until_complete(awaitable)
+
+    def gather(self, awaitables):
+        """Run all of ``awaitables`` concurrently, and return a list of
+        their results, with the exception that it raised in place of the
+        result of each one that failed."""
+        import asyncio
+
+        with self:
+            loop = self.get_loop()
+            tasks = [asyncio.ensure_future(a, loop=loop) for a in awaitables]
+            return loop.run_until_complete(
+                asyncio.gather(*tasks, return_exceptions=True)
+            )
+
+    def synchronous(self, function):
+        """Returns a function with the same signature as the coroutine
+        function ``function``, which runs it to completion on this loop."""
+
+        @proxies(function)
+        def run_function(*args, **kwargs):
+            return self.run(function(*args, **kwargs))
+
+        return run_function
+
+
+class ContextStepper(object):
+    """An awaitable that runs ``coroutine`` one step at a time, with each
+    step inside a new context manager from ``enter``.
+
+    Coroutines that run concurrently on an event loop take turns on the one
+    thread, so this lets each of them see its own value of state that would
+    otherwise be shared between them, such as the current build context.
+    """
+
+    def __init__(self, coroutine, enter):
+        self.coroutine = coroutine
+        self.enter = enter
+
+    def __await__(self):
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.send(None)
+
+    next = __next__
+
+    def send(self, value):
+        with self.enter():
+            return self.coroutine.send(value)
+
+    def throw(self, *args):
+        with self.enter():
+            return self.coroutine.throw(*args)
+
+    def close(self):
+        with self.enter():
+            self.coroutine.close()
@@ -19,6 +19,7 @@ from __future__ import absolute_import, division, print_function
 
 import contextlib
 import random
+import threading
 
 from hypothesis.errors import InvalidArgument
 from hypothesis.internal.compat import integer_types
@@ -89,6 +90,19 @@ def get_seeder_and_restorer(seed=0):
     return seed_all, restore_all
 
 
+# The global PRNGs are shared between threads, so we can only make them
+# deterministic for one thread at a time. The first thread to enter
+# deterministic_PRNG seeds them, later threads leave them alone until it has
+# left, and we only restore the original state when the last one leaves.
+# Nested entries in the thread that owns the PRNGs seed and restore them as
+# usual.
+_prng_lock = threading.Lock()
+_prng_state = threading.local()
+_prng_owner = None  # type: object
+_prng_users = 0
+_prng_restorers = []  # type: list
+
+
 @contextlib.contextmanager
 def deterministic_PRNG():
     """Context manager that handles random.seed without polluting global state.
@@ -98,9 +112,30 @@ def deterministic_PRNG():
     bad idea in principle, and breaks all kinds of independence assumptions
     in practice.
     """
+    global _prng_owner, _prng_users
+    me = threading.current_thread()
     seed_all, restore_all = get_seeder_and_restorer()
-    seed_all()
+    depth = getattr(_prng_state, "depth", 0)
+    with _prng_lock:
+        if _prng_users == 0:
+            _prng_owner = me
+            seed_all()
+            _prng_restorers.append(restore_all)
+            restore_all = None
+        elif _prng_owner is me and _prng_users == depth:
+            seed_all()
+        else:
+            restore_all = None
+        _prng_users += 1
+    _prng_state.depth = depth + 1
     try:
         yield
     finally:
-        restore_all()
+        _prng_state.depth = depth
+        with _prng_lock:
+            _prng_users -= 1
+            if restore_all is not None:
+                restore_all()
+            if _prng_users == 0:
+                _prng_owner = None
+                _prng_restorers.pop()()
@@ -0,0 +1,186 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+"""Support for sharing out a fixed amount of time between all of the
+Hypothesis tests in a session, according to how long each test's examples
+take to run and how often it has found a bug in the past."""
+
+from __future__ import absolute_import, division, print_function
+
+import json
+
+import attr
+
+from hypothesis.internal.compat import OrderedDict
+
+# We always give every test enough time for at least this many examples, so
+# that a test that was expensive or fruitless in the past still gets a look
+# in. This means that a session can go over its budget if it contains a lot
+# of slow tests.
+MIN_EXAMPLES = 10
+
+# The time per example that we assume for a test that we've never seen run,
+# if we haven't seen any test run either.
+DEFAULT_SECONDS_PER_EXAMPLE = 0.01
+
+# Examples that seem to take less time than this (e.g. because the clock is
+# too coarse to time them) are treated as taking this long.
+MIN_SECONDS_PER_EXAMPLE = 1e-6
+
+
+@attr.s()
+class RunHistory(object):
+    """What we know about a test from its previous runs: How many times it
+    has been run, how many of those runs found a failure, and how many
+    examples it ran in how many seconds in total."""
+
+    runs = attr.ib(default=0)
+    failures = attr.ib(default=0)
+    examples = attr.ib(default=0)
+    seconds = attr.ib(default=0.0)
+
+    @property
+    def seconds_per_example(self):
+        if self.examples == 0:
+            return None
+        return self.seconds / self.examples
+
+    @property
+    def failure_rate(self):
+        # The +1 and +2 are a uniform prior, so that tests we've never seen
+        # fail (or never seen at all) don't get a rate of zero.
+        return (self.failures + 1) / (self.runs + 2)
+
+
+def history_key(database_key):
+    return database_key + b".history"
+
+
+def load_history(database, database_key):
+    """Returns the ``RunHistory`` saved for ``database_key`` in
+    ``database``, or an empty one if there isn't one (or it's corrupt)."""
+    for value in database.fetch(history_key(database_key)):
+        try:
+            return RunHistory(**json.loads(value.decode("utf-8")))
+        except (ValueError, TypeError):
+            pass
+    return RunHistory()
+
+
+def save_history(database, database_key, history):
+    key = history_key(database_key)
+    database.delete_many([(key, value) for value in database.fetch(key)])
+    database.save(
+        key, json.dumps(attr.asdict(history), sort_keys=True).encode("utf-8")
+    )
+    database.flush()
+
+
+@attr.s()
+class Allocation(object):
+    """The share of the session budget given to one test. ``time_budget``
+    is the value of the time_budget setting that keeps the test within its
+    share of ``seconds``."""
+
+    seconds = attr.ib()
+    time_budget = attr.ib()
+    max_examples = attr.ib()
+    seconds_used = attr.ib(default=None)
+    examples_used = attr.ib(default=None)
+
+
+class BudgetScheduler(object):
+    """Shares out ``budget`` seconds between the tests added to it.
+
+    Each test is given a share of the time that is left when it starts,
+    in proportion to its expected failures per second: Its historical
+    failure rate divided by the time each of its examples takes. This
+    favours tests which are cheap to run and which have found bugs
+    before. Because we divide up whatever time is left, time that one test
+    doesn't use is passed on to the tests after it.
+
+    If the session is split between ``workers`` processes (e.g. with
+    pytest-xdist), each of which has its own scheduler with every test
+    added to it, each scheduler spends ``budget / workers`` seconds and
+    expects to run only its share of the tests that are still waiting, so
+    that the session as a whole stays within ``budget``.
+    """
+
+    def __init__(self, budget, workers=1):
+        self.budget = budget / workers
+        self.workers = workers
+        self.histories = OrderedDict()
+        self.allocations = OrderedDict()
+        self.seconds_used = 0.0
+
+    def add(self, name, history):
+        self.histories[name] = history
+
+    def seconds_per_example(self, name):
+        cost = self.histories[name].seconds_per_example
+        if cost is not None:
+            return max(cost, MIN_SECONDS_PER_EXAMPLE)
+        # For a test we haven't seen run, assume it is typical of the tests
+        # that we have seen.
+        known = [
+            h.seconds_per_example
+            for h in self.histories.values()
+            if h.seconds_per_example is not None
+        ]
+        if known:
+            return max(sorted(known)[len(known) // 2], MIN_SECONDS_PER_EXAMPLE)
+        return DEFAULT_SECONDS_PER_EXAMPLE
+
+    def weight(self, name):
+        return self.histories[name].failure_rate / self.seconds_per_example(name)
+
+    def allocate(self, name):
+        """Returns the ``Allocation`` for the test ``name``, which is about
+        to run."""
+        waiting = [
+            n for n in self.histories if n == name or n not in self.allocations
+        ]
+        remaining = max(self.budget - self.seconds_used, 0.0)
+        weight = self.weight(name)
+        others = sum(self.weight(n) for n in waiting if n != name)
+        share = weight / (weight + others / self.workers)
+        cost = self.seconds_per_example(name)
+        # The time_budget setting bounds generating and shrinking separately,
+        # so each of them gets half of this test's share.
+        time_budget = max(remaining * share / 2, MIN_EXAMPLES * cost)
+        allocation = Allocation(
+            seconds=2 * time_budget,
+            time_budget=time_budget,
+            max_examples=max(MIN_EXAMPLES, int(time_budget / cost)),
+        )
+        self.allocations[name] = allocation
+        return allocation
+
+    def record(self, name, seconds, examples, failed):
+        """Note that the test ``name`` ran ``examples`` examples in
+        ``seconds`` seconds, and whether it ``failed``. Returns its updated
+        ``RunHistory``."""
+        self.seconds_used += seconds
+        allocation = self.allocations[name]
+        allocation.seconds_used = seconds
+        allocation.examples_used = examples
+        history = self.histories[name]
+        history.runs += 1
+        history.failures += int(failed)
+        history.examples += examples
+        history.seconds += seconds
+        return history
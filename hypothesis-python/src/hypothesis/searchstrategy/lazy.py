@@ -17,6 +17,8 @@
 
 from __future__ import absolute_import, division, print_function
 
+import threading
+
 from hypothesis.internal.compat import getfullargspec
 from hypothesis.internal.reflection import (
     arg_string,
@@ -29,15 +31,22 @@ if False:
     from typing import Dict  # noqa
 
 
-unwrap_cache = {}  # type: Dict[SearchStrategy, SearchStrategy]
-unwrap_depth = 0
+class UnwrapState(threading.local):
+    """The cache for the outermost call to ``unwrap_strategies`` in each
+    thread, which is cleared when that call returns."""
 
+    def __init__(self):
+        self.cache = {}  # type: Dict[SearchStrategy, SearchStrategy]
+        self.depth = 0
 
-def unwrap_strategies(s):
-    global unwrap_depth
 
+unwrap_state = UnwrapState()
+
+
+def unwrap_strategies(s):
     if not isinstance(s, SearchStrategy):
         return s
+    unwrap_cache = unwrap_state.cache
     try:
         return unwrap_cache[s]
     except KeyError:
@@ -46,7 +55,7 @@ def unwrap_strategies(s):
     unwrap_cache[s] = s
 
     try:
-        unwrap_depth += 1
+        unwrap_state.depth += 1
         try:
             result = unwrap_strategies(s.wrapped_strategy)
             unwrap_cache[s] = result
@@ -63,10 +72,10 @@ def unwrap_strategies(s):
         except AttributeError:
             return s
     finally:
-        unwrap_depth -= 1
-        if unwrap_depth <= 0:
+        unwrap_state.depth -= 1
+        if unwrap_state.depth <= 0:
             unwrap_cache.clear()
-        assert unwrap_depth >= 0
+        assert unwrap_state.depth >= 0
 
 
 class LazyStrategy(SearchStrategy):
@@ -19,6 +19,7 @@ from __future__ import absolute_import, division, print_function
 
 import math
 
+from hypothesis import Phase
 from hypothesis.internal.conjecture.data import Status
 from hypothesis.internal.conjecture.engine import MAX_SHRINKS, ExitReason
 from hypothesis.utils.dynamicvariables import DynamicVariable
@@ -26,8 +27,55 @@ from hypothesis.utils.dynamicvariables import DynamicVariable
 collector = DynamicVariable(None)
 
 
+def engine_profile(engine):
+    """Returns a JSON-serializable dict of profiling data about a run of the
+    engine: wall clock time per phase, the calls, shrinks and time of each
+    shrink pass, the hit rate of the test case cache, the size of the
+    DataTree, the number of branches covered (if the run was coverage
+    guided), how often each mutation operator was used and was useful, and
+    the time spent drawing data versus running the test."""
+    scheduler = engine.mutation_scheduler
+    return {
+        "calls": engine.call_count,
+        "phases": {phase.name: t for phase, t in engine.phase_times.items()},
+        "shrink_passes": {
+            name: dict(stats) for name, stats in engine.shrink_pass_stats.items()
+        },
+        "cache": {"hits": engine.cache_hits, "misses": engine.cache_misses},
+        "tree_size": len(engine.tree),
+        "covered_branches": len(engine.covered_branches),
+        "mutation_operators": {
+            name: {
+                "trials": scheduler.trials[name],
+                "successes": scheduler.successes[name],
+            }
+            for name in scheduler.trials
+        },
+        "test_time": math.fsum(engine.all_runtimes),
+        "draw_time": math.fsum(engine.all_drawtimes),
+    }
+
+
+def aggregate_engine_profiles(profiles):
+    """Combine several results of ``engine_profile`` (e.g. for every test in
+    a session) into one, by adding up all of their numbers."""
+    total = {}
+    for profile in profiles:
+        _add_into(total, profile)
+    return total
+
+
+def _add_into(total, profile):
+    for k, v in profile.items():
+        if isinstance(v, dict):
+            _add_into(total.setdefault(k, {}), v)
+        else:
+            total[k] = total.get(k, 0) + v
+
+
 class Statistics(object):
     def __init__(self, engine):
+        self.engine_profile = engine_profile(engine)
         self.passing_examples = len(engine.status_runtimes.get(Status.VALID, ()))
         self.invalid_examples = len(
             engine.status_runtimes.get(Status.INVALID, [])
@@ -66,6 +114,19 @@ class Statistics(object):
                 "settings.max_examples={}, but < 10% of examples satisfied "
                 "assumptions"
             ).format(engine.settings.max_examples)
+        elif engine.exit_reason == ExitReason.time_budget:
+            if engine.time_budget_phase == Phase.shrink:
+                phase = "shrinking"
+            else:
+                phase = "generating"
+            self.exit_reason = "settings.time_budget=%r ran out while %s" % (
+                engine.settings.time_budget,
+                phase,
+            )
+        elif engine.exit_reason == ExitReason.max_calls:
+            self.exit_reason = "fuzzed for max_calls=%d test cases" % (
+                engine.fuzz_max_calls,
+            )
         else:
             self.exit_reason = "settings.%s=%r" % (
                 engine.exit_reason.name,
@@ -77,6 +138,16 @@ class Statistics(object):
             for e, c in sorted(engine.event_call_counts.items(), key=lambda x: -x[1])
         ]
 
+        if engine.mutation_scheduler.trials:
+            self.mutator_weights = engine.mutation_scheduler.weights
+        else:
+            self.mutator_weights = {}
+
+        self.targets = [
+            "%r (label=%r)" % (score, label)
+            for label, score in sorted(engine.best_observed_targets.items())
+        ]
+
         total_runtime = math.fsum(engine.all_runtimes)
         total_drawtime = math.fsum(engine.all_drawtimes)
 
@@ -109,6 +180,15 @@ class Statistics(object):
         if self.events:
             lines.append("  - Events:")
             lines += ["    * %s" % (event,) for event in self.events]
+        if self.mutator_weights:
+            lines.append("  - Mutation operator weights:")
+            lines += [
+                "    * %.2f%%, %s" % (w * 100, name)
+                for name, w in sorted(self.mutator_weights.items(), key=lambda x: -x[1])
+            ]
+        if self.targets:
+            lines.append("  - Highest target scores:")
+            lines += ["    * %s" % (target,) for target in self.targets]
         return lines
 
 
@@ -134,8 +134,14 @@ def all_values(db):
 
 
 def non_covering_examples(database):
+    """Returns every example in ``database``, apart from the coverage corpus
+    and the records of which inputs have been explored and which examples
+    have been fully shrunk."""
     return {
-        v for k, vs in database.data.items() if not k.endswith(b".coverage") for v in vs
+        v
+        for k, vs in database.data.items()
+        if not k.endswith((b".coverage", b".tree", b".shrunk"))
+        for v in vs
     }
 
 
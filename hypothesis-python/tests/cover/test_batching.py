@@ -0,0 +1,201 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import absolute_import, division, print_function
+
+import pytest
+
+from hypothesis import (
+    assume,
+    batched,
+    event,
+    example,
+    given,
+    note,
+    settings,
+    strategies as st,
+    target,
+)
+from hypothesis.errors import Flaky, InvalidArgument
+from hypothesis.internal.compat import hbytes
+from hypothesis.internal.conjecture.data import Status, StopTest
+from hypothesis.internal.conjecture.engine import ConjectureRunner
+from tests.common.utils import capture_out
+
+
+@pytest.mark.parametrize("size", [0, -1, 1.5, "2"])
+def test_batch_size_must_be_a_positive_integer(size):
+    with pytest.raises(InvalidArgument):
+        batched(size)
+
+
+def test_passes_lists_of_values():
+    sizes = set()
+
+    @settings(database=None)
+    @batched(5)
+    @given(xs=st.booleans(), y=st.none())
+    def test(xs, y):
+        assert all(isinstance(x, bool) for x in xs)
+        assert all(v is None for v in y)
+        sizes.add(len(xs))
+
+    test()
+    assert sizes == {1, 5}
+
+
+def test_can_be_applied_outside_given():
+    sizes = set()
+
+    @batched(5)
+    @settings(database=None)
+    @given(st.booleans())
+    def test(xs):
+        sizes.add(len(xs))
+
+    test()
+    assert 5 in sizes
+
+
+def test_reports_and_shrinks_the_failing_example_on_its_own():
+    @settings(database=None)
+    @batched(10)
+    @given(st.integers(0, 1000))
+    def test(xs):
+        assert all(x < 500 for x in xs)
+
+    with capture_out() as out:
+        with pytest.raises(AssertionError):
+            test()
+    assert "test(xs=[500])" in out.getvalue()
+
+
+def test_assume_rejects_individual_examples():
+    seen = []
+
+    @settings(database=None)
+    @batched(10)
+    @given(st.integers(0, 1000))
+    def test(xs):
+        assume(all(x % 2 == 0 for x in xs))
+        seen.extend(xs)
+
+    test()
+    assert seen
+    assert all(x % 2 == 0 for x in seen)
+
+
+def test_failures_that_need_the_whole_batch_are_flaky():
+    @settings(database=None)
+    @batched(10)
+    @given(st.integers())
+    def test(xs):
+        assert len(xs) == 1
+
+    with pytest.raises(Flaky):
+        test()
+
+
+def test_can_note_and_target_in_a_batch():
+    @settings(database=None)
+    @batched(4)
+    @given(st.integers(0, 1000))
+    def test(xs):
+        note(xs)
+        event("batch")
+        target(float(len(xs)))
+        assert all(x < 500 for x in xs)
+
+    with capture_out() as out:
+        with pytest.raises(AssertionError):
+            test()
+    assert "test(xs=[500])" in out.getvalue()
+    assert "[500]" in out.getvalue().splitlines()
+
+
+def test_explicit_examples_are_passed_as_a_batch_of_one():
+    seen = []
+
+    @settings(database=None, max_examples=1)
+    @example(xs=5, y=None)
+    @batched(4)
+    @given(xs=st.integers(), y=st.none())
+    def test(xs, y):
+        assert isinstance(xs, list)
+        seen.append((xs, y))
+
+    test()
+    assert seen[0] == ([5], [None])
+
+
+def test_fuzz_one_input_passes_a_batch_of_one():
+    @batched(3)
+    @given(st.integers(0, 255))
+    def test(xs):
+        assert xs == [7]
+
+    assert test.hypothesis.fuzz_one_input(hbytes([7])) == hbytes([7])
+
+
+def test_engine_runs_batches_with_one_call():
+    batches = []
+
+    def f(data):
+        data.draw_bytes(1)
+
+    def f_batch(datas):
+        batches.append(len(datas))
+        for data in datas:
+            try:
+                if data.draw_bytes(1)[0] == 255:
+                    data.mark_invalid()
+            except StopTest:
+                pass
+
+    runner = ConjectureRunner(
+        f,
+        settings=settings(database=None, max_examples=100),
+        batch_test_function=f_batch,
+        batch_size=4,
+    )
+    runner.run()
+    assert 4 in batches
+    assert runner.call_count >= sum(batches)
+
+
+def test_engine_records_interesting_examples_from_a_batch():
+    def f(data):
+        if data.draw_bytes(1)[0] >= 100:
+            data.mark_interesting()
+
+    def f_batch(datas):
+        for data in datas:
+            try:
+                f(data)
+            except StopTest:
+                pass
+
+    runner = ConjectureRunner(
+        f,
+        settings=settings(database=None, max_examples=1000),
+        batch_test_function=f_batch,
+        batch_size=4,
+    )
+    runner.run()
+    (result,) = runner.interesting_examples.values()
+    assert result.status == Status.INTERESTING
+    assert result.buffer == hbytes([100])
@@ -19,9 +19,12 @@ from __future__ import absolute_import, division, print_function
 
 from random import Random
 
+import pytest
+
 from hypothesis import HealthCheck, settings
 from hypothesis.internal.compat import hbytes
 from hypothesis.internal.conjecture.data import ConjectureData, Status
+from hypothesis.internal.conjecture.datatree import DataTree
 from hypothesis.internal.conjecture.engine import ConjectureRunner, RunIsComplete
 
 TEST_SETTINGS = settings(
@@ -95,6 +98,31 @@ def test_one_dead_branch():
     assert runner.tree.is_exhausted
 
 
+def test_a_forced_node_stays_alive_while_its_other_children_are():
+    tree = DataTree(cap=100)
+
+    def add(buffer, forced):
+        data = ConjectureData.for_buffer(hbytes(buffer))
+        if forced:
+            data.write(hbytes([2]))
+        else:
+            data.draw_bits(8)
+        data.draw_bits(1)
+        data.freeze()
+        tree.add(data)
+
+    add([0, 0], forced=False)
+    add([1, 0], forced=False)
+    # The root is forced from now on, and the child that this leads to is
+    # exhausted, but the two that it had before still have a value left.
+    add([2, 0], forced=True)
+    add([2, 1], forced=True)
+    assert not tree.is_exhausted
+    add([0, 1], forced=False)
+    add([1, 1], forced=False)
+    assert tree.is_exhausted
+
+
 def test_non_dead_root():
     @runner_for(b"\0\0", b"\1\0", b"\1\1")
     def runner(data):
@@ -124,6 +152,32 @@ def test_novel_prefixes_are_novel():
         assert runner.tree.rewrite(example)[0] == result.buffer
 
 
+def add_to_tree(tree, tf, buffer):
+    data = ConjectureData.for_buffer(hbytes(buffer))
+    tf(data)
+    data.freeze()
+    tree.add(data)
+
+
+def test_novel_prefixes_only_use_the_bytes_that_are_left():
+    def tf(data):
+        data.write(b"\0")
+        data.draw_bits(8)
+
+    tree = DataTree(cap=10)
+    for c in range(253):
+        add_to_tree(tree, tf, [0, c])
+    random = Random(0)
+    for _ in range(20):
+        prefix = tree.generate_novel_prefix(random)
+        assert prefix[0] == 0
+        assert prefix[1] >= 253
+    for c in range(253, 256):
+        assert not tree.is_exhausted
+        add_to_tree(tree, tf, [0, c])
+    assert tree.is_exhausted
+
+
 def test_overruns_if_not_enough_bytes_for_block():
     runner = ConjectureRunner(
         lambda data: data.draw_bytes(2), settings=TEST_SETTINGS, random=Random(0)
@@ -140,3 +194,73 @@ def test_overruns_if_prefix():
     )
     runner.cached_test_function(b"\0\0")
     assert runner.tree.rewrite(b"\0")[1] == Status.OVERRUN
+
+
+def test_shares_nodes_between_buffers_with_common_prefixes():
+    runner = ConjectureRunner(
+        lambda data: [data.draw_bits(8) for _ in range(3)],
+        settings=TEST_SETTINGS,
+        random=Random(0),
+    )
+    runner.cached_test_function(b"\0\0\0")
+    assert len(runner.tree) == 4
+    runner.cached_test_function(b"\0\1\0")
+    assert len(runner.tree) == 6
+    runner.cached_test_function(b"\0\1\1")
+    assert len(runner.tree) == 7
+
+    node = runner.tree.child(0, 0)
+    assert runner.tree.child(node, 1) == 4
+    with pytest.raises(KeyError):
+        runner.tree.child(node, 2)
+
+
+def test_serialised_trees_know_what_has_been_explored():
+    @runner_for(b"\0\0", b"\0\1", b"\0\2", b"\0\3", b"\1\3")
+    def runner(data):
+        data.draw_bits(1)
+        data.draw_bits(2)
+
+    tree = DataTree.from_bytes(runner.tree.to_bytes(), cap=runner.tree.cap)
+    assert len(tree) == len(runner.tree)
+    assert tree.to_bytes() == runner.tree.to_bytes()
+    assert tree.is_dead(tree.child(0, 0))
+    assert not tree.is_exhausted
+    random = Random(0)
+    for _ in range(20):
+        prefix = tree.generate_novel_prefix(random)
+        assert prefix[0] == 1
+        assert prefix[1] != 3
+
+
+def test_serialised_trees_can_be_exhausted():
+    def tf(data):
+        data.draw_bits(2)
+        data.draw_bits(8)
+
+    runner = ConjectureRunner(tf, settings=TEST_SETTINGS, random=Random(0))
+    for a in range(4):
+        for b in range(256):
+            if (a, b) != (3, 255):
+                runner.cached_test_function([a, b])
+    tree = DataTree.from_bytes(runner.tree.to_bytes(), cap=runner.tree.cap)
+    assert tree.generate_novel_prefix(Random(0)) == hbytes([3, 255])
+    add_to_tree(tree, tf, [3, 255])
+    assert tree.is_exhausted
+
+
+def test_serialised_trees_do_not_predict_results():
+    @runner_for(b"\0")
+    def runner(data):
+        data.draw_bits(1)
+
+    tree = DataTree.from_bytes(runner.tree.to_bytes(), cap=runner.tree.cap)
+    assert tree.rewrite(b"\0")[1] is None
+
+
+@pytest.mark.parametrize(
+    "data", [b"", b"\0" * 20, DataTree(cap=10).to_bytes()[:-1], b"\x78\x9c"]
+)
+def test_rejects_malformed_serialised_trees(data):
+    with pytest.raises(ValueError):
+        DataTree.from_bytes(data, cap=10)
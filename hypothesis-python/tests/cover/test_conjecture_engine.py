@@ -26,9 +26,19 @@ import pytest
 import hypothesis.internal.conjecture.engine as engine_module
 import hypothesis.internal.conjecture.floats as flt
 from hypothesis import HealthCheck, Phase, Verbosity, settings
-from hypothesis.database import ExampleDatabase, InMemoryExampleDatabase
+from hypothesis.database import (
+    ExampleDatabase,
+    InMemoryExampleDatabase,
+    SQLiteExampleDatabase,
+)
 from hypothesis.errors import FailedHealthCheck
-from hypothesis.internal.compat import hbytes, hrange, int_from_bytes, int_to_bytes
+from hypothesis.internal.compat import (
+    Counter,
+    hbytes,
+    hrange,
+    int_from_bytes,
+    int_to_bytes,
+)
 from hypothesis.internal.conjecture.data import (
     MAX_DEPTH,
     ConjectureData,
@@ -36,14 +46,17 @@ from hypothesis.internal.conjecture.data import (
     Status,
 )
 from hypothesis.internal.conjecture.engine import (
+    MUTATION_OPERATORS,
     ConjectureRunner,
     ExitReason,
+    MutationScheduler,
     RunIsComplete,
     TargetSelector,
 )
 from hypothesis.internal.conjecture.shrinker import Shrinker, block_program
 from hypothesis.internal.conjecture.shrinking import Float
 from hypothesis.internal.conjecture.utils import Sampler, calc_label_from_name
+from hypothesis.internal.conjecture.workers import WorkerResult
 from hypothesis.internal.entropy import deterministic_PRNG
 from tests.common.strategies import SLOW, HardToShrink
 from tests.common.utils import no_shrink
@@ -258,6 +271,22 @@ def test_stops_after_max_examples_when_reading():
     assert len(seen) == 1
 
 
+def test_run_flushes_the_database(tmpdir):
+    path = str(tmpdir.join("examples.sqlite3"))
+
+    def f(data):
+        if data.draw_bits(8) >= 10:
+            data.mark_interesting()
+
+    runner = ConjectureRunner(
+        f,
+        settings=settings(TEST_SETTINGS, database=SQLiteExampleDatabase(path)),
+        database_key=b"key",
+    )
+    runner.run()
+    assert list(SQLiteExampleDatabase(path).fetch(b"key")) == [hbytes([10])]
+
+
 def test_stops_after_max_examples_when_generating():
     seen = []
 
@@ -368,7 +397,7 @@ def test_fully_exhaust_base(monkeypatch):
     for c in hrange(4):
         runner.cached_test_function([0, c])
 
-    assert 1 in runner.tree.dead
+    assert runner.tree.is_dead(1)
 
     runner.run()
 
@@ -877,8 +906,8 @@ def test_exhaustive_enumeration(prefix, bits, seed):
             assert data.status == Status.VALID
             node = 0
             for b in data.buffer:
-                node = runner.tree.nodes[node][b]
-            assert node in runner.tree.dead
+                node = runner.tree.child(node, b)
+            assert runner.tree.is_dead(node)
     assert len(seen) == size
 
 
@@ -1493,6 +1522,135 @@ def test_target_selector_will_eventually_reuse_examples():
         assert x.global_identifier in seen
 
 
+def test_target_selector_prefers_fresh_covering_examples():
+    selector = TargetSelector(random=Random(0), pool_size=3)
+    for _ in range(3):
+        selector.add(FakeData())
+    covering = FakeData()
+    selector.add_covering(covering)
+    assert selector.select() is covering
+
+
+def test_target_selector_keeps_a_bounded_covering_pool():
+    selector = TargetSelector(random=Random(0), pool_size=3)
+    for _ in range(10):
+        selector.add_covering(FakeData())
+    assert len(selector.fresh_covering) + len(selector.used_covering) == 3
+
+
+def test_target_selector_mixes_covering_and_ordinary_examples():
+    selector = TargetSelector(random=Random(0), pool_size=3)
+    ordinary = FakeData()
+    covering = FakeData()
+    selector.add(ordinary)
+    selector.add_covering(covering)
+    selected = {selector.select().global_identifier for _ in range(50)}
+    assert selected == {ordinary.global_identifier, covering.global_identifier}
+
+
+def test_mutation_scheduler_starts_from_prior_weights():
+    scheduler = MutationScheduler(Random(0))
+    weights = scheduler.weights
+    assert list(weights) == [name for name, _ in MUTATION_OPERATORS]
+    assert weights["draw_zero"] == 2 * weights["draw_new"]
+    assert abs(sum(weights.values()) - 1) < 1e-9
+
+
+def test_mutation_scheduler_learns_from_successes():
+    scheduler = MutationScheduler(Random(0))
+    for _ in range(100):
+        scheduler.record(["draw_max", "flip_bit"], success=False)
+        scheduler.record(["draw_max", "draw_new"], success=True)
+    weights = scheduler.weights
+    assert weights["draw_new"] > weights["flip_bit"]
+    assert weights["draw_max"] > weights["flip_bit"]
+    assert scheduler.trials["draw_max"] == 200
+    assert scheduler.successes["draw_max"] == 100
+
+
+def test_mutation_scheduler_counts_repeated_operators_once():
+    scheduler = MutationScheduler(Random(0))
+    scheduler.record(["draw_new", "draw_new"], success=True)
+    assert scheduler.trials["draw_new"] == 1
+
+
+def test_mutation_scheduler_chooses_in_proportion_to_weights():
+    scheduler = MutationScheduler(Random(0), operators=[("a", 1), ("b", 1)])
+    for _ in range(50):
+        scheduler.record(["a"], success=True)
+        scheduler.record(["b"], success=False)
+    chosen = Counter(scheduler.choose() for _ in range(1000))
+    assert chosen["a"] > 10 * chosen["b"] > 0
+
+
+def test_generation_trains_the_mutation_scheduler():
+    def f(data):
+        data.draw_bytes(4)
+
+    runner = ConjectureRunner(f, settings=settings(max_examples=300, database=None))
+    runner.run()
+    scheduler = runner.mutation_scheduler
+    assert sum(scheduler.trials.values()) > 0
+    assert set(scheduler.trials) <= set(scheduler.priors)
+
+
+SPLICE_A = calc_label_from_name("splice a")
+SPLICE_B = calc_label_from_name("splice b")
+
+
+def two_labelled_examples(data):
+    data.start_example(SPLICE_A)
+    data.draw_bytes(2)
+    data.stop_example()
+    data.start_example(SPLICE_B)
+    data.draw_bytes(1)
+    data.stop_example()
+
+
+def run_for_splice(f, buffer):
+    data = ConjectureData.for_buffer(hbytes(buffer))
+    f(data)
+    data.freeze()
+    return data
+
+
+def test_splice_swaps_examples_with_the_same_label():
+    runner = ConjectureRunner(two_labelled_examples)
+    origin = run_for_splice(two_labelled_examples, [1, 2, 3])
+    donor = run_for_splice(two_labelled_examples, [4, 5, 6])
+    results = {runner.splice(origin, donor) for _ in range(20)}
+    assert results == {hbytes([4, 5, 3]), hbytes([1, 2, 6])}
+
+
+def test_splice_needs_a_label_in_common():
+    def other(data):
+        data.start_example(calc_label_from_name("something else"))
+        data.draw_bytes(3)
+        data.stop_example()
+
+    runner = ConjectureRunner(two_labelled_examples)
+    origin = run_for_splice(two_labelled_examples, [1, 2, 3])
+    donor = run_for_splice(other, [4, 5, 6])
+    assert runner.splice(origin, donor) is None
+
+
+def test_splice_ignores_worker_results():
+    runner = ConjectureRunner(two_labelled_examples)
+    origin = run_for_splice(two_labelled_examples, [1, 2, 3])
+    donor = WorkerResult(status=Status.VALID, buffer=hbytes([4, 5, 6]))
+    assert runner.splice(origin, donor) is None
+
+
+def test_generation_uses_splicing():
+    def f(data):
+        for _ in range(3):
+            two_labelled_examples(data)
+
+    runner = ConjectureRunner(f, settings=settings(max_examples=300, database=None))
+    runner.run()
+    assert runner.mutation_scheduler.trials["splice"] > 0
+
+
 def test_cached_test_function_does_not_reinvoke_on_prefix():
     call_count = [0]
 
@@ -1513,6 +1671,45 @@ def test_cached_test_function_does_not_reinvoke_on_prefix():
         assert call_count[0] == 1
 
 
+def test_cached_test_function_counts_hits_and_misses():
+    call_count = [0]
+
+    def test_function(data):
+        call_count[0] += 1
+        data.draw_bits(4)
+        data.draw_bits(8)
+
+    runner = ConjectureRunner(test_function, settings=TEST_SETTINGS)
+
+    runner.cached_test_function(hbytes([1, 2]))
+    assert (runner.cache_hits, runner.cache_misses) == (0, 1)
+
+    # These are all the same test case once the tree has canonicalised
+    # them, or a prefix of it.
+    for buffer in ([1, 2], [17, 2], [1, 2, 3], [1]):
+        runner.cached_test_function(hbytes(buffer))
+    assert (runner.cache_hits, runner.cache_misses) == (4, 1)
+    assert call_count[0] == 1
+
+    runner.cached_test_function(hbytes([2, 2]))
+    assert (runner.cache_hits, runner.cache_misses) == (4, 2)
+    assert call_count[0] == 2
+
+
+def test_cached_test_function_does_not_rerun_test_that_reads_nothing():
+    call_count = [0]
+
+    def test_function(data):
+        call_count[0] += 1
+
+    runner = ConjectureRunner(test_function, settings=TEST_SETTINGS)
+    with pytest.raises(RunIsComplete):
+        runner.cached_test_function(hbytes(1))
+    for n in range(1, 4):
+        assert runner.cached_test_function(hbytes(n)).status == Status.VALID
+    assert call_count[0] == 1
+
+
 def test_float_shrink_can_run_when_canonicalisation_does_not_work(monkeypatch):
     # This should be an error when called
     monkeypatch.setattr(Float, "shrink", None)
@@ -1604,3 +1801,137 @@ def test_zero_examples_does_not_try_to_adapt_across_different_sizes():
     # single-bit block. Did not try to expand regions into the trivial two-byte
     # blocks on each side.
     assert shrinker.calls == initial + 12
+
+
+def run_with_explored_tree(db, f, label=1, **kwargs):
+    runner = ConjectureRunner(
+        f,
+        settings=settings(TEST_SETTINGS, database=db, **kwargs),
+        database_key=b"key",
+        random=Random(0),
+        strategy_label=label,
+    )
+    runner.run()
+    return runner
+
+
+def test_later_runs_explore_new_parts_of_the_search_space():
+    db = InMemoryExampleDatabase()
+    runs = []
+
+    def f(data):
+        runs[-1].add(data.draw_bits(6))
+
+    for _ in hrange(2):
+        runs.append(set())
+        run_with_explored_tree(db, f, max_examples=20)
+    first, second = runs
+    assert len(first) >= 20
+    assert len(second - first) >= 2 * len(second & first)
+
+
+def test_starts_again_once_everything_has_been_explored():
+    db = InMemoryExampleDatabase()
+    seen = []
+
+    def f(data):
+        seen.append(data.draw_bits(2))
+
+    for _ in hrange(2):
+        del seen[:]
+        runner = run_with_explored_tree(db, f)
+        assert runner.exit_reason == ExitReason.finished
+        assert sorted(seen) == [0, 1, 2, 3]
+        assert not list(db.fetch(runner.explored_tree_key))
+
+
+def test_ignores_trees_explored_with_a_different_strategy():
+    db = InMemoryExampleDatabase()
+
+    def f(data):
+        data.draw_bits(6)
+
+    runner = run_with_explored_tree(db, f, max_examples=20)
+    assert len(list(db.fetch(runner.explored_tree_key))) == 1
+
+    for label, explored in [(1, True), (2, False)]:
+        runner = ConjectureRunner(
+            f,
+            settings=settings(TEST_SETTINGS, database=db),
+            database_key=b"key",
+            strategy_label=label,
+        )
+        runner.load_explored_tree()
+        assert (len(runner.explored_tree) > 1) == explored
+
+
+def test_does_not_save_trees_that_are_too_large(monkeypatch):
+    monkeypatch.setattr(engine_module, "MAX_EXPLORED_TREE_SIZE", 10)
+    db = InMemoryExampleDatabase()
+
+    def f(data):
+        data.draw_bits(6)
+
+    runner = run_with_explored_tree(db, f, max_examples=20)
+    assert runner.explored_tree is None
+    assert not list(db.fetch(runner.explored_tree_key))
+
+
+def sum_at_least_100(data):
+    if sum(data.draw_bytes(10)) >= 100:
+        data.mark_interesting()
+
+
+def run_with_database(db, f):
+    runner = ConjectureRunner(
+        f,
+        settings=settings(TEST_SETTINGS, database=db),
+        database_key=b"key",
+        random=Random(0),
+    )
+    runner.run()
+    return runner
+
+
+def test_does_not_shrink_examples_that_were_fully_shrunk_last_time():
+    db = InMemoryExampleDatabase()
+    first = run_with_database(db, sum_at_least_100)
+    assert first.call_count > 1
+    assert len(list(db.fetch(first.shrunk_key))) == 1
+
+    second = run_with_database(db, sum_at_least_100)
+    assert not second.shrink_pass_stats
+    assert (
+        second.interesting_examples[None].buffer
+        == first.interesting_examples[None].buffer
+    )
+
+
+def test_shrinks_examples_again_with_a_different_version(monkeypatch):
+    db = InMemoryExampleDatabase()
+    runner = run_with_database(db, sum_at_least_100)
+    saved = list(db.fetch(runner.shrunk_key))
+
+    monkeypatch.setattr(engine_module, "__version__", "0.0.0")
+    runner = run_with_database(db, sum_at_least_100)
+    assert runner.shrink_pass_stats
+    assert len(list(db.fetch(runner.shrunk_key))) == 1
+    assert list(db.fetch(runner.shrunk_key)) != saved
+
+
+def test_clears_the_shrunk_records_once_the_test_passes():
+    db = InMemoryExampleDatabase()
+    runner = run_with_database(db, sum_at_least_100)
+    assert list(db.fetch(runner.shrunk_key))
+
+    runner = run_with_database(db, lambda data: data.draw_bytes(10))
+    assert not runner.interesting_examples
+    assert not list(db.fetch(runner.shrunk_key))
+
+
+def test_does_not_record_examples_that_were_not_fully_shrunk(monkeypatch):
+    monkeypatch.setattr(engine_module, "MAX_SHRINKS", 1)
+    db = InMemoryExampleDatabase()
+    runner = run_with_database(db, sum_at_least_100)
+    assert runner.exit_reason == ExitReason.max_shrinks
+    assert not list(db.fetch(runner.shrunk_key))
@@ -17,6 +17,8 @@
 
 from __future__ import absolute_import, division, print_function
 
+import pickle
+
 import pytest
 
 from hypothesis import given, strategies as st
@@ -182,3 +184,78 @@ def test_can_write_empty_string():
     d.draw_bits(0, forced=0)
     d.draw_bits(1)
     assert d.buffer == hbytes([1, 1, 1])
+
+
+@given(st.binary(min_size=1), st.lists(st.integers(1, 24), min_size=1))
+def test_replaying_a_buffer_draws_the_same_as_generating_from_it(buf, sizes):
+    def draw_bytes(data, n):
+        return hbytes(buf[data.index : data.index + n])
+
+    replay = ConjectureData.for_buffer(buf)
+    generate = ConjectureData(max_length=len(buf), draw_bytes=draw_bytes)
+    for d in (replay, generate):
+        try:
+            d.values = [d.draw_bits(n) for n in sizes]
+        except StopTest:
+            d.values = None
+        d.freeze()
+    assert replay.values == generate.values
+    assert replay.buffer == generate.buffer
+    assert replay.masked_indices == generate.masked_indices
+    assert list(replay.blocks) == list(generate.blocks)
+
+
+def test_replay_masks_the_buffer_it_records():
+    d = ConjectureData.for_buffer(hbytes([255, 255, 7]))
+    assert d.draw_bits(4) == 15
+    assert d.draw_bits(9) == 263
+    d.freeze()
+    assert d.buffer == hbytes([15, 1, 7])
+    assert d.masked_indices == {0: 15, 1: 1}
+
+
+def test_examples_know_their_children_and_parents():
+    d = ConjectureData.for_buffer(hbytes([1, 0, 2]))
+    d.start_example(1)
+    d.draw_bits(8)
+    d.draw_bits(8)
+    d.stop_example()
+    d.draw_bits(8)
+    d.freeze()
+    top, ex = d.examples[0], d.examples[1]
+    assert top.parent is None
+    assert [c.index for c in top.children] == [1, 4]
+    assert [(c.start, c.end, c.parent) for c in ex.children] == [(0, 1, 1), (1, 2, 1)]
+    assert d.examples[-1].start == 2
+    assert [e.index for e in d.examples[1:3]] == [1, 2]
+    with pytest.raises(IndexError):
+        d.examples[len(d.examples)]
+
+
+def test_blocks_are_views_onto_the_result():
+    d = ConjectureData.for_buffer(hbytes([1, 0, 2]))
+    d.draw_bits(8)
+    d.write(hbytes([5]))
+    d.draw_bits(8)
+    d.freeze()
+    assert len(d.blocks) == 3
+    assert [b.trivial for b in d.blocks] == [False, True, False]
+    assert [b.forced for b in d.blocks] == [False, True, False]
+    assert d.blocks[-1].bounds == (2, 3)
+    assert d.blocks[-1] == d.blocks[2]
+    assert d.blocks[0] != d.blocks[1]
+    assert len({d.blocks[2], d.blocks[2]}) == 1
+    with pytest.raises(IndexError):
+        d.blocks[3]
+
+
+def test_results_with_examples_can_be_pickled():
+    d = ConjectureData.for_buffer(hbytes([1, 2]))
+    d.draw_bits(8)
+    d.draw_bits(8)
+    d.freeze()
+    result = d.as_result()
+    examples = [(e.start, e.end, e.label) for e in result.examples]
+    copy = pickle.loads(pickle.dumps(result, protocol=2))
+    assert [(e.start, e.end, e.label) for e in copy.examples] == examples
+    assert list(copy.blocks) == list(result.blocks)
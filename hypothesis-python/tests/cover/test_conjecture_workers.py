@@ -0,0 +1,292 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import absolute_import, division, print_function
+
+import os
+from random import Random
+
+import pytest
+
+from hypothesis import HealthCheck, Phase, settings
+from hypothesis.database import InMemoryExampleDatabase
+from hypothesis.errors import WorkerProcessError
+from hypothesis.internal.compat import hbytes, hrange
+from hypothesis.internal.conjecture.data import Status
+from hypothesis.internal.conjecture.engine import ConjectureRunner, ExitReason
+from hypothesis.internal.conjecture.workers import (
+    ReplayTask,
+    WorkerResult,
+    WorkerTask,
+    can_fork,
+)
+
+pytestmark = pytest.mark.skipif(not can_fork(), reason="requires fork")
+
+TEST_SETTINGS = settings(
+    max_examples=100,
+    buffer_size=1024,
+    database=None,
+    suppress_health_check=HealthCheck.all(),
+)
+
+
+def test_parallel_generation_finds_interesting_examples():
+    def f(data):
+        if data.draw_bits(8) >= 100:
+            data.mark_interesting()
+
+    runner = ConjectureRunner(f, settings=TEST_SETTINGS, random=Random(0), workers=2)
+    runner.run()
+    data, = runner.interesting_examples.values()
+    assert data.buffer == hbytes([100])
+
+
+def test_parallel_generation_respects_max_examples():
+    def f(data):
+        data.draw_bytes(4)
+
+    runner = ConjectureRunner(f, settings=TEST_SETTINGS, random=Random(0), workers=3)
+    runner.run()
+    assert runner.exit_reason == ExitReason.max_examples
+    assert runner.valid_examples == TEST_SETTINGS.max_examples
+    assert not runner.interesting_examples
+
+
+def test_parallel_generation_can_exhaust_the_tree():
+    def f(data):
+        data.draw_bits(3)
+
+    runner = ConjectureRunner(f, settings=TEST_SETTINGS, random=Random(0), workers=2)
+    runner.run()
+    assert runner.exit_reason == ExitReason.finished
+    assert runner.tree.is_exhausted
+    assert runner.valid_examples == 8
+
+
+def test_errors_in_workers_are_reraised_in_the_coordinator():
+    def f(data):
+        if data.draw_bits(8) >= 10:
+            raise ValueError()
+
+    runner = ConjectureRunner(f, settings=TEST_SETTINGS, random=Random(0), workers=2)
+    with pytest.raises(ValueError):
+        runner.run()
+
+
+def test_a_dying_worker_is_reported_as_an_error():
+    coordinator = os.getpid()
+
+    def f(data):
+        if data.draw_bits(8) >= 100 and os.getpid() != coordinator:
+            os._exit(1)
+
+    runner = ConjectureRunner(f, settings=TEST_SETTINGS, random=Random(0), workers=2)
+    with pytest.raises(WorkerProcessError):
+        runner.run()
+
+
+def test_interesting_examples_from_workers_are_saved():
+    db = InMemoryExampleDatabase()
+
+    def f(data):
+        if data.draw_bits(8) >= 100:
+            data.mark_interesting()
+
+    runner = ConjectureRunner(
+        f,
+        settings=settings(TEST_SETTINGS, database=db),
+        database_key=b"stuff",
+        random=Random(0),
+        workers=2,
+    )
+    runner.run()
+    assert list(db.fetch(b"stuff")) == [hbytes([100])]
+
+
+def test_run_worker_task_generates_from_prefix():
+    def f(data):
+        data.draw_bytes(2)
+        data.note_event("hi")
+
+    runner = ConjectureRunner(f, settings=TEST_SETTINGS)
+    result = runner.run_worker_task(WorkerTask(prefix=hbytes([7]), seed=0))
+    assert result.status == Status.VALID
+    assert result.buffer[:1] == hbytes([7])
+    assert result.events == frozenset(["hi"])
+    assert [b.bounds for b in result.blocks] == [(0, 2)]
+
+
+def test_run_worker_task_can_mutate_an_origin():
+    def f(data):
+        data.draw_bytes(2)
+
+    runner = ConjectureRunner(f, settings=TEST_SETTINGS)
+    origin = runner.run_worker_task(WorkerTask(prefix=hbytes([1]), seed=0))
+    result = runner.run_worker_task(
+        WorkerTask(prefix=hbytes([2]), seed=1, origin=origin)
+    )
+    assert result.status == Status.VALID
+    assert result.buffer[:1] == hbytes([2])
+
+
+def test_run_worker_task_reports_errors_with_no_status():
+    def f(data):
+        data.draw_bytes(1)
+        raise ValueError()
+
+    runner = ConjectureRunner(f, settings=TEST_SETTINGS)
+    result = runner.run_worker_task(WorkerTask(prefix=hbytes([3]), seed=0))
+    assert result == WorkerResult(status=None, buffer=hbytes([3]))
+
+
+def test_falls_back_to_a_single_process_without_fork(monkeypatch):
+    monkeypatch.setattr("hypothesis.internal.conjecture.engine.can_fork", lambda: False)
+    runner = ConjectureRunner(lambda data: None, settings=TEST_SETTINGS, workers=4)
+    assert runner.workers == 1
+
+
+def test_parallel_shrinking_finds_the_minimal_example():
+    def f(data):
+        if any(b >= 10 for b in data.draw_bytes(10)):
+            data.mark_interesting()
+
+    for workers in (1, 3):
+        runner = ConjectureRunner(
+            f, settings=TEST_SETTINGS, random=Random(0), workers=workers
+        )
+        runner.run()
+        data, = runner.interesting_examples.values()
+        assert data.buffer == hbytes(9) + hbytes([10])
+
+
+def test_parallel_shrinking_runs_test_cases_in_workers():
+    parent = os.getpid()
+    calls_in_parent = [0]
+
+    def f(data):
+        if os.getpid() == parent:
+            calls_in_parent[0] += 1
+        n = data.draw_bits(8)
+        for _ in hrange(n):
+            data.draw_bits(8)
+        if n >= 10:
+            data.mark_interesting()
+
+    runner = ConjectureRunner(
+        f,
+        settings=settings(TEST_SETTINGS, phases=[Phase.shrink]),
+        random=Random(0),
+        workers=2,
+    )
+    runner.cached_test_function(hbytes([100]) + hbytes(range(100)))
+    assert runner.interesting_examples
+    runner.run()
+    data, = runner.interesting_examples.values()
+    assert data.buffer == hbytes([10]) + hbytes(10)
+    assert runner.call_count > calls_in_parent[0]
+
+
+def test_run_speculatively_does_nothing_without_workers():
+    runner = ConjectureRunner(lambda data: None, settings=TEST_SETTINGS)
+    assert runner.run_speculatively([hbytes(1)]) == []
+    assert runner.call_count == 0
+
+
+def replay_test_function(data):
+    data.note_event("replayed")
+    n = data.draw_bits(8)
+    if n == 1:
+        raise ValueError()
+    if n == 2:
+        data.mark_interesting()
+    data.draw_bits(8)
+
+
+@pytest.mark.parametrize(
+    "buffer,status,cached",
+    [
+        ([0, 0], Status.VALID, True),
+        ([1], None, False),
+        ([2], Status.INTERESTING, False),
+        ([0], Status.OVERRUN, False),
+    ],
+)
+def test_run_worker_task_can_replay_a_buffer(buffer, status, cached):
+    runner = ConjectureRunner(replay_test_function, settings=TEST_SETTINGS)
+    result = runner.run_worker_task(ReplayTask(hbytes(buffer)))
+    assert result.status == status
+    assert (result.result is not None) == cached
+
+
+def test_run_speculatively_only_records_uninteresting_results():
+    runner = ConjectureRunner(
+        replay_test_function, settings=TEST_SETTINGS, random=Random(0), workers=2
+    )
+    try:
+        interesting = runner.run_speculatively(
+            [[0, 0], [0, 0], [1], [2], [3, 0], [3]]
+        )
+    finally:
+        runner._ConjectureRunner__speculation_pool.close()
+    assert interesting == [hbytes([2])]
+    # By the time we look at [3] we already know from [3, 0] that it
+    # overruns, so we don't count it.
+    assert runner.call_count == 2
+    assert runner.cached_test_function([0, 0]).status == Status.VALID
+    assert runner.call_count == 2
+    assert not runner.interesting_examples
+
+
+def test_incorporate_worker_result_drops_duplicates():
+    runner = ConjectureRunner(replay_test_function, settings=TEST_SETTINGS)
+    result = runner.run_worker_task(ReplayTask(hbytes([0, 0])))
+    runner.incorporate_worker_result(result)
+    runner.incorporate_worker_result(result)
+    assert runner.call_count == 1
+    assert runner.valid_examples == 1
+    assert runner.event_call_counts["replayed"] == 1
+
+
+def test_incorporate_worker_result_counts_overruns():
+    runner = ConjectureRunner(replay_test_function, settings=TEST_SETTINGS)
+    result = runner.run_worker_task(ReplayTask(hbytes([0])))
+    runner.incorporate_worker_result(result)
+    assert runner.call_count == 1
+    assert runner.tree.rewrite(hbytes([0]))[1] == Status.OVERRUN
+
+
+def test_speculation_incorporates_interesting_results():
+    def f(data):
+        data.draw_bits(8)
+        data.draw_bits(8)
+        data.mark_interesting()
+
+    runner = ConjectureRunner(f, settings=TEST_SETTINGS, random=Random(0), workers=2)
+    runner.cached_test_function(hbytes([5, 5]))
+    data, = runner.interesting_examples.values()
+    # Both of the buffers we speculate on are interesting, but only the
+    # larger one satisfies the shrinker.
+    shrinker = runner.new_shrinker(
+        data, lambda d: d.status == Status.INTERESTING and d.buffer[0] == 5
+    )
+    sp = shrinker.shrink_pass("minimize_individual_blocks")
+    try:
+        shrinker.speculate([(sp, 0), (sp, 1)])
+    finally:
+        runner._ConjectureRunner__speculation_pool.close()
+    assert shrinker.buffer == hbytes([5, 0])
@@ -18,15 +18,24 @@
 from __future__ import absolute_import, division, print_function
 
 import os
+import struct
+import threading
+import zlib
 
 import pytest
 
+import hypothesis.database as database_module
 from hypothesis import given, settings
 from hypothesis.database import (
     DirectoryBasedExampleDatabase,
     ExampleDatabase,
     InMemoryExampleDatabase,
+    PackedExampleDatabase,
+    SQLiteExampleDatabase,
 )
+from hypothesis.errors import InvalidArgument
+from hypothesis.internal.compat import hbytes
+from hypothesis.internal.conjecture.engine import ConjectureRunner
 from hypothesis.strategies import binary, lists, tuples
 
 small_settings = settings(max_examples=50)
@@ -71,17 +80,28 @@ def test_selects_directory_based_if_already_directory(tmpdir):
     assert isinstance(ExampleDatabase(path), DirectoryBasedExampleDatabase)
 
 
+def test_selects_sqlite_for_sqlite_files(tmpdir):
+    path = str(tmpdir.join("examples.sqlite3"))
+    assert isinstance(ExampleDatabase(path), SQLiteExampleDatabase)
+
+
 def test_does_not_error_when_fetching_when_not_exist(tmpdir):
     db = DirectoryBasedExampleDatabase(tmpdir.join("examples"))
     db.fetch(b"foo")
 
 
-@pytest.fixture(scope="function", params=["memory", "directory"])
+@pytest.fixture(
+    scope="function", params=["memory", "directory", "sqlite", "packed"]
+)
 def exampledatabase(request, tmpdir):
     if request.param == "memory":
         return ExampleDatabase()
     if request.param == "directory":
         return DirectoryBasedExampleDatabase(str(tmpdir.join("examples")))
+    if request.param == "sqlite":
+        return SQLiteExampleDatabase(str(tmpdir.join("examples.sqlite3")))
+    if request.param == "packed":
+        return PackedExampleDatabase(str(tmpdir.join("examples")))
     assert False
 
 
@@ -142,3 +162,271 @@ def test_can_handle_disappearing_files(tmpdir, monkeypatch):
         os, "listdir", lambda d: base_listdir(d) + ["this-does-not-exist"]
     )
     assert list(db.fetch(b"foo")) == [b"bar"]
+
+
+def test_sqlite_database_batches_writes_until_flushed(tmpdir):
+    path = str(tmpdir.join("examples.sqlite3"))
+    db1 = SQLiteExampleDatabase(path)
+    db2 = SQLiteExampleDatabase(path)
+    db1.save(b"foo", b"bar")
+    db1.save(b"foo", b"baz")
+    db1.delete(b"foo", b"baz")
+    assert list(db1.fetch(b"foo")) == [b"bar"]
+    assert list(db2.fetch(b"foo")) == []
+    db1.flush()
+    assert list(db2.fetch(b"foo")) == [b"bar"]
+    db2.delete(b"foo", b"bar")
+    assert list(db2.fetch(b"foo")) == []
+    assert list(db1.fetch(b"foo")) == [b"bar"]
+    db2.close()
+    assert list(db1.fetch(b"foo")) == []
+    db1.close()
+
+
+def test_sqlite_database_flushes_when_batch_is_full(tmpdir):
+    path = str(tmpdir.join("examples.sqlite3"))
+    db1 = SQLiteExampleDatabase(path, batch_size=3)
+    db2 = SQLiteExampleDatabase(path)
+    db1.save(b"foo", b"a")
+    db1.save(b"foo", b"b")
+    assert list(db2.fetch(b"foo")) == []
+    db1.save(b"foo", b"c")
+    assert sorted(db2.fetch(b"foo")) == [b"a", b"b", b"c"]
+
+
+@pytest.mark.parametrize("journal_mode", ["DELETE", "WAL"])
+def test_sqlite_database_uses_the_given_journal_mode(tmpdir, journal_mode):
+    path = str(tmpdir.join("examples.sqlite3"))
+    db = SQLiteExampleDatabase(path, journal_mode=journal_mode)
+    db.save(b"foo", b"bar")
+    db.close()
+    import sqlite3
+
+    connection = sqlite3.connect(path)
+    try:
+        (mode,) = connection.execute("PRAGMA journal_mode").fetchone()
+    finally:
+        connection.close()
+    assert mode.upper() == journal_mode
+
+
+def test_sqlite_database_rejects_unknown_journal_modes(tmpdir):
+    with pytest.raises(InvalidArgument):
+        SQLiteExampleDatabase(str(tmpdir.join("examples.sqlite3")), journal_mode="OFF")
+
+
+def test_sqlite_database_saves_failures_before_shrinking(tmpdir):
+    path = str(tmpdir.join("examples.sqlite3"))
+    flushes = []
+    saved_while_shrinking = []
+
+    class CountingDatabase(SQLiteExampleDatabase):
+        def flush(self):
+            flushes.append(None)
+            super(CountingDatabase, self).flush()
+
+    def f(data):
+        if sum(data.draw_bytes(10)) >= 100:
+            if runner.interesting_examples and not saved_while_shrinking:
+                saved_while_shrinking.extend(SQLiteExampleDatabase(path).fetch(b"key"))
+            data.mark_interesting()
+
+    runner = ConjectureRunner(
+        f,
+        settings=settings(database=CountingDatabase(path)),
+        database_key=b"key",
+    )
+    runner.run()
+    assert saved_while_shrinking
+    # Each successful shrink saves a buffer, but we only flush before
+    # shrinking and at the end of the run.
+    assert runner.shrinks > 2
+    assert len(flushes) == 2
+
+
+def test_sqlite_database_can_import_a_directory_database(tmpdir):
+    directory = DirectoryBasedExampleDatabase(str(tmpdir.join("examples")))
+    directory.save(b"foo", b"bar")
+    directory.save(b"foo", b"baz")
+    directory.save(b"bar", b"")
+    db = SQLiteExampleDatabase(str(tmpdir.join("examples.sqlite3")))
+    db.save(b"foo", b"bar")
+    assert db.import_directory(str(tmpdir.join("examples"))) == 3
+    assert sorted(db.fetch(b"foo")) == [b"bar", b"baz"]
+    assert list(db.fetch(b"bar")) == [b""]
+    assert sorted(directory.fetch(b"foo")) == [b"bar", b"baz"]
+
+
+def test_can_merge_directory_databases(tmpdir):
+    source = DirectoryBasedExampleDatabase(str(tmpdir.join("source")))
+    source.save(b"foo", b"bar")
+    source.save(b"foo", b"baz")
+    db = DirectoryBasedExampleDatabase(str(tmpdir.join("target")))
+    db.save(b"foo", b"bar")
+    db.save(b"bar", b"")
+    assert db.import_directory(source.path) == 1
+    assert db.import_directory(source.path) == 0
+    assert sorted(db.fetch(b"foo")) == [b"bar", b"baz"]
+    assert list(db.fetch(b"bar")) == [b""]
+    assert sorted(source.fetch(b"foo")) == [b"bar", b"baz"]
+
+
+def test_bulk_operations_agree_with_single_ones(exampledatabase):
+    exampledatabase.save_many([(b"a", b"1"), (b"a", b"2"), (b"b", b"3")])
+    exampledatabase.delete_many([(b"a", b"2"), (b"c", b"4")])
+    result = exampledatabase.fetch_many([b"a", b"b", b"c", b"a"])
+    assert {k: sorted(v) for k, v in result.items()} == {
+        b"a": [b"1"],
+        b"b": [b"3"],
+        b"c": [],
+    }
+    assert list(exampledatabase.fetch(b"a")) == [b"1"]
+
+
+def test_prefetching_does_not_change_results(exampledatabase):
+    exampledatabase.save(b"a", b"1")
+    exampledatabase.prefetch([b"a", b"b"])
+    exampledatabase.save(b"b", b"2")
+    assert list(exampledatabase.fetch(b"a")) == [b"1"]
+    assert list(exampledatabase.fetch(b"b")) == [b"2"]
+
+
+def wait_for_prefetch(db):
+    db._DirectoryBasedExampleDatabase__queue.join()
+
+
+def test_directory_database_serves_fetch_from_prefetch(tmpdir, monkeypatch):
+    db = DirectoryBasedExampleDatabase(str(tmpdir))
+    db.save(b"foo", b"bar")
+    db.prefetch([b"foo"])
+    wait_for_prefetch(db)
+    with monkeypatch.context() as m:
+        m.setattr(os, "listdir", None)
+        assert list(db.fetch(b"foo")) == [b"bar"]
+    # The prefetched values are only used once.
+    db.save(b"foo", b"baz")
+    assert sorted(db.fetch(b"foo")) == [b"bar", b"baz"]
+
+
+def test_directory_database_prefetches_with_one_worker(tmpdir):
+    db = DirectoryBasedExampleDatabase(str(tmpdir))
+    threads = threading.active_count()
+    for _ in range(10):
+        db.prefetch([b"foo", b"bar"])
+    wait_for_prefetch(db)
+    assert threading.active_count() <= threads + 1
+
+
+def test_directory_database_drops_prefetched_values_when_their_key_changes(
+    tmpdir
+):
+    db = DirectoryBasedExampleDatabase(str(tmpdir))
+    db.save(b"foo", b"bar")
+    db.prefetch([b"foo"])
+    wait_for_prefetch(db)
+    db.delete(b"foo", b"bar")
+    assert not db._DirectoryBasedExampleDatabase__prefetched
+    assert list(db.fetch(b"foo")) == []
+
+
+def test_packed_database_compacts_its_segments(tmpdir):
+    db = PackedExampleDatabase(str(tmpdir), compact_threshold=4)
+    path = db._segment_path(b"foo")
+    for i in range(3):
+        db.save(b"foo", hbytes([i]) * 100)
+    db.save(b"foo", hbytes([0]) * 100)
+    db.delete(b"foo", hbytes([1]) * 100)
+    db.save(b"foo", hbytes([2]) * 100)
+    size = os.path.getsize(path)
+    expected = [hbytes([0]) * 100, hbytes([2]) * 100]
+    assert list(db.fetch(b"foo")) == expected
+    assert os.path.getsize(path) < size
+    assert list(db.fetch(b"foo")) == expected
+    db.save(b"foo", b"bar")
+    assert list(db.fetch(b"foo")) == expected + [b"bar"]
+
+
+def test_packed_database_only_records_deletes_of_saved_values(tmpdir):
+    db = PackedExampleDatabase(str(tmpdir))
+    db.delete(b"foo", b"bar")
+    assert not os.path.exists(db._segment_path(b"foo"))
+    db.save(b"foo", b"bar")
+    size = os.path.getsize(db._segment_path(b"foo"))
+    db.delete(b"foo", b"baz")
+    assert os.path.getsize(db._segment_path(b"foo")) == size
+    db.delete(b"foo", b"bar")
+    assert os.path.getsize(db._segment_path(b"foo")) > size
+    assert list(db.fetch(b"foo")) == []
+
+
+def test_packed_database_is_much_smaller_for_similar_values(tmpdir):
+    db = PackedExampleDatabase(str(tmpdir))
+    values = [hbytes([i]) + hbytes(1000) for i in range(100)]
+    for v in values:
+        db.save(b"foo", v)
+        db.delete(b"foo", v)
+        db.save(b"foo", v)
+    assert sorted(db.fetch(b"foo")) == values
+    assert os.path.getsize(db._segment_path(b"foo")) * 10 < sum(map(len, values))
+
+
+def test_packed_database_ignores_a_truncated_record(tmpdir):
+    db = PackedExampleDatabase(str(tmpdir))
+    db.save(b"foo", b"bar")
+    db.save(b"foo", b"baz")
+    path = db._segment_path(b"foo")
+    with open(path, "rb+") as f:
+        f.truncate(os.path.getsize(path) - 1)
+    assert list(db.fetch(b"foo")) == [b"bar"]
+
+
+@pytest.mark.parametrize("kind", [1, 3])
+def test_packed_database_skips_corrupted_records(tmpdir, kind):
+    db = PackedExampleDatabase(str(tmpdir))
+    db.save(b"foo", b"bar")
+    with open(db._segment_path(b"foo"), "ab") as o:
+        o.write(struct.pack(">BI", kind, 4) + b"\x78\x9c\0\0")
+    db.save(b"foo", b"baz")
+    assert list(db.fetch(b"foo")) == [b"bar", b"baz"]
+
+
+def test_packed_database_skips_a_corrupted_snapshot(tmpdir):
+    db = PackedExampleDatabase(str(tmpdir))
+    snapshot = zlib.compress(struct.pack(">I", 10) + b"bar")
+    with open(db._segment_path(b"foo"), "wb") as o:
+        o.write(struct.pack(">BI", 3, len(snapshot)) + snapshot)
+    db.save(b"foo", b"baz")
+    assert list(db.fetch(b"foo")) == [b"baz"]
+
+
+def test_packed_database_does_not_compact_a_partly_written_segment(tmpdir):
+    db = PackedExampleDatabase(str(tmpdir), compact_threshold=1)
+    db.save(b"foo", b"bar")
+    db.delete(b"foo", b"bar")
+    db.save(b"foo", b"baz")
+    path = db._segment_path(b"foo")
+    with open(path, "rb+") as f:
+        f.truncate(os.path.getsize(path) - 1)
+    size = os.path.getsize(path)
+    assert list(db.fetch(b"foo")) == []
+    assert os.path.getsize(path) == size
+
+
+@pytest.mark.skipif(database_module.fcntl is None, reason="requires fcntl")
+def test_packed_database_compaction_does_not_lose_concurrent_saves(tmpdir):
+    db = PackedExampleDatabase(str(tmpdir), compact_threshold=1)
+    values = [hbytes([i, j]) for i in range(4) for j in range(50)]
+
+    def save_and_delete(i):
+        for j in range(50):
+            db.save(b"foo", hbytes([i, j]))
+            db.save(b"foo", b"junk")
+            db.delete(b"foo", b"junk")
+            db.fetch(b"foo")
+
+    threads = [threading.Thread(target=save_and_delete, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(db.fetch(b"foo")) == values
@@ -0,0 +1,93 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import absolute_import, division, print_function
+
+import json
+
+import pytest
+
+from hypothesis import given, settings, strategies as st
+from hypothesis.statistics import aggregate_engine_profiles, collector
+
+
+def call_for_profile(test):
+    result = []
+    with collector.with_value(lambda stats: result.append(stats.engine_profile)):
+        try:
+            test()
+        except AssertionError:
+            pass
+    (profile,) = result
+    # It's all meant to end up as JSON, so make sure that works.
+    return json.loads(json.dumps(profile))
+
+
+def test_profile_records_phases_and_shrink_passes():
+    @settings(database=None)
+    @given(st.lists(st.integers()))
+    def test(xs):
+        assert sum(xs) < 100
+
+    profile = call_for_profile(test)
+    assert set(profile["phases"]) == {"reuse", "generate", "shrink"}
+    assert profile["shrink_passes"]
+    for stats in profile["shrink_passes"].values():
+        assert stats["runs"] > 0
+        assert stats["shrinks"] <= stats["calls"]
+    assert profile["cache"]["hits"] + profile["cache"]["misses"] > 0
+    assert profile["tree_size"] > 1
+    assert 0 <= profile["draw_time"] <= profile["test_time"]
+
+
+def test_profile_of_passing_test_has_no_shrink_passes():
+    @settings(database=None, max_examples=10)
+    @given(st.integers())
+    def test(x):
+        pass
+
+    profile = call_for_profile(test)
+    assert profile["calls"] >= 10
+    assert profile["shrink_passes"] == {}
+
+
+def test_profile_records_mutation_operators():
+    @settings(database=None, max_examples=200)
+    @given(st.lists(st.integers()))
+    def test(xs):
+        pass
+
+    profile = call_for_profile(test)
+    operators = profile["mutation_operators"]
+    assert operators
+    for stats in operators.values():
+        assert 0 <= stats["successes"] <= stats["trials"]
+
+
+def test_aggregating_profiles_adds_them_up():
+    a = {"calls": 1, "phases": {"generate": 1.0}, "shrink_passes": {}}
+    b = {"calls": 2, "phases": {"generate": 0.5, "shrink": 1.0}, "shrink_passes": {}}
+    assert aggregate_engine_profiles([a, b]) == {
+        "calls": 3,
+        "phases": {"generate": 1.5, "shrink": 1.0},
+        "shrink_passes": {},
+    }
+
+
+@pytest.mark.parametrize("profiles", [[], [{}]])
+def test_aggregating_no_profiles_is_empty(profiles):
+    assert aggregate_engine_profiles(profiles) == {}
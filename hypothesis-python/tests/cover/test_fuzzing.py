@@ -0,0 +1,301 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import absolute_import, division, print_function
+
+import sys
+import time
+
+import pytest
+
+import hypothesis.internal.conjecture.engine as engine
+from hypothesis import assume, given, settings, strategies as st
+from hypothesis.database import DirectoryBasedExampleDatabase, InMemoryExampleDatabase
+from hypothesis.errors import InvalidArgument
+from hypothesis.extra.fuzzing import main
+from hypothesis.internal.compat import hbytes, hrange
+from hypothesis.internal.conjecture.engine import (
+    ConjectureRunner,
+    ExitReason,
+    shard_of,
+)
+from hypothesis.internal.reflection import function_digest
+from hypothesis.statistics import Statistics
+from tests.common.utils import capture_out
+
+
+def test_fuzz_one_input_returns_the_buffer_used():
+    @given(st.integers(0, 255))
+    def test(n):
+        pass
+
+    assert test.hypothesis.fuzz_one_input(hbytes([1, 2, 3])) == hbytes([1])
+
+
+def test_fuzz_one_input_returns_none_for_invalid_buffers():
+    @given(st.integers(0, 255))
+    def test(n):
+        assume(n > 0)
+
+    assert test.hypothesis.fuzz_one_input(hbytes()) is None
+    assert test.hypothesis.fuzz_one_input(hbytes([0])) is None
+
+
+def test_fuzz_one_input_saves_failures_for_the_next_run():
+    db = InMemoryExampleDatabase()
+
+    @settings(database=db)
+    @given(st.integers(0, 255))
+    def test(n):
+        assert n != 10
+
+    with pytest.raises(AssertionError):
+        test.hypothesis.fuzz_one_input(hbytes([10, 0]))
+
+    assert list(db.fetch(function_digest(test.hypothesis.inner_test))) == [
+        hbytes([10])
+    ]
+
+
+def test_fuzz_one_input_reuses_its_target():
+    @given(st.none())
+    def test(x):
+        pass
+
+    assert test.hypothesis.fuzz_one_input is test.hypothesis.fuzz_one_input
+
+
+def test_fuzz_runs_until_max_calls():
+    calls = [0]
+
+    @settings(database=None, max_examples=10)
+    @given(st.binary())
+    def test(b):
+        calls[0] += 1
+
+    test.hypothesis.fuzz(max_calls=200)
+    assert calls[0] >= 200
+
+
+def test_fuzz_ignores_max_examples_of_zero():
+    calls = [0]
+
+    @settings(database=None, max_examples=0)
+    @given(st.binary())
+    def test(b):
+        calls[0] += 1
+
+    test.hypothesis.fuzz(max_calls=50)
+    assert calls[0] >= 50
+
+
+def test_fuzz_ignores_the_deadline():
+    @settings(database=None, deadline=10)
+    @given(st.integers(0, 10))
+    def test(n):
+        if n == 10:
+            time.sleep(0.05)
+
+    test.hypothesis.fuzz(max_calls=200)
+
+
+def test_fuzz_reports_failures_like_a_normal_run():
+    @settings(database=None)
+    @given(st.integers(0, 2 ** 16))
+    def test(n):
+        assert n < 1000
+
+    with capture_out() as out:
+        with pytest.raises(AssertionError):
+            test.hypothesis.fuzz()
+    assert "test(n=1000)" in out.getvalue()
+
+
+def test_fuzz_resumes_from_its_checkpoint():
+    db = InMemoryExampleDatabase()
+    key = b"key"
+
+    def f(data):
+        data.draw_bytes(2)
+
+    runner = ConjectureRunner(f, settings=settings(database=db), database_key=key)
+    runner.fuzz(max_calls=100, checkpoint_interval=10)
+    assert runner.exit_reason == ExitReason.max_calls
+    saved = set(db.fetch(runner.fuzz_key))
+    assert saved
+    assert saved == set(hbytes(d.buffer) for d in runner.target_selector.examples())
+
+    replayed = []
+
+    def g(data):
+        replayed.append(hbytes(data.draw_bytes(2)))
+
+    runner = ConjectureRunner(g, settings=settings(database=db), database_key=key)
+    runner.fuzz(max_calls=len(saved) + 1)
+    assert saved.issubset(replayed)
+
+
+def test_fuzz_replays_its_whole_checkpoint_before_counting_calls():
+    db = InMemoryExampleDatabase()
+    key = b"key"
+
+    def f(data):
+        data.draw_bytes(2)
+
+    runner = ConjectureRunner(f, settings=settings(database=db), database_key=key)
+    runner.fuzz(max_calls=100, checkpoint_interval=10)
+    saved = set(db.fetch(runner.fuzz_key))
+
+    runner = ConjectureRunner(f, settings=settings(database=db), database_key=key)
+    runner.fuzz(max_calls=0)
+    assert runner.exit_reason == ExitReason.max_calls
+    assert runner.call_count == len(saved)
+    assert set(db.fetch(runner.fuzz_key)) == saved
+
+
+def test_sharded_runs_only_generate_prefixes_from_their_shard():
+    runner = ConjectureRunner(
+        lambda data: data.draw_bytes(8), settings=settings(database=None)
+    )
+    runner.shard = (1, 3)
+    for _ in hrange(50):
+        assert shard_of(runner.generate_novel_prefix(), 3) == 1
+
+
+def test_sharded_runs_fall_back_to_other_shards_when_theirs_is_exhausted():
+    def f(data):
+        data.draw_bits(1)
+
+    runner = ConjectureRunner(f, settings=settings(database=None))
+    runner.fuzz(max_calls=100, shard=(0, 50))
+    assert runner.exit_reason == ExitReason.finished
+
+
+@pytest.mark.parametrize("shard", [(1, 1), (-1, 2), (0,), [0, 2], (0, 1.5)])
+def test_fuzz_validates_the_shard(shard):
+    @given(st.booleans())
+    def test(b):
+        pass
+
+    with pytest.raises(InvalidArgument):
+        test.hypothesis.fuzz(shard=shard)
+
+
+def test_normal_runs_ignore_the_fuzzing_checkpoint():
+    db = InMemoryExampleDatabase()
+    db.save(b"key.fuzz", hbytes([1] * 8))
+
+    seen = []
+
+    def f(data):
+        seen.append(hbytes(data.draw_bytes(8)))
+
+    runner = ConjectureRunner(
+        f, settings=settings(database=db, max_examples=1), database_key=b"key"
+    )
+    runner.run()
+    assert seen
+    assert hbytes([1] * 8) not in seen
+
+
+def test_fuzzing_bounds_the_size_of_the_tree(monkeypatch):
+    monkeypatch.setattr(engine, "FUZZ_MAX_TREE_SIZE", 50)
+
+    def f(data):
+        for _ in hrange(10):
+            data.draw_bytes(1)
+
+    runner = ConjectureRunner(f, settings=settings(database=None))
+    runner.fuzz(max_calls=200, checkpoint_interval=20)
+    assert len(runner.tree) <= 50 + 10
+    assert len(runner.all_runtimes) <= 20
+
+
+def test_statistics_report_the_max_calls():
+    runner = ConjectureRunner(
+        lambda data: data.draw_bytes(8), settings=settings(database=None)
+    )
+    runner.fuzz(max_calls=5)
+    assert runner.call_count == 5
+    assert Statistics(runner).exit_reason == "fuzzed for max_calls=5 test cases"
+
+
+@settings(database=None)
+@given(st.integers(0, 2 ** 16))
+def fuzz_target(n):
+    assert n < 1000
+
+
+@settings(database=None)
+@given(st.booleans())
+def passing_fuzz_target(b):
+    pass
+
+
+def test_command_line_fuzzes_the_named_test():
+    with capture_out():
+        assert main([__name__ + ":fuzz_target"]) == 1
+        assert main([__name__ + ":passing_fuzz_target", "--max-calls=10"]) == 0
+
+
+def test_command_line_can_fuzz_a_shard():
+    with capture_out():
+        assert main([__name__ + ":fuzz_target", "--shard=1/3"]) == 1
+
+
+@pytest.mark.parametrize("shard", ["3/3", "-1/3", "1", "a/b"])
+def test_command_line_rejects_bad_shards(shard):
+    with pytest.raises(SystemExit):
+        main([__name__ + ":passing_fuzz_target", "--shard", shard])
+
+
+def test_command_line_merges_databases_and_replays_their_failures(
+    tmpdir, monkeypatch
+):
+    shards = [str(tmpdir.join("shard%d" % (i,))) for i in hrange(2)]
+
+    def make_target(path):
+        @settings(database=DirectoryBasedExampleDatabase(path))
+        @given(st.integers(0, 2 ** 16))
+        def merge_target(n):
+            assert n < 1000
+
+        return merge_target
+
+    for i, path in enumerate(shards):
+        with capture_out():
+            with pytest.raises(AssertionError):
+                make_target(path).hypothesis.fuzz(shard=(i, 2))
+
+    target = make_target(str(tmpdir.join("merged")))
+    monkeypatch.setattr(sys.modules[__name__], "merge_target", target, raising=False)
+    name = __name__ + ":merge_target"
+    with capture_out() as out:
+        assert main([name, "--merge"] + shards) == 1
+    assert out.getvalue().count("Merged") == 2
+    assert "merge_target(n=1000)" in out.getvalue()
+
+
+def test_command_line_cannot_merge_without_a_directory_database(tmpdir):
+    with pytest.raises(SystemExit):
+        main([__name__ + ":fuzz_target", "--merge", str(tmpdir)])
+
+
+@pytest.mark.parametrize("name", ["fuzz_target", __name__ + ":main", "os:nope"])
+def test_command_line_rejects_bad_test_names(name):
+    with pytest.raises(SystemExit):
+        main([name])
@@ -0,0 +1,108 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import absolute_import, division, print_function
+
+from hypothesis.database import InMemoryExampleDatabase
+from hypothesis.internal.scheduling import (
+    DEFAULT_SECONDS_PER_EXAMPLE,
+    MIN_EXAMPLES,
+    BudgetScheduler,
+    RunHistory,
+    history_key,
+    load_history,
+    save_history,
+)
+
+
+def test_history_round_trips_through_the_database():
+    db = InMemoryExampleDatabase()
+    history = RunHistory(runs=3, failures=1, examples=300, seconds=1.5)
+    save_history(db, b"key", history)
+    save_history(db, b"key", history)
+    assert len(list(db.fetch(history_key(b"key")))) == 1
+    assert load_history(db, b"key") == history
+
+
+def test_missing_or_corrupt_history_is_empty():
+    db = InMemoryExampleDatabase()
+    assert load_history(db, b"key") == RunHistory()
+    db.save(history_key(b"key"), b"\xff not json")
+    assert load_history(db, b"key") == RunHistory()
+
+
+def test_unseen_tests_have_a_nonzero_failure_rate():
+    assert RunHistory().failure_rate == 0.5
+    assert RunHistory().seconds_per_example is None
+
+
+def test_new_tests_are_assumed_to_be_typical():
+    scheduler = BudgetScheduler(10)
+    scheduler.add("new", RunHistory())
+    assert scheduler.seconds_per_example("new") == DEFAULT_SECONDS_PER_EXAMPLE
+    scheduler.add("old", RunHistory(runs=1, examples=10, seconds=1.0))
+    assert scheduler.seconds_per_example("new") == 0.1
+
+
+def test_favours_cheap_tests():
+    scheduler = BudgetScheduler(10)
+    scheduler.add("cheap", RunHistory(runs=1, examples=100, seconds=0.1))
+    scheduler.add("expensive", RunHistory(runs=1, examples=100, seconds=10.0))
+    cheap = scheduler.allocate("cheap")
+    assert cheap.seconds > 9
+    assert cheap.max_examples > 1000
+
+
+def test_favours_tests_that_found_bugs():
+    scheduler = BudgetScheduler(10)
+    scheduler.add("fruitless", RunHistory(runs=10, examples=100, seconds=1.0))
+    scheduler.add(
+        "fruitful", RunHistory(runs=10, failures=9, examples=100, seconds=1.0)
+    )
+    assert scheduler.allocate("fruitless").seconds < 2
+
+
+def test_always_allows_a_few_examples():
+    scheduler = BudgetScheduler(0)
+    scheduler.add("a", RunHistory(runs=1, examples=1, seconds=1.0))
+    allocation = scheduler.allocate("a")
+    assert allocation.max_examples == MIN_EXAMPLES
+    assert allocation.time_budget == MIN_EXAMPLES
+    assert allocation.seconds == 2 * MIN_EXAMPLES
+
+
+def test_unused_time_passes_to_later_tests():
+    scheduler = BudgetScheduler(10)
+    for name in "ab":
+        scheduler.add(name, RunHistory(runs=1, examples=100, seconds=1.0))
+    allocation = scheduler.allocate("a")
+    assert allocation.seconds == 5
+    # Generating and shrinking can each take up to the time budget.
+    assert allocation.time_budget == 2.5
+    assert allocation.max_examples == 250
+    history = scheduler.record("a", seconds=1.0, examples=100, failed=True)
+    assert history == RunHistory(runs=2, failures=1, examples=200, seconds=2.0)
+    assert scheduler.allocate("b").seconds == 9
+
+
+def test_workers_share_the_budget():
+    scheduler = BudgetScheduler(10, workers=2)
+    for name in "abcd":
+        scheduler.add(name, RunHistory(runs=1, examples=100, seconds=1.0))
+    # This worker has half of the budget, and expects to run "a" and half of
+    # the other three tests.
+    assert scheduler.allocate("a").seconds == 2
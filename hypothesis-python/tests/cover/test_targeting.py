@@ -0,0 +1,140 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import absolute_import, division, print_function
+
+import pytest
+
+from hypothesis import Phase, given, settings, strategies as st, target
+from hypothesis.control import BuildContext
+from hypothesis.errors import InvalidArgument
+from hypothesis.internal.compat import hbytes, int_from_bytes
+from hypothesis.internal.conjecture.data import ConjectureData, Status
+from hypothesis.internal.conjecture.engine import ConjectureRunner
+from hypothesis.statistics import Statistics
+from tests.common.utils import no_shrink
+
+TARGET = 12345678
+
+
+def distance_from_target(data):
+    n = int_from_bytes(data.draw_bytes(4))
+    data.target_observations[""] = -abs(n - TARGET)
+    if n == TARGET:
+        data.mark_interesting()
+
+
+def test_hill_climbs_to_a_rare_failure():
+    runner = ConjectureRunner(
+        distance_from_target,
+        settings=settings(max_examples=1000, database=None, phases=no_shrink),
+    )
+    runner.run()
+    assert runner.interesting_examples
+    assert runner.best_observed_targets[""] == 0
+
+
+def test_does_not_hill_climb_without_the_target_phase():
+    runner = ConjectureRunner(
+        distance_from_target,
+        settings=settings(
+            max_examples=100, database=None, phases=[Phase.generate, Phase.shrink]
+        ),
+    )
+    runner.run()
+    assert not runner.interesting_examples
+    assert runner.best_observed_targets[""] < 0
+
+
+def test_can_hill_climb_without_generating():
+    runner = ConjectureRunner(
+        distance_from_target,
+        settings=settings(max_examples=1000, database=None, phases=[Phase.target]),
+    )
+    runner.cached_test_function(hbytes(4))
+    runner.run()
+    assert runner.interesting_examples
+
+
+def test_records_best_example_for_each_label():
+    def f(data):
+        a, b = data.draw_bytes(2)
+        data.target_observations["a"] = a
+        data.target_observations["b"] = -b
+
+    runner = ConjectureRunner(f, settings=settings(max_examples=100, database=None))
+    runner.run()
+    assert runner.best_observed_targets == {"a": 255, "b": 0}
+    assert runner.best_examples_of_observed_targets["a"].buffer[0] == 255
+    assert runner.best_examples_of_observed_targets["b"].buffer[1] == 0
+    assert any("label='a'" in line for line in Statistics(runner).get_description())
+
+
+@given(st.binary(min_size=4, max_size=4))
+@settings(database=None, max_examples=1000, phases=no_shrink)
+def find_target_with_given(b):
+    n = int_from_bytes(b)
+    target(-abs(n - TARGET))
+    assert n != TARGET
+
+
+def test_target_guides_given():
+    with pytest.raises(AssertionError):
+        find_target_with_given()
+
+
+def test_target_returns_observation():
+    with BuildContext(ConjectureData.for_buffer(b"")):
+        assert target(1.5) == 1.5
+
+
+def test_target_records_observation_on_data():
+    data = ConjectureData.for_buffer(b"")
+    with BuildContext(data):
+        target(1, label="hi")
+    assert data.target_observations == {"hi": 1}
+    data.freeze()
+    assert data.status == Status.VALID
+    assert data.as_result().target_observations == {"hi": 1}
+
+
+@pytest.mark.parametrize(
+    "observation", [None, True, "1", float("nan"), float("inf"), -float("inf")]
+)
+def test_target_rejects_invalid_observations(observation):
+    with BuildContext(ConjectureData.for_buffer(b"")):
+        with pytest.raises(InvalidArgument):
+            target(observation)
+
+
+def test_target_rejects_non_string_label():
+    with BuildContext(ConjectureData.for_buffer(b"")):
+        with pytest.raises(InvalidArgument):
+            target(1, label=1)
+
+
+def test_cannot_target_twice_with_the_same_label():
+    with BuildContext(ConjectureData.for_buffer(b"")):
+        target(1, label="x")
+        target(2, label="y")
+        with pytest.raises(InvalidArgument):
+            target(3, label="x")
+
+
+def test_cannot_target_outside_a_test():
+    with pytest.raises(InvalidArgument):
+        target(1)
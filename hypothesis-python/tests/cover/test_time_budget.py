@@ -0,0 +1,110 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import absolute_import, division, print_function
+
+import pytest
+
+import hypothesis.internal.conjecture.engine as engine
+from hypothesis import Phase, given, settings, strategies as st
+from hypothesis.errors import InvalidArgument
+from hypothesis.internal.compat import hbytes
+from hypothesis.internal.conjecture.engine import ConjectureRunner, ExitReason
+from hypothesis.statistics import Statistics
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the engine's clock with one that advances by a second every
+    time it is read."""
+    time = [0.0]
+
+    def benchmark_time():
+        time[0] += 1
+        return time[0]
+
+    monkeypatch.setattr(engine, "benchmark_time", benchmark_time)
+
+
+@pytest.mark.parametrize("value", [0, -1, True, "1", float("nan")])
+def test_time_budget_must_be_a_positive_number(value):
+    with pytest.raises(InvalidArgument):
+        settings(time_budget=value)
+
+
+@pytest.mark.parametrize("value", [None, 1, 0.5])
+def test_valid_time_budgets(value):
+    assert settings(time_budget=value).time_budget == value
+
+
+def test_running_out_of_time_stops_generating(clock):
+    runner = ConjectureRunner(
+        lambda data: data.draw_bytes(8),
+        settings=settings(database=None, max_examples=1000, time_budget=10),
+    )
+    runner.run()
+    assert runner.exit_reason == ExitReason.time_budget
+    assert runner.call_count < 10
+    assert Statistics(runner).exit_reason == (
+        "settings.time_budget=10 ran out while generating"
+    )
+
+
+def test_running_out_of_time_keeps_the_best_failure_so_far(clock):
+    def f(data):
+        if any(data.draw_bytes(10)):
+            data.mark_interesting()
+
+    runner = ConjectureRunner(
+        f,
+        settings=settings(database=None, phases=[Phase.shrink], time_budget=5),
+    )
+    runner.cached_test_function(hbytes([255] * 10))
+    runner.run()
+    assert runner.exit_reason == ExitReason.time_budget
+    (result,) = runner.interesting_examples.values()
+    assert result.buffer != hbytes([0] * 9 + [1])
+    assert Statistics(runner).exit_reason == (
+        "settings.time_budget=5 ran out while shrinking"
+    )
+
+
+def test_generating_and_shrinking_have_separate_budgets(clock):
+    def f(data):
+        if data.draw_bytes(1)[0] >= 10:
+            data.mark_interesting()
+
+    runner = ConjectureRunner(
+        f,
+        settings=settings(database=None, max_examples=1000, time_budget=1000),
+    )
+    runner.run()
+    assert runner.exit_reason == ExitReason.finished
+    (result,) = runner.interesting_examples.values()
+    assert result.buffer == hbytes([10])
+
+
+def test_time_budget_from_given(clock):
+    calls = [0]
+
+    @settings(database=None, max_examples=1000, time_budget=10)
+    @given(st.integers())
+    def test(n):
+        calls[0] += 1
+
+    test()
+    assert calls[0] < 10
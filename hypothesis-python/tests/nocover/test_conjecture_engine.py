@@ -119,8 +119,8 @@ def test_exhaustive_enumeration_of_partial_buffer():
             assert data.status == Status.VALID
             node = 0
             for b in data.buffer:
-                node = runner.tree.nodes[node][b]
-            assert node in runner.tree.dead
+                node = runner.tree.child(node, b)
+            assert runner.tree.is_dead(node)
     assert len(seen) == 256
 
 
@@ -22,7 +22,12 @@ import shutil
 import tempfile
 
 import hypothesis.strategies as st
-from hypothesis.database import DirectoryBasedExampleDatabase, InMemoryExampleDatabase
+from hypothesis.database import (
+    DirectoryBasedExampleDatabase,
+    InMemoryExampleDatabase,
+    PackedExampleDatabase,
+    SQLiteExampleDatabase,
+)
 from hypothesis.stateful import Bundle, RuleBasedStateMachine, rule
 
 
@@ -36,6 +41,10 @@ class DatabaseComparison(RuleBasedStateMachine):
             DirectoryBasedExampleDatabase(exampledir),
             InMemoryExampleDatabase(),
             DirectoryBasedExampleDatabase(exampledir),
+            SQLiteExampleDatabase(os.path.join(self.tempd, "examples.sqlite3")),
+            PackedExampleDatabase(
+                os.path.join(self.tempd, "packed"), compact_threshold=2
+            ),
         ]
 
     keys = Bundle("keys")
@@ -64,6 +73,11 @@ class DatabaseComparison(RuleBasedStateMachine):
         for db in self.dbs:
             db.move(k1, k2, v)
 
+    @rule()
+    def flush(self):
+        for db in self.dbs:
+            db.flush()
+
     @rule(k=keys)
     def values_agree(self, k):
         last = None
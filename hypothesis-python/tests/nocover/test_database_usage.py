@@ -22,6 +22,7 @@ from hypothesis import assume, core, find, given, settings
 from hypothesis.database import InMemoryExampleDatabase
 from hypothesis.errors import NoSuchExample, Unsatisfiable
 from hypothesis.internal.compat import hbytes
+from hypothesis.internal.conjecture.engine import ConjectureRunner
 from tests.common.utils import all_values, non_covering_examples
 
 
@@ -137,3 +138,56 @@ def test_does_not_use_database_when_seed_is_forced(monkeypatch):
         pass
 
     test()
+
+
+def test_prefetches_the_keys_that_the_test_will_fetch():
+    class RecordingDatabase(InMemoryExampleDatabase):
+        def __init__(self):
+            super(RecordingDatabase, self).__init__()
+            self.prefetched = []
+            self.fetched = []
+
+        def prefetch(self, keys):
+            self.prefetched.append(list(keys))
+
+        def fetch_many(self, keys):
+            self.fetched.append(list(keys))
+            return super(RecordingDatabase, self).fetch_many(keys)
+
+    database = RecordingDatabase()
+
+    @settings(database=database, max_examples=1)
+    @given(st.integers())
+    def test(i):
+        pass
+
+    core.prefetch_examples(test)
+    test()
+    assert database.prefetched == database.fetched
+    assert len(database.fetched) == 1
+
+
+def test_a_new_process_reuses_the_explored_tree(monkeypatch):
+    database = InMemoryExampleDatabase()
+    loaded = []
+    load_explored_tree = ConjectureRunner.load_explored_tree
+
+    def load(self):
+        load_explored_tree(self)
+        loaded.append(len(self.explored_tree))
+
+    monkeypatch.setattr(ConjectureRunner, "load_explored_tree", load)
+
+    def make_test():
+        # Each call builds a new strategy whose repr includes the address of
+        # a new object, as it would in a new process.
+        @settings(database=database, max_examples=20)
+        @given(st.tuples(st.just(object()), st.integers()))
+        def test(x):
+            pass
+
+        return test
+
+    make_test()()
+    make_test()()
+    assert loaded[1] > loaded[0]
@@ -17,10 +17,15 @@
 
 from __future__ import absolute_import, division, print_function
 
+import random
 import threading
+import time
 
 import hypothesis.strategies as st
-from hypothesis import given
+from hypothesis import HealthCheck, assume, given, note, settings
+from hypothesis.internal.conjecture.data import ConjectureData
+from hypothesis.internal.entropy import deterministic_PRNG
+from hypothesis.reporting import with_reporter
 
 
 def test_can_run_given_in_thread():
@@ -34,3 +39,114 @@ def test_can_run_given_in_thread():
     t.start()
     t.join()
     assert has_run_successfully[0]
+
+
+def run_in_threads(functions):
+    """Run each of ``functions`` in a thread of its own, all at once, and
+    return a list of what each returned or raised."""
+    results = [None] * len(functions)
+    start = threading.Event()
+
+    def run(i):
+        start.wait()
+        try:
+            results[i] = functions[i]()
+        except BaseException as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(functions))]
+    for t in threads:
+        t.start()
+    start.set()
+    for t in threads:
+        t.join()
+    return results
+
+
+def make_test(i):
+    @settings(
+        derandomize=True,
+        max_examples=200,
+        deadline=None,
+        suppress_health_check=HealthCheck.all(),
+    )
+    @given(
+        st.integers(0, 2000),
+        st.lists(st.deferred(lambda: st.integers(0, 10) | st.tuples(st.none()))),
+        st.data(),
+    )
+    def test(n, xs, data):
+        m = data.draw(st.integers(0, 10))
+        note("m=%d" % (m,))
+        assume(m != 5)
+        time.sleep(0)
+        if i % 2:
+            assert n < 1000 + i
+
+    def run():
+        output = []
+        with with_reporter(output.append):
+            try:
+                test()
+            except AssertionError:
+                return "\n".join(output)
+
+    return run
+
+
+def test_independent_tests_can_run_in_parallel_threads():
+    state = random.getstate()
+    results = run_in_threads([make_test(i) for i in range(16)])
+    assert random.getstate() == state
+    for i, result in enumerate(results):
+        if i % 2:
+            assert "test(n=%d, xs=[], data=data(...))" % (1000 + i,) in result
+            assert "m=0" in result
+        else:
+            assert result is None
+
+
+def test_test_counters_are_unique_across_threads():
+    def make_counters():
+        return [ConjectureData.for_buffer(b"").testcounter for _ in range(1000)]
+
+    results = run_in_threads([make_counters] * 8)
+    counters = [c for r in results for c in r]
+    assert len(set(counters)) == len(counters)
+
+
+def seeded_values(n):
+    r = random.Random(0)
+    return [r.random() for _ in range(n)]
+
+
+def test_a_second_thread_does_not_reseed_the_global_prng():
+    entered = threading.Event()
+    left = threading.Event()
+
+    def second():
+        entered.wait()
+        with deterministic_PRNG():
+            pass
+        left.set()
+
+    t = threading.Thread(target=second)
+    t.start()
+    state = random.getstate()
+    with deterministic_PRNG():
+        values = [random.random()]
+        entered.set()
+        left.wait()
+        values.append(random.random())
+    t.join()
+    assert values == seeded_values(2)
+    assert random.getstate() == state
+
+
+def test_nested_deterministic_prng_restores_the_outer_state():
+    with deterministic_PRNG():
+        values = [random.random()]
+        with deterministic_PRNG():
+            assert [random.random(), random.random()] == seeded_values(2)
+        values.append(random.random())
+    assert values == seeded_values(2)
@@ -0,0 +1,136 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import absolute_import, division, print_function
+
+import sys
+
+import pytest
+
+from hypothesis import Phase, settings
+from hypothesis.database import InMemoryExampleDatabase
+from hypothesis.internal.compat import hbytes
+from hypothesis.internal.conjecture.data import ConjectureData
+from hypothesis.internal.conjecture.engine import ConjectureRunner
+from hypothesis.internal.conjecture.tracing import Tracer, should_trace_file
+
+pytestmark = pytest.mark.skipif(
+    sys.gettrace() is not None, reason="Tracing is disabled under another tracer"
+)
+
+
+def branchy(x):
+    if x:
+        return 1
+    return 2
+
+
+def test_tracer_distinguishes_branches():
+    with Tracer() as taken:
+        branchy(True)
+    with Tracer() as not_taken:
+        branchy(False)
+    assert taken.branches
+    assert not_taken.branches
+    assert taken.branches != not_taken.branches
+
+
+def test_tracer_restores_no_trace_function():
+    with Tracer():
+        pass
+    assert sys.gettrace() is None
+
+
+def test_tracer_does_not_replace_existing_trace_function():
+    def existing(frame, event, arg):
+        return None
+
+    sys.settrace(existing)
+    try:
+        with Tracer() as tracer:
+            branchy(True)
+        assert sys.gettrace() is existing
+    finally:
+        sys.settrace(None)
+    assert not tracer.branches
+
+
+def test_tracer_ignores_hypothesis_and_stdlib():
+    assert should_trace_file(__file__)
+    assert not should_trace_file(ConjectureData.__init__.__code__.co_filename)
+    assert not should_trace_file(sys.modules["os"].__file__)
+    assert not should_trace_file("<string>")
+
+
+def nested_conditions(data):
+    a, b, c = data.draw_bytes(3)
+    if a == 7:
+        if b == 1:
+            if c == 3:
+                data.mark_interesting()
+
+
+def test_coverage_guided_generation_saves_new_branches():
+    db = InMemoryExampleDatabase()
+    runner = ConjectureRunner(
+        nested_conditions,
+        settings=settings(database=db, coverage_guided=True, max_examples=200),
+        database_key=b"key",
+    )
+    runner.run()
+    assert runner.covered_branches
+    assert db.data[runner.covering_key]
+
+
+def test_coverage_guided_generation_is_off_by_default():
+    runner = ConjectureRunner(nested_conditions, settings=settings(max_examples=50))
+    runner.run()
+    assert not runner.covered_branches
+
+
+def test_does_not_trace_while_shrinking():
+    traced = []
+
+    def f(data):
+        traced.append(sys.gettrace() is not None)
+        if data.draw_bytes(1)[0] > 0:
+            data.mark_interesting()
+
+    runner = ConjectureRunner(f, settings=settings(coverage_guided=True, database=None))
+    runner.run()
+    assert runner.interesting_examples
+    assert traced[0]
+    assert not traced[-1]
+    assert traced == sorted(traced, reverse=True)
+
+
+def test_coverage_corpus_is_replayed_and_pruned():
+    db = InMemoryExampleDatabase()
+
+    runner = ConjectureRunner(
+        nested_conditions,
+        settings=settings(database=db, coverage_guided=True, phases=[Phase.reuse]),
+        database_key=b"key",
+    )
+    covering_key = runner.covering_key
+    useful = hbytes([7, 1, 0])
+    redundant = hbytes([7, 1, 1])
+    db.save(covering_key, useful)
+    db.save(covering_key, redundant)
+    runner.run()
+    assert runner.covered_branches
+    assert set(db.fetch(covering_key)) == {useful}
@@ -0,0 +1,168 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import absolute_import, division, print_function
+
+import os
+import signal
+
+import pytest
+
+from hypothesis import assume, batched, example, given, note, settings, strategies as st
+from hypothesis.errors import InvalidArgument, WorkerProcessError
+from hypothesis.executors import WorkerProcessPool, worker_processes
+from hypothesis.internal.conjecture.workers import can_fork
+from tests.common.utils import capture_out
+
+pytestmark = pytest.mark.skipif(not can_fork(), reason="requires os.fork")
+
+
+def record_pid(path):
+    with open(path, "a") as o:
+        o.write("%d\n" % (os.getpid(),))
+
+
+def read_pids(path):
+    with open(path) as i:
+        return set(map(int, i.read().split()))
+
+
+def test_runs_the_test_in_reused_worker_processes(tmpdir):
+    path = str(tmpdir.join("pids"))
+
+    @settings(database=None, max_examples=100)
+    @worker_processes(max_examples_per_worker=10)
+    @given(st.integers())
+    def test(n):
+        record_pid(path)
+
+    test()
+    pids = read_pids(path)
+    assert os.getpid() not in pids
+    assert len(pids) == 10
+
+
+def test_runs_explicit_examples_in_process(tmpdir):
+    path = str(tmpdir.join("pids"))
+
+    @settings(database=None, max_examples=1)
+    @worker_processes()
+    @example(n=-1)
+    @given(st.integers(0, 10))
+    def test(n):
+        if n < 0:
+            record_pid(path)
+
+    test()
+    assert read_pids(path) == {os.getpid()}
+
+
+def test_a_worker_crashing_is_a_failure_that_shrinks():
+    @settings(database=None)
+    @worker_processes()
+    @given(st.integers(0, 1000))
+    def test(n):
+        if n >= 300:
+            os.kill(os.getpid(), signal.SIGKILL)
+
+    with capture_out() as out:
+        with pytest.raises(WorkerProcessError) as e:
+            test()
+    assert "test(n=300)" in out.getvalue()
+    assert "exit code %d" % (-signal.SIGKILL,) in str(e.value)
+
+
+def test_reports_exceptions_and_notes_from_the_worker():
+    @settings(database=None)
+    @worker_processes()
+    @given(st.integers(0, 1000))
+    def test(n):
+        note("n is %d" % (n,))
+        assert n < 500
+
+    with capture_out() as out:
+        with pytest.raises(WorkerProcessError) as e:
+            test()
+    assert "test(n=500)" in out.getvalue()
+    assert "n is 500" in out.getvalue()
+    assert "AssertionError" in str(e.value)
+
+
+def test_distinct_failures_in_workers_are_reported_separately():
+    @settings(database=None)
+    @worker_processes()
+    @given(st.integers(0, 1000))
+    def test(n):
+        if n >= 10:
+            raise ValueError()
+        if n >= 1:
+            raise KeyError()
+
+    with pytest.raises(Exception) as e:
+        test()
+    assert "2 distinct failures" in str(e.value)
+
+
+def test_rejects_examples_that_fail_assumptions_in_the_worker():
+    @settings(database=None, max_examples=20)
+    @worker_processes()
+    @given(st.integers())
+    def test(n):
+        assume(n % 2 == 0)
+
+    test()
+
+
+def test_cannot_be_batched():
+    @settings(database=None)
+    @worker_processes()
+    @batched(2)
+    @given(st.integers())
+    def test(xs):
+        pass
+
+    with pytest.raises(InvalidArgument):
+        test()
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"processes": 0},
+        {"max_examples_per_worker": 0},
+        {"max_rss_growth": 0},
+        {"processes": 1.5},
+    ],
+)
+def test_validates_arguments(kwargs):
+    with pytest.raises(InvalidArgument):
+        worker_processes(**kwargs)
+
+
+def test_pool_replaces_workers_that_grow_too_much():
+    def grow(n):
+        grow.ballast.append(b"\x01" * n)
+        return os.getpid()
+
+    grow.ballast = []
+    pool = WorkerProcessPool(grow, processes=1, max_rss_growth=2 ** 20)
+    try:
+        assert pool.run(10) == pool.run(10)
+        assert pool.run(10 * 2 ** 20) != pool.run(10)
+    finally:
+        pool.close()
+    assert pool.workers_started == 2
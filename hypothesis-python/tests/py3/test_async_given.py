@@ -0,0 +1,158 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import absolute_import, division, print_function
+
+import asyncio
+import re
+
+import pytest
+
+from hypothesis import assume, example, given, note, settings, strategies as st
+from hypothesis.errors import InvalidArgument
+from tests.common.utils import capture_out
+
+
+def test_runs_every_example_on_one_event_loop():
+    loops = set()
+
+    @settings(database=None)
+    @given(st.integers())
+    async def test(n):
+        await asyncio.sleep(0)
+        loops.add(asyncio.get_event_loop())
+
+    test()
+    assert len(loops) == 1
+    assert all(loop.is_closed() for loop in loops)
+
+
+def test_runs_explicit_examples():
+    seen = []
+
+    @settings(database=None, max_examples=1)
+    @example(n=-1)
+    @given(st.integers(0, 10))
+    async def test(n):
+        seen.append(n)
+
+    test()
+    assert seen[0] == -1
+
+
+def test_reports_and_shrinks_failures():
+    @settings(database=None)
+    @given(st.integers(0, 1000))
+    async def test(n):
+        await asyncio.sleep(0)
+        assert n < 500
+
+    with capture_out() as out:
+        with pytest.raises(AssertionError):
+            test()
+    assert "test(n=500)" in out.getvalue()
+
+
+def test_runs_examples_concurrently():
+    running = [0]
+    most_running = [0]
+
+    @settings(database=None, max_examples=50, concurrency=5)
+    @given(st.integers())
+    async def test(n):
+        running[0] += 1
+        most_running[0] = max(most_running[0], running[0])
+        await asyncio.sleep(0)
+        running[0] -= 1
+
+    test()
+    assert most_running[0] == 5
+
+
+def test_attributes_and_shrinks_concurrent_failures_per_example():
+    @settings(database=None, concurrency=10)
+    @given(st.integers(0, 1000))
+    async def test(n):
+        await asyncio.sleep(0)
+        note("n is %d" % (n,))
+        assert n < 500
+
+    with capture_out() as out:
+        with pytest.raises(AssertionError):
+            test()
+    assert "test(n=500)" in out.getvalue()
+    assert "n is 500" in out.getvalue()
+
+
+def test_concurrent_examples_can_reject_themselves():
+    seen = []
+
+    @settings(database=None, concurrency=10)
+    @given(st.integers(0, 1000))
+    async def test(n):
+        await asyncio.sleep(0)
+        assume(n % 2 == 0)
+        seen.append(n)
+
+    test()
+    assert seen
+    assert all(n % 2 == 0 for n in seen)
+
+
+def test_concurrent_examples_draw_from_their_own_data():
+    @settings(database=None, concurrency=10)
+    @given(st.data())
+    async def test(data):
+        x = data.draw(st.integers(0, 1000))
+        await asyncio.sleep(0)
+        y = data.draw(st.integers(0, 1000))
+        assert x + y < 1000
+
+    with capture_out() as out:
+        with pytest.raises(AssertionError):
+            test()
+    draws = re.findall(r"Draw \d: (\d+)", out.getvalue())
+    assert sum(map(int, draws)) == 1000
+
+
+@pytest.mark.parametrize("value", [0, -1, True, 1.5, "2"])
+def test_concurrency_must_be_a_positive_integer(value):
+    with pytest.raises(InvalidArgument):
+        settings(concurrency=value)
+
+
+def test_custom_executors_are_passed_the_coroutine():
+    class TestWithExecutor(object):
+        def __init__(self):
+            self.loop = asyncio.new_event_loop()
+
+        def execute_example(self, f):
+            return self.loop.run_until_complete(f())
+
+        @settings(database=None, max_examples=10)
+        @given(st.integers())
+        async def test(self, n):
+            await asyncio.sleep(0)
+            seen.append(n)
+
+    seen = []
+    runner = TestWithExecutor()
+    try:
+        runner.test()
+    finally:
+        runner.loop.close()
+    assert len(seen) == 10
@@ -0,0 +1,52 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import absolute_import, division, print_function
+
+pytest_plugins = "pytester"
+
+
+TESTSUITE = """
+from hypothesis import given
+from hypothesis.strategies import integers
+from hypothesis.stateful import RuleBasedStateMachine, rule
+
+
+@given(integers())
+def test_a_given_test(x):
+    pass
+
+
+class Machine(RuleBasedStateMachine):
+    @rule()
+    def step(self):
+        pass
+
+
+TestMachine = Machine.TestCase
+
+
+@given(integers())
+def test_another_given_test(x):
+    pass
+"""
+
+
+def test_prefetching_skips_tests_that_are_not_from_given(testdir):
+    script = testdir.makepyfile(TESTSUITE)
+    result = testdir.runpytest(script)
+    result.assert_outcomes(passed=3)
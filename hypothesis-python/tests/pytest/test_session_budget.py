@@ -0,0 +1,67 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis, which may be found at
+# https://github.com/HypothesisWorks/hypothesis/
+#
+# Most of this work is copyright (C) 2013-2019 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# CONTRIBUTING.rst for a full list of people who may hold copyright, and
+# consult the git log if you need to determine who owns an individual
+# contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at https://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import absolute_import, division, print_function
+
+from hypothesis.extra.pytestplugin import SESSION_BUDGET_OPTION
+
+pytest_plugins = "pytester"
+
+
+TESTSUITE = """
+from hypothesis import given, settings
+from hypothesis.database import DirectoryBasedExampleDatabase
+from hypothesis.strategies import integers
+
+db = DirectoryBasedExampleDatabase(".hypothesis-db")
+
+
+@settings(database=db)
+@given(integers())
+def test_passes(x):
+    pass
+
+
+@settings(database=db)
+@given(integers())
+def test_fails(x):
+    assert x < 100
+"""
+
+
+def test_does_not_report_a_budget_by_default(testdir):
+    script = testdir.makepyfile(TESTSUITE)
+    result = testdir.runpytest(script)
+    assert "Hypothesis Session Budget" not in "\n".join(result.stdout.lines)
+
+
+def test_shares_out_the_session_budget(testdir):
+    script = testdir.makepyfile(TESTSUITE)
+    result = testdir.runpytest(script, SESSION_BUDGET_OPTION + "=1")
+    out = "\n".join(result.stdout.lines)
+    assert "Hypothesis Session Budget" in out
+    assert "of 1.00 seconds for 2 tests" in out
+    assert "test_passes: ran" in out
+    assert "test_fails: ran" in out
+
+
+def test_learns_from_previous_sessions(testdir):
+    script = testdir.makepyfile(TESTSUITE)
+    testdir.runpytest(script, SESSION_BUDGET_OPTION + "=1")
+    assert testdir.tmpdir.join(".hypothesis-db").check(dir=True)
+    result = testdir.runpytest(script, SESSION_BUDGET_OPTION + "=1")
+    result.assert_outcomes(passed=1, failed=1)
@@ -17,11 +17,12 @@
 
 from __future__ import absolute_import, division, print_function
 
+import json
 from distutils.version import LooseVersion
 
 import pytest
 
-from hypothesis.extra.pytestplugin import PRINT_STATISTICS_OPTION
+from hypothesis.extra.pytestplugin import PRINT_STATISTICS_OPTION, TIMING_JSON_OPTION
 
 pytest_plugins = "pytester"
 
@@ -74,6 +75,19 @@ def test_prints_statistics_given_option_under_xdist(testdir):
     assert "< 10% of examples satisfied assumptions" in out
 
 
+def test_writes_engine_profiles_given_option(testdir):
+    script = testdir.makepyfile(TESTSUITE)
+    path = str(testdir.tmpdir.join("timing.json"))
+    testdir.runpytest(script, TIMING_JSON_OPTION + "=" + path)
+    with open(path) as f:
+        data = json.load(f)
+    assert len(data["tests"]) == 2
+    for profile in data["tests"].values():
+        assert "generate" in profile["phases"]
+        assert profile["tree_size"] > 1
+    assert data["total"]["calls"] == sum(p["calls"] for p in data["tests"].values())
+
+
 UNITTEST_TESTSUITE = """
 
 from hypothesis import given